@@ -4,6 +4,9 @@
 # - Estrategia ACTIVA: WINNER/CHAMPION (Energy + Structure)
 # - Datos: Google Sheets (1200 velas) + wait/poll para esperar incremental job
 # - Anti-caídas: estado.json (transición real + last_close_ms)
+# - Warm start: snapshot .npz de features/posición junto a STATE_PATH
+# - Modo daemon (BOT_DAEMON=true o --daemon): proceso largo alineado a
+#   los cierres 5m (hora servidor Binance), clientes/features en memoria
 # - Telegram: incluye precio BTC (trigger) + precio BNB (trade)
 # - PRIORIDAD 1:
 #     * retry real de ejecución
@@ -14,6 +17,8 @@
 import os
 import sys
 import time
+import signal as os_signal
+import threading
 import requests
 import pandas as pd
 import numpy as np
@@ -24,9 +29,11 @@ from pandas.api.types import is_datetime64tz_dtype
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from utils.load_from_sheets import load_symbol_df
+from utils.feature_store import FeatureStore, snapshot_path_for
+from utils.candle_clock import CandleClock
+from utils.binance_fetch import get_server_time_offset_ms
 from utils.trade_executor_router import route_signal
-from utils.trade_executor_margin import get_margin_operational_state_fresh
-from signal_tracker import cargar_estado_anterior, guardar_estado_actual
+from signal_tracker import cargar_estado_anterior, guardar_estado_actual, compactar_estado
 
 
 # ==========================================================
@@ -38,6 +45,8 @@ TRADE_SYMBOL   = os.getenv("TRADE_SYMBOL", "BNBUSDT").strip().upper()
 
 DRY_RUN        = os.getenv("DRY_RUN", "false").lower() == "true"
 STATE_PATH     = os.getenv("STATE_PATH", "./estado.json")
+# Snapshot de features (cola mínima + posición) para arrancar en caliente
+FEATURE_SNAPSHOT_PATH = os.getenv("FEATURE_SNAPSHOT_PATH") or str(snapshot_path_for(STATE_PATH))
 
 TOKEN   = os.getenv("TELEGRAM_TOKEN")
 CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
@@ -48,6 +57,10 @@ USE_MARGIN = os.getenv("USE_MARGIN", "false").lower() == "true"
 MAX_WAIT_SECONDS = int(os.getenv("MAX_WAIT_SECONDS", "90"))
 POLL_EVERY_SEC   = int(os.getenv("POLL_EVERY_SEC", "6"))
 
+# Modo daemon: espera tras el cierre 5m antes de leer Sheets (el incremental escribe ~:20–:40)
+DAEMON_MODE      = os.getenv("BOT_DAEMON", "false").lower() == "true" or "--daemon" in sys.argv
+DAEMON_DELAY_SEC = float(os.getenv("DAEMON_DELAY_SEC", "15"))
+
 # Retry de ejecución (PRIORIDAD 1)
 MAX_ROUTE_RETRIES      = int(os.getenv("MAX_ROUTE_RETRIES", "3"))
 ROUTE_RETRY_SLEEP_SEC  = int(os.getenv("ROUTE_RETRY_SLEEP_SEC", "3"))
@@ -59,6 +72,8 @@ STRICT_TRADE_SYMBOL = os.getenv("STRICT_TRADE_SYMBOL", "true").lower() == "true"
 print("==================================================", flush=True)
 print("🚀 alert_bot.py — BTC Trigger → BNB Exec (5m) [SHEETS MODE]", flush=True)
 print(f"🔧 DRY_RUN={DRY_RUN} | USE_MARGIN={USE_MARGIN}", flush=True)
+print(f"🧊 FEATURE_SNAPSHOT_PATH={FEATURE_SNAPSHOT_PATH}", flush=True)
+print(f"🔁 DAEMON_MODE={DAEMON_MODE} | DAEMON_DELAY_SEC={DAEMON_DELAY_SEC}", flush=True)
 print(f"🎯 TRIGGER_SYMBOL={TRIGGER_SYMBOL}", flush=True)
 print(f"💱 TRADE_SYMBOL={TRADE_SYMBOL}", flush=True)
 print(f"🔒 STRICT_TRADE_SYMBOL={STRICT_TRADE_SYMBOL} | ALLOWED_SYMBOLS={ALLOWED_SYMBOLS_ENV or '(not set)'}", flush=True)
@@ -175,6 +190,9 @@ def evaluar_reconciliacion_pre_trade(signal: str, symbol: str) -> dict:
       3) BUY  + ya hay posición real        -> BLOCK
       4) SELL + no hay posición real        -> BLOCK
     """
+    # import diferido: solo USE_MARGIN llega aquí (SPOT no carga el executor margin)
+    from utils.trade_executor_margin import get_margin_operational_state_fresh
+
     oper = get_margin_operational_state_fresh(symbol)
 
     if not oper.get("ok", False):
@@ -385,117 +403,56 @@ def _wait_trade_sheet_at_least(symbol: str, target_ts: pd.Timestamp) -> pd.DataF
 
 
 # ==========================================================
-# WINNER/CHAMPION functions (Energy + Structure)
+# WINNER/CHAMPION — features incrementales + warm start
+# ----------------------------------------------------------
+# Misma estrategia que utils/strategy_winner_champion (FeatureStore).
+# Con snapshot válido solo se calculan las velas nuevas y la state
+# machine sellraw continúa desde la posición guardada; si el snapshot
+# no existe / es viejo / no cuadra con Sheets → recálculo completo.
 # ==========================================================
 
-def rolling_z(x: pd.Series, win: int) -> pd.Series:
-    mu = x.rolling(win, min_periods=win).mean()
-    sd = x.rolling(win, min_periods=win).std().replace(0, np.nan)
-    return ((x - mu) / sd).fillna(0.0)
-
-
-def build_features_winner(df: pd.DataFrame) -> pd.DataFrame:
-    d = df.copy()
-    eps = 1e-12
-
-    d["mom"] = d["Close"].diff()
-    d["mom_smooth"] = d["mom"].rolling(int(P["mom_win"]), min_periods=1).mean()
-
-    d["speed"] = d["mom_smooth"].diff()
-    d["speed_smooth"] = d["speed"].rolling(int(P["speed_win"]), min_periods=1).median()
-
-    d["accel"] = d["speed_smooth"].diff()
-    d["accel_smooth"] = d["accel"].rolling(int(P["accel_win"]), min_periods=1).median()
-
-    std_speed = d["speed_smooth"].rolling(int(P["z_win"])).std().replace(0, np.nan)
-    std_accel = d["accel_smooth"].rolling(int(P["z_win"])).std().replace(0, np.nan)
-
-    d["zspeed"] = (d["speed_smooth"] / std_speed).fillna(0.0)
-    d["zaccel"] = (d["accel_smooth"] / std_accel).fillna(0.0)
-
-    d["buy_raw"] = (
-        (d["zspeed"].shift(1) < 0) &
-        (d["zspeed"] > float(P["zspeed_min"])) &
-        (d["zaccel"] > float(P["zaccel_min"]))
-    ).fillna(False).astype(bool)
-
-    d["sell_raw"] = (
-        (d["zspeed"].shift(1) > 0) &
-        (d["zspeed"] < -float(P["zspeed_min"])) &
-        (d["zaccel"] < -float(P["zaccel_min"]))
-    ).fillna(False).astype(bool)
-
-    d["energy"] = d["speed_smooth"] * d["accel_smooth"]
-    d["zenergy"] = rolling_z(d["energy"], int(ENERGY_ZWIN))
-    d["zenergy_diff"] = d["zenergy"].diff().fillna(0.0)
-
-    d["range"] = (d["High"] - d["Low"]).clip(lower=0.0)
-    d["body"] = (d["Close"] - d["Open"]).abs()
-    d["upper_wick"] = (d["High"] - d[["Open", "Close"]].max(axis=1)).clip(lower=0.0)
-    d["lower_wick"] = (d[["Open", "Close"]].min(axis=1) - d["Low"]).clip(lower=0.0)
-
-    d["body_ratio"] = (d["body"] / (d["range"] + eps)).clip(0, 1)
-    d["wick_ratio"] = ((d["upper_wick"] + d["lower_wick"]) / (d["range"] + eps)).clip(0, 2)
-
-    d["range_pct"] = d["range"] / (d["Close"] + eps)
-    d["z_range_pct"] = rolling_z(d["range_pct"], int(STRUCT_ZWIN))
-    d["vol_z"] = rolling_z(d["Volume"].replace(0, np.nan).ffill().fillna(0.0), int(STRUCT_ZWIN))
-
-    don_hi = d["High"].rolling(int(DON_WIN), min_periods=int(DON_WIN)).max()
-    d["breakout_up"] = (d["Close"] > don_hi.shift(1)).fillna(False).astype(bool)
-
-    score = (
-        0.35 * d["body_ratio"].fillna(0.0) +
-        0.25 * (1.0 - (d["wick_ratio"].fillna(0.0) / 2.0).clip(0, 1)) +
-        0.20 * (1.0 / (1.0 + np.exp(-d["z_range_pct"].fillna(0.0)))) +
-        0.15 * (1.0 / (1.0 + np.exp(-d["vol_z"].fillna(0.0)))) +
-        0.05 * d["breakout_up"].astype(int)
-    )
-    d["struct_score"] = score.clip(0.0, 1.0)
-
-    d["atr_pct"] = d["range_pct"].rolling(int(STRUCT_WIN), min_periods=1).mean().fillna(0.0)
-    return d
-
-
-def struct_modulated_threshold(d: pd.DataFrame, base_thr: float, k: float) -> pd.Series:
-    return float(base_thr) - float(k) * (d["struct_score"] - 0.5)
-
-
-def buy_signal_champion(d: pd.DataFrame) -> pd.Series:
-    buy_base = d["buy_raw"] & (d["zaccel"] >= float(P["zaccel_gate"]))
-    thr_eff  = struct_modulated_threshold(d, ENTRY_ZENERGY_MIN, ENTRY_K_STRUCT)
-
-    buy_ok = buy_base & (d["energy"] > 0) & (d["zenergy"] >= thr_eff)
+WINNER_CFG = dict(
+    ENERGY_ZWIN=ENERGY_ZWIN,
+    STRUCT_ZWIN=STRUCT_ZWIN,
+    STRUCT_WIN=STRUCT_WIN,
+    DON_WIN=DON_WIN,
+    ENTRY_ZENERGY_MIN=ENTRY_ZENERGY_MIN,
+    ENTRY_K_STRUCT=ENTRY_K_STRUCT,
+    ENTRY_USE_ASYM=ENTRY_USE_ASYM,
+    ENTRY_N_DOWN=ENTRY_N_DOWN,
+)
 
-    if ENTRY_USE_ASYM:
-        neg = (d["zenergy_diff"] < 0).astype(int)
-        streak = neg.rolling(int(ENTRY_N_DOWN), min_periods=int(ENTRY_N_DOWN)).sum()
-        buy_ok = buy_ok & (streak < int(ENTRY_N_DOWN)).fillna(True)
 
-    return buy_ok.fillna(False)
+def construir_senales(ohlcv: pd.DataFrame, store: FeatureStore | None = None) -> tuple[FeatureStore, pd.DataFrame]:
+    """
+    store: el de la corrida anterior (modo daemon). Se reutiliza si sigue cuadrando
+    con Sheets; si no, se parte del snapshot en disco o de cero.
+    """
+    motivo = None if store is None else store.mismatch(ohlcv)
 
+    if store is not None and motivo is None:
+        modo = "MEMORY"
+    else:
+        store = FeatureStore(P=P, cfg=WINNER_CFG, max_rows=len(ohlcv) + 1)
+        warm = store.load_snapshot(FEATURE_SNAPSHOT_PATH, candles=ohlcv)
+        modo = "WARM" if warm["ok"] else f"FULL ({motivo or warm['reason']})"
 
-def simulate_sellraw_only(d: pd.DataFrame, buy_ok: pd.Series) -> pd.DataFrame:
-    out = d.copy()
-    n = len(out)
-    BUY = np.zeros(n, dtype=bool)
-    SELL = np.zeros(n, dtype=bool)
+    t0 = time.time()
+    added = store.update(ohlcv)
+    print(f"🧊 [FEATURES] {modo} | velas calculadas={added} | {time.time() - t0:.3f}s", flush=True)
 
-    in_pos = False
-    for i in range(n):
-        b = bool(buy_ok.iloc[i])
-        s = bool(out["sell_raw"].iloc[i])
+    sig, _ = store.snapshot()
+    return store, sig
 
-        if (not in_pos) and b:
-            BUY[i] = True
-            in_pos = True
-        elif in_pos and s:
-            SELL[i] = True
-            in_pos = False
 
-    out["BUY"] = BUY
-    out["SELL"] = SELL
-    return out
+def guardar_snapshot(store: FeatureStore | None) -> None:
+    if store is None:
+        return
+    try:
+        store.save_snapshot(FEATURE_SNAPSHOT_PATH)
+    except Exception as e:
+        # el snapshot es solo una optimización: nunca rompe el bot
+        print(f"⚠️ [FEATURES] no pude guardar snapshot: {e}", flush=True)
 
 
 # ==========================================================
@@ -614,8 +571,11 @@ def ejecutar_trade_con_retry(
 # MAIN
 # ==========================================================
 
-def main():
-    estado_anterior = cargar_estado_anterior()
+def procesar_vela(estado_anterior: dict, store: FeatureStore | None = None) -> tuple[dict, FeatureStore | None]:
+    """
+    Evalúa la última vela cerrada del trigger (y ejecuta si hay transición).
+    Retorna (estado_actual, store); persistirlos queda a cargo del caller.
+    """
     estado_actual = {}
 
     symbol = TRIGGER_SYMBOL
@@ -630,8 +590,9 @@ def main():
         # 1) Esperar / leer velas de BTC desde Sheets
         btc_ohlcv, ts_last, last_close_ms = _wait_for_fresh_sheet(symbol, prev_close)
 
-        # 2) Señales winner/champion sobre BTC
-        d = build_features_winner(btc_ohlcv)
+        # 2) Señales winner/champion sobre BTC (incremental si hay snapshot válido)
+        store, sig = construir_senales(btc_ohlcv, store)
+        d = sig
 
         try:
             zenergy_max = float(np.nanmax(d["zenergy"]))
@@ -639,9 +600,6 @@ def main():
         except Exception:
             zenergy_max, zaccel_max = np.nan, np.nan
 
-        buy_ok = buy_signal_champion(d)
-        sig = simulate_sellraw_only(d, buy_ok)
-
         print(
             f"[WINNER CFG] zaccel_gate={P['zaccel_gate']} zenergy_min={ENTRY_ZENERGY_MIN} "
             f"k_struct={ENTRY_K_STRUCT} | zenergy_max={zenergy_max:.4f} zaccel_max={zaccel_max:.4f}",
@@ -652,9 +610,8 @@ def main():
         ts = ts_last
         if ts not in sig.index:
             print(f"⚠️ [{symbol}] No encontré ts exacto en winner signals: {ts}", flush=True)
-            estado_actual[symbol] = {"signal": prev_signal, "last_close_ms": last_close_ms}
-            guardar_estado_actual(estado_actual)
-            return
+            estado_actual[symbol] = {**prev, "signal": prev_signal, "last_close_ms": last_close_ms}
+            return estado_actual, store
 
         row = sig.loc[ts]
         curr_clean = "BUY" if bool(row["BUY"]) else "SELL" if bool(row["SELL"]) else None
@@ -731,7 +688,7 @@ def main():
             )
             #    
             if not recon_eval.get("allow_trade", False):
-                estado_actual[symbol] = {"signal": prev_signal, "last_close_ms": last_close_ms}
+                estado_actual[symbol] = {**prev, "signal": prev_signal, "last_close_ms": last_close_ms}
 
                 print(
                     f"⛔ [TRADE BLOCKED] signal={signal} "
@@ -759,10 +716,16 @@ def main():
 
                 # Commit SOLO si el trade realmente se ejecutó
                 if bool(trade_result.get("executed", False)) and trade_result.get("status") == "OK":
-                    estado_actual[symbol] = {"signal": signal, "last_close_ms": last_close_ms}
+                    estado_actual[symbol] = {
+                        **prev,
+                        "signal": signal,
+                        "last_close_ms": last_close_ms,
+                        "in_position": signal == "BUY",
+                        "last_trade_id": trade_result.get("trade_id"),
+                    }
                     print(f"✅ [STATE] Commit de estado por ejecución real: {signal}", flush=True)
                 else:
-                    estado_actual[symbol] = {"signal": prev_signal, "last_close_ms": last_close_ms}
+                    estado_actual[symbol] = {**prev, "signal": prev_signal, "last_close_ms": last_close_ms}
                     print(
                         f"⚠️ [STATE] Sin commit de señal. "
                         f"trade_result.status={trade_result.get('status')} "
@@ -781,16 +744,72 @@ def main():
                     )
             ##
         else:
-            estado_actual[symbol] = {"signal": prev_signal, "last_close_ms": last_close_ms}
+            estado_actual[symbol] = {**prev, "signal": prev_signal, "last_close_ms": last_close_ms}
 
     except Exception as e:
         print(f"❌ Error procesando trigger {TRIGGER_SYMBOL}: {e}", flush=True)
-        estado_actual[symbol] = {"signal": prev_signal, "last_close_ms": prev_close}
+        estado_actual[symbol] = {**prev, "signal": prev_signal, "last_close_ms": prev_close}
+
+    return estado_actual, store
+
+
+def main():
+    estado_actual, store = procesar_vela(cargar_estado_anterior())
 
     print(f"💾 Guardando estado actual: {estado_actual}", flush=True)
     guardar_estado_actual(estado_actual)
+    guardar_snapshot(store)
     print("✅ Finalizado", flush=True)
 
 
+def main_daemon():
+    """
+    Proceso largo: una evaluación por cierre 5m (hora del servidor Binance +
+    DAEMON_DELAY_SEC). Clientes (gspread/binance), estado y features quedan en
+    memoria. SIGTERM/SIGINT cortan la espera y se hace flush del estado.
+    """
+    stop = threading.Event()
+
+    def _on_signal(signum, _frame):
+        print(f"🛑 Señal {signum} recibida → cerrando después del ciclo actual", flush=True)
+        stop.set()
+
+    os_signal.signal(os_signal.SIGTERM, _on_signal)
+    os_signal.signal(os_signal.SIGINT, _on_signal)
+
+    clock = CandleClock(offset_fn=get_server_time_offset_ms)
+    clock.sync()
+    print(f"⏱️ offset servidor Binance={clock.offset_ms}ms (error={clock.last_error})", flush=True)
+
+    estado = cargar_estado_anterior()
+    store = None
+    ciclos = 0
+
+    try:
+        while not stop.is_set():
+            # primer ciclo inmediato (evalúa la última vela cerrada al arrancar)
+            estado_nuevo, store = procesar_vela(estado, store)
+            if estado_nuevo:
+                estado = estado_nuevo
+            guardar_estado_actual(estado)
+            guardar_snapshot(store)
+            ciclos += 1
+
+            clock.maybe_sync()
+            target_ms = clock.next_close_ms() + int(DAEMON_DELAY_SEC * 1000)
+            print(f"😴 ciclo {ciclos} ok → próximo en {clock.seconds_until(target_ms):.1f}s", flush=True)
+            if not clock.sleep_until(target_ms, stop):
+                break
+    finally:
+        print(f"💾 Flush de estado: {estado}", flush=True)
+        guardar_estado_actual(estado)
+        compactar_estado()
+        guardar_snapshot(store)
+        print("✅ Daemon finalizado", flush=True)
+
+
 if __name__ == "__main__":
-    main()
+    if DAEMON_MODE:
+        main_daemon()
+    else:
+        main()
@@ -1,27 +1,88 @@
 # ==========================================================
 # signal_tracker.py
 # Estado persistente de señales (IRONCLAD)
+# ----------------------------------------------------------
+# - Snapshot JSON (escritura atómica: tmp + rename, fsync opcional)
+# - Journal append-only (JSONL) al lado: cada guardado agrega SOLO
+#   los símbolos que cambiaron (O(1)); se compacta al snapshot cada
+#   STATE_COMPACT_EVERY registros.
+# - Cada registro lleva el estado COMPLETO del símbolo → reaplicar el
+#   journal es idempotente (un crash en medio de la compactación no
+#   corrompe nada). Una última línea cortada se ignora.
+# - Merge por símbolo: guardar un símbolo no borra los demás.
 # ==========================================================
 
 import json
 import os
+import threading
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 # Permite setear por env; por defecto apunta a /data (volume en Railway)
 ARCHIVO_ESTADO = os.getenv("STATE_PATH", "/data/ultima_senal.json")
 
+# fsync en cada escritura (más lento, pero sobrevive a un corte de energía / kill del contenedor)
+STATE_FSYNC = os.getenv("STATE_FSYNC", "false").lower() == "true"
+
+# registros de journal antes de compactar al snapshot
+STATE_COMPACT_EVERY = int(os.getenv("STATE_COMPACT_EVERY", "200"))
+
+SIGNALS_VALIDAS = ("BUY", "SELL", None)
+
+# cache del último estado persistido (para escribir solo diffs)
+_estado_cache: Optional[Dict[str, Dict[str, Any]]] = None
+_journal_len = 0
+_lock = threading.Lock()
+
 
 # ----------------------------------------------------------
 # Helpers
 # ----------------------------------------------------------
 
+def _journal_path() -> Path:
+    p = Path(ARCHIVO_ESTADO)
+    return p.with_name(p.name + ".journal")
+
+
+def _info_valida(info: Dict[str, Any]) -> Dict[str, Any]:
+    signal = info.get("signal")
+    if signal not in SIGNALS_VALIDAS:
+        signal = None
+
+    try:
+        last_close_ms = int(info.get("last_close_ms"))
+    except Exception:
+        last_close_ms = 0
+
+    limpio = {"signal": signal, "last_close_ms": last_close_ms}
+
+    # campos opcionales (estado enriquecido)
+    if info.get("in_position") is not None:
+        limpio["in_position"] = bool(info["in_position"])
+    if info.get("last_trade_id") not in (None, ""):
+        limpio["last_trade_id"] = str(info["last_trade_id"])
+    if info.get("updated_at_ms") is not None:
+        try:
+            limpio["updated_at_ms"] = int(info["updated_at_ms"])
+        except Exception:
+            pass
+
+    return limpio
+
+
 def _estado_valido(data: Any) -> Dict[str, Dict[str, Any]]:
     """
     Valida y normaliza la estructura del estado.
     Esperado:
       {
-        "BTCUSDT": {"signal": "BUY|SELL|None", "last_close_ms": int},
+        "BTCUSDT": {
+            "signal": "BUY|SELL|None",
+            "last_close_ms": int,
+            # opcionales
+            "in_position": bool,
+            "last_trade_id": str,
+            "updated_at_ms": int,
+        },
         ...
       }
     """
@@ -32,58 +93,175 @@ def _estado_valido(data: Any) -> Dict[str, Dict[str, Any]]:
     for symbol, info in data.items():
         if not isinstance(symbol, str) or not isinstance(info, dict):
             continue
+        estado_limpio[symbol] = _info_valida(info)
 
-        signal = info.get("signal")
-        last_close_ms = info.get("last_close_ms")
+    return estado_limpio
 
-        if signal not in ("BUY", "SELL", None):
-            signal = None
 
-        try:
-            last_close_ms = int(last_close_ms)
-        except Exception:
-            last_close_ms = 0
+def _fsync_dir(path: Path) -> None:
+    try:
+        fd = os.open(str(path), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
 
-        estado_limpio[symbol] = {
-            "signal": signal,
-            "last_close_ms": last_close_ms
-        }
 
-    return estado_limpio
+def _escribir_snapshot(estado: Dict[str, Dict[str, Any]]) -> None:
+    """Escritura atómica: tmp (+fsync) → rename (+fsync del directorio)."""
+    p = Path(ARCHIVO_ESTADO)
+    p.parent.mkdir(parents=True, exist_ok=True)
 
+    tmp_path = p.with_suffix(".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(estado, f)
+        if STATE_FSYNC:
+            f.flush()
+            os.fsync(f.fileno())
+    tmp_path.replace(p)  # operación atómica en el filesystem
 
-# ----------------------------------------------------------
-# API pública
-# ----------------------------------------------------------
+    if STATE_FSYNC:
+        _fsync_dir(p.parent)
 
-def cargar_estado_anterior() -> Dict[str, Dict[str, Any]]:
+
+def _leer_snapshot() -> Dict[str, Dict[str, Any]]:
     p = Path(ARCHIVO_ESTADO)
     if not p.exists():
         return {}
-
     try:
         with open(p, "r") as f:
-            data = json.load(f)
-        return _estado_valido(data)
+            return _estado_valido(json.load(f))
     except Exception as e:
         # Nunca rompemos el bot por estado corrupto
         print(f"⚠️ Estado previo inválido, ignorando: {e}", flush=True)
         return {}
 
 
+def _reaplicar_journal(estado: Dict[str, Dict[str, Any]]) -> int:
+    """Aplica el journal sobre `estado` (in-place). Retorna # registros válidos."""
+    jp = _journal_path()
+    if not jp.exists():
+        return 0
+
+    n = 0
+    try:
+        with open(jp, "r") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    # línea cortada (crash a mitad de append): se ignora
+                    continue
+                symbol = rec.get("symbol") if isinstance(rec, dict) else None
+                if not isinstance(symbol, str):
+                    continue
+                estado[symbol] = _info_valida(rec)
+                n += 1
+    except Exception as e:
+        print(f"⚠️ Journal de estado ilegible, ignorando: {e}", flush=True)
+    return n
+
+
+def _append_journal(cambios: Dict[str, Dict[str, Any]]) -> None:
+    jp = _journal_path()
+    jp.parent.mkdir(parents=True, exist_ok=True)
+
+    lineas = "".join(json.dumps({"symbol": s, **info}) + "\n" for s, info in cambios.items())
+
+    # si quedó una línea cortada al final, arrancar en línea nueva
+    if jp.exists() and jp.stat().st_size > 0:
+        with open(jp, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                lineas = "\n" + lineas
+
+    with open(jp, "a") as f:
+        f.write(lineas)
+        if STATE_FSYNC:
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def _cargar_sin_lock() -> Dict[str, Dict[str, Any]]:
+    global _estado_cache, _journal_len
+    estado = _leer_snapshot()
+    _journal_len = _reaplicar_journal(estado)
+    _estado_cache = estado
+    return {s: dict(info) for s, info in estado.items()}
+
+
+def _compactar_sin_lock() -> None:
+    global _journal_len
+    _escribir_snapshot(_estado_cache or {})
+    # el snapshot ya incluye todo lo del journal → se puede vaciar
+    jp = _journal_path()
+    if jp.exists():
+        jp.unlink()
+    _journal_len = 0
+
+
+# ----------------------------------------------------------
+# API pública
+# ----------------------------------------------------------
+
+def cargar_estado_anterior() -> Dict[str, Dict[str, Any]]:
+    """Snapshot + journal reaplicado."""
+    with _lock:
+        return _cargar_sin_lock()
+
+
 def guardar_estado_actual(estado: Dict[str, Dict[str, Any]]) -> None:
     """
-    Guarda el estado de forma atómica para evitar archivos corruptos.
+    Persiste el estado (merge por símbolo). Solo agrega al journal los
+    símbolos que cambiaron; si nada cambió no escribe.
     """
-    p = Path(ARCHIVO_ESTADO)
-    p.parent.mkdir(parents=True, exist_ok=True)
+    global _journal_len
+    try:
+        with _lock:
+            if _estado_cache is None:
+                _cargar_sin_lock()
 
-    estado_limpio = _estado_valido(estado)
+            cambios = {
+                s: info for s, info in _estado_valido(estado).items()
+                if _estado_cache.get(s) != info
+            }
+            if not cambios:
+                return
 
-    tmp_path = p.with_suffix(".tmp")
-    try:
-        with open(tmp_path, "w") as f:
-            json.dump(estado_limpio, f)
-        tmp_path.replace(p)  # operación atómica en el filesystem
+            _append_journal(cambios)
+            _estado_cache.update(cambios)
+            _journal_len += len(cambios)
+
+            if _journal_len >= STATE_COMPACT_EVERY:
+                _compactar_sin_lock()
     except Exception as e:
         print(f"❌ Error guardando estado: {e}", flush=True)
+
+
+def actualizar_simbolo(symbol: str, **campos) -> Dict[str, Any]:
+    """
+    Actualiza algunos campos de UN símbolo (el resto se conserva) y persiste.
+    Retorna el estado resultante del símbolo.
+    """
+    with _lock:
+        if _estado_cache is None:
+            _cargar_sin_lock()
+        info = _info_valida({**_estado_cache.get(symbol, {}), **campos})
+
+    guardar_estado_actual({symbol: info})
+    return info
+
+
+def compactar_estado() -> None:
+    """Fuerza la compactación journal → snapshot (ej. al apagar el daemon)."""
+    try:
+        with _lock:
+            if _estado_cache is None:
+                _cargar_sin_lock()
+            _compactar_sin_lock()
+    except Exception as e:
+        print(f"❌ Error compactando estado: {e}", flush=True)
@@ -2,20 +2,19 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
+from plotly.subplots import make_subplots
 from streamlit_autorefresh import st_autorefresh
 import streamlit.components.v1 as components
-import time
 import pytz
+import os
 
-from utils.load_from_sheets import load_symbol_df
+from utils.load_from_sheets import load_symbols_df
+from utils.feature_store import FeatureStore, update_many
+from utils.sheets_refresher import SheetsRefresher, last_close_time
+from utils.chart_decimation import decimate_ohlc, decimate_series, signal_markers, window_slice
 
 # ✅ estrategia actual (winner/champion)
-from utils.strategy_winner_champion import (
-    build_features_winner,
-    buy_signal_champion,
-    simulate_sellraw_only,
-    struct_modulated_threshold,
-)
+from utils.strategy_winner_champion import struct_modulated_threshold
 
 # ==============================
 # CONFIG
@@ -27,9 +26,38 @@ st.title("📊 BTCUSDT — Winner/Champion (5m)")
 # Si prefieres 120s, cámbialo.
 st_autorefresh(interval=60_000, key="auto_refresh_60s")
 
-SYMBOL = "BTCUSDT"
+SYMBOL = "BTCUSDT"  # trigger
+TRADE_SYMBOL = os.getenv("TRADE_SYMBOL", "BNBUSDT").strip().upper()
+# Panel: trigger + trade + el resto de pares que mantiene el incremental
+PANEL_SYMBOLS = [
+    s.strip().upper()
+    for s in os.getenv("DASH_SYMBOLS", "BTCUSDT,BNBUSDT,ETHUSDT,ADAUSDT,XRPUSDT").split(",")
+    if s.strip()
+]
+for _s in (TRADE_SYMBOL, SYMBOL):
+    if _s not in PANEL_SYMBOLS:
+        PANEL_SYMBOLS.insert(0, _s)
+
 MAX_VELAS = 220
 
+# Tope de velas del store en memoria. OJO: Sheets guarda ~1199 velas (MAX_KEEP
+# del incremental, ~4 días) → un proceso recién arrancado solo tiene eso; lo
+# demás se acumula en memoria mientras vive el proceso y se pierde al reiniciar.
+HIST_VELAS = 6000
+MAX_CANDLES_PLOT = 600     # velas (o buckets) dibujadas
+MAX_LINE_POINTS = 1500     # puntos por serie en subplots
+
+# Ventana del gráfico → # velas 5m (None = todo lo disponible).
+# El selector solo ofrece las que caben en la historia del store.
+VENTANAS = {
+    f"{MAX_VELAS} velas": MAX_VELAS,
+    "1 día": 288,
+    "3 días": 3 * 288,
+    "1 semana": 7 * 288,
+    "2 semanas": 14 * 288,
+    "Todo": None,
+}
+
 CR = pytz.timezone("America/Costa_Rica")
 
 # ==============================
@@ -92,16 +120,8 @@ def status_card(title: str, value: str, ok: bool, subtitle: str = ""):
     )
 
 # ==============================
-# Helpers (time + load)
+# Helpers (load)
 # ==============================
-def _expected_last_close_local(now_local: pd.Timestamp) -> pd.Timestamp:
-    """
-    Última vela cerrada esperada, en tz local:
-      close = floor_5m(now) - 1ms
-    """
-    floor_5m = now_local.floor("5min")
-    return floor_5m - pd.Timedelta(milliseconds=1)
-
 def prep_ohlcv_for_strategy(df: pd.DataFrame) -> pd.DataFrame:
     """
     Normaliza DF de Sheets → OHLCV indexado por tiempo y numérico.
@@ -128,92 +148,76 @@ def prep_ohlcv_for_strategy(df: pd.DataFrame) -> pd.DataFrame:
 
     return d
 
-def _load_btc_df_once() -> pd.DataFrame:
-    return load_symbol_df(SYMBOL).copy()
+def _load_panel_once() -> dict:
+    # todas las hojas del panel en un solo read (values_batch_get)
+    return load_symbols_df(PANEL_SYMBOLS)
 
-def wait_for_sheet_fresh(max_wait_sec: int = 45, poll_every_sec: int = 6) -> pd.DataFrame:
+# ==============================
+# Cache (compartido entre sesiones)
+# ==============================
+@st.cache_resource
+def get_feature_stores() -> dict:
     """
-    Espera a que Sheets tenga la última vela cerrada esperada (según hora local CR),
-    o hasta timeout, devolviendo lo mejor disponible.
+    Un FeatureStore por símbolo (features + señales ya calculadas), compartidos
+    por todas las sesiones. Cada refresh solo agrega las velas nuevas
+    (recalcula la cola mínima); si no hay vela nueva, el render solo lee.
     """
-    t0 = time.time()
-    last_df = None
-    last_ts = None
-
-    while True:
-        df_raw = _load_btc_df_once()
-        last_df = df_raw
-
-        try:
-            d = prep_ohlcv_for_strategy(df_raw)
-            ts_last = d.index.max()
-            last_ts = ts_last
-        except Exception:
-            ts_last = None
-
-        now_local = pd.Timestamp.now(tz=CR)
-        expected = _expected_last_close_local(now_local)
+    return {s: _new_store() for s in PANEL_SYMBOLS}
 
-        # Si ya tenemos una vela cerrada >= expected, estamos al día
-        if ts_last is not None and pd.notna(ts_last) and ts_last >= expected:
-            return last_df
-
-        waited = int(time.time() - t0)
-        if waited >= max_wait_sec:
-            # timeout: devolvemos lo mejor que tenemos (aunque sea 1 vela atrás)
-            return last_df
-
-        time.sleep(poll_every_sec)
+def _new_store() -> FeatureStore:
+    return FeatureStore(
+        P=P,
+        cfg=dict(
+            ENERGY_ZWIN=ENERGY_ZWIN,
+            STRUCT_ZWIN=STRUCT_ZWIN,
+            STRUCT_WIN=STRUCT_WIN,
+            DON_WIN=DON_WIN,
+            ENTRY_ZENERGY_MIN=ENTRY_ZENERGY_MIN,
+            ENTRY_K_STRUCT=ENTRY_K_STRUCT,
+            ENTRY_USE_ASYM=ENTRY_USE_ASYM,
+            ENTRY_N_DOWN=ENTRY_N_DOWN,
+        ),
+        max_rows=HIST_VELAS,
+    )
 
-# ==============================
-# Cache (para performance)
-# ==============================
-@st.cache_data(ttl=180)
-def load_btc_df_cached() -> pd.DataFrame:
+@st.cache_resource
+def get_refresher() -> SheetsRefresher:
     """
-    Cache para no golpear Sheets todo el tiempo.
-    180s porque tu incremental llega ~:20–:40; y el autorefresh está en 60s.
+    Hilo de background (uno por proceso): carga Sheets alineado a los cierres
+    5m y alimenta el FeatureStore. Las sesiones nunca esperan a Sheets.
     """
-    return _load_btc_df_once()
+    stores = get_feature_stores()
+    return SheetsRefresher(
+        load_fn=_load_panel_once,
+        on_data=lambda frames: update_many(stores, frames, prep=prep_ohlcv_for_strategy),
+        # la frescura la marca el trigger
+        ts_fn=lambda frames: last_close_time(frames.get(SYMBOL)),
+    ).start()
 
 # ==============================
-# LOAD con "freshness gate"
+# LOAD (no bloqueante)
 # ==============================
-with st.spinner("⏳ Sincronizando con Sheets (esperando vela cerrada)..."):
-    # 1) Intentamos esperar un poco por la vela cerrada más reciente.
-    #    Esto reduce el 99% de casos "una vela atrás".
-    df_raw_fresh = wait_for_sheet_fresh(max_wait_sec=45, poll_every_sec=6)
+refresher = get_refresher()
+stores = get_feature_stores()
+store = stores[SYMBOL]
 
-# 2) Para el gráfico, podemos usar el DF fresh (ya que lo tenemos) y además meterlo al flujo.
-#    Si prefieres performance extrema, podrías usar cached aquí. Pero como ya hicimos wait/poll,
-#    lo mejor es usar el fresh en todo el app.
-df_raw = df_raw_fresh.copy()
+if store.snapshot()[1]["rows"] == 0:
+    # solo al arrancar el proceso: todavía no hay nada que mostrar
+    with st.spinner("⏳ Cargando velas desde Sheets..."):
+        refresher.wait_first(timeout=60)
+
+sync = refresher.status()
 
 # ==============================
 # STRATEGY
 # ==============================
 try:
-    df = prep_ohlcv_for_strategy(df_raw)
-
-    d = build_features_winner(
-        df,
-        P=P,
-        ENERGY_ZWIN=ENERGY_ZWIN,
-        STRUCT_ZWIN=STRUCT_ZWIN,
-        STRUCT_WIN=STRUCT_WIN,
-        DON_WIN=DON_WIN,
-    )
-
-    buy_ok = buy_signal_champion(
-        d,
-        P=P,
-        ENTRY_ZENERGY_MIN=ENTRY_ZENERGY_MIN,
-        ENTRY_K_STRUCT=ENTRY_K_STRUCT,
-        ENTRY_USE_ASYM=ENTRY_USE_ASYM,
-        ENTRY_N_DOWN=ENTRY_N_DOWN,
-    )
-
-    sig = simulate_sellraw_only(d, buy_ok)
+    # features + BUY/SELL en un solo frame (read-only, compartido)
+    sig, store_meta = store.snapshot()
+    if sig is None or sig.empty:
+        st.error(f"Sin datos de Sheets todavía. {sync['last_error'] or ''}")
+        st.stop()
+    d = sig
 
     ts_last = sig.index.max()
     if pd.isna(ts_last):
@@ -237,14 +241,63 @@ ts_last_local = pd.Timestamp(ts_last).tz_convert(CR) if getattr(ts_last, "tzinfo
 st.markdown("### 🧠 Estado actual (última vela cerrada)")
 st.write(f"🕒 **{ts_last_local}**  |  💵 **BTC Close:** `{btc_price:,.2f}`  |  🎯 **Señal (simulada):** `{curr}`")
 
+# Indicador de frescura (el refresher sigue intentando en background)
+edad = "—" if sync["age_sec"] is None else f"{sync['age_sec']:.0f}s"
+if sync["fresh"]:
+    st.caption(f"🟢 Al día con Sheets · última carga hace {edad}")
+else:
+    atraso = "?" if sync["stale_bars"] is None else sync["stale_bars"]
+    st.caption(f"🟠 Sheets atrasado {atraso} vela(s) · última carga hace {edad} · se actualiza solo al llegar la vela")
+if sync["last_error"]:
+    st.caption(f"⚠️ Último error (Sheets / features): {sync['last_error']}")
+
 # Debug pequeño (opcional)
 with st.expander("🔎 Debug (Sheets sync)"):
     now_local = pd.Timestamp.now(tz=CR)
-    expected = _expected_last_close_local(now_local)
     st.write(f"Ahora (CR): {now_local}")
-    st.write(f"Expected last close (CR): {expected}")
+    st.write(f"Expected last close (CR): {sync['expected']}")
     st.write(f"ts_last (CR): {ts_last_local}")
-    st.write(f"Delta: {ts_last_local - expected}")
+    st.write(f"Delta: {ts_last_local - sync['expected']}")
+    st.write(f"Cargas: {sync['loads']} | hilo activo: {sync['running']} | store v{store_meta['version']}")
+
+# ==============================
+# PANEL MULTI-SÍMBOLO
+# ==============================
+def _resumen_simbolo(symbol: str, frame: pd.DataFrame) -> dict:
+    r = frame.iloc[-1]
+    thr = float(ENTRY_ZENERGY_MIN) - float(ENTRY_K_STRUCT) * (float(r["struct_score"]) - 0.5)
+    readiness = (
+        int(bool(r["buy_raw"])) +
+        int(float(r["zaccel"]) >= float(P["zaccel_gate"])) +
+        int(float(r["energy"]) > 0) +
+        int(float(r["zenergy"]) >= thr)
+    )
+    ts = pd.Timestamp(frame.index[-1])
+    ts = ts.tz_convert(CR) if ts.tzinfo else ts.tz_localize(CR)
+    return {
+        "Símbolo": symbol,
+        "Rol": "Trigger" if symbol == SYMBOL else "Trade" if symbol == TRADE_SYMBOL else "",
+        "Última vela (CR)": ts.strftime("%Y-%m-%d %H:%M"),
+        "Close": float(r["Close"]),
+        "Señal": "BUY" if bool(r["BUY"]) else "SELL" if bool(r["SELL"]) else "—",
+        "En posición": bool(r["in_position"]),
+        "zspeed": round(float(r["zspeed"]), 3),
+        "zaccel": round(float(r["zaccel"]), 3),
+        "zenergy": round(float(r["zenergy"]), 3),
+        "Readiness": f"{readiness}/4",
+    }
+
+st.markdown("### 🧩 Panel multi-símbolo")
+filas = []
+for _sym in PANEL_SYMBOLS:
+    _frame, _ = stores[_sym].snapshot()
+    if _frame is not None and len(_frame):
+        filas.append(_resumen_simbolo(_sym, _frame))
+if filas:
+    st.dataframe(pd.DataFrame(filas).set_index("Símbolo"), use_container_width=True)
+    st.caption("Mismos parámetros Winner/Champion para todos; solo el trigger dispara operaciones.")
+else:
+    st.info("Sin datos para el panel todavía.")
 
 # ==============================
 # CONDITION CARDS (BTC only)
@@ -363,55 +416,83 @@ else:
 # ==============================
 st.markdown("### 📊 BTCUSDT — Señales Winner/Champion (últimas velas)")
 
-plot_sig = sig.tail(MAX_VELAS).copy()
-plot_d = d.loc[plot_sig.index].copy()
+# solo ventanas que el store puede llenar (ver HIST_VELAS)
+ventanas_ok = [k for k, n in VENTANAS.items() if n is None or n <= len(sig)]
+ventana = st.selectbox("Ventana", ventanas_ok, index=0, key="chart_window")
+n_ventana = VENTANAS[ventana]
+if n_ventana is not None and len(sig) < n_ventana:
+    st.caption(f"⚠️ Ventana parcial: hay {len(sig)} de {n_ventana} velas.")
+if len(ventanas_ok) < len(VENTANAS):
+    st.caption(
+        f"Historia disponible: {len(sig)} velas (~{len(sig) / 288:.1f} días). "
+        "Sheets guarda ~4 días; ventanas más largas aparecen a medida que el proceso acumula velas."
+    )
 
-plot_sig["prev_buy"] = plot_sig["BUY"].shift(1).fillna(False)
-plot_sig["prev_sell"] = plot_sig["SELL"].shift(1).fillna(False)
+# Decimación server-side: el payload queda acotado aunque la ventana sea de semanas.
+# Velas → buckets min-max (no se pierden extremos); z-scores → LTTB.
+plot_sig = window_slice(sig, n_ventana)
+plot_c = decimate_ohlc(plot_sig, MAX_CANDLES_PLOT)
+k_bucket = int(plot_c["n_bars"].max()) if len(plot_c) else 1
 
-buys = plot_sig[(plot_sig["BUY"]) & (~plot_sig["prev_buy"])]
-sells = plot_sig[(plot_sig["SELL"]) & (~plot_sig["prev_sell"])]
+buys = signal_markers(plot_sig, "BUY", "Low", offset=-0.001)
+sells = signal_markers(plot_sig, "SELL", "High", offset=0.001)
 
-fig = go.Figure()
+fig = make_subplots(
+    rows=2, cols=1, shared_xaxes=True,
+    row_heights=[0.72, 0.28], vertical_spacing=0.03,
+)
 fig.add_trace(go.Candlestick(
     name="BTC Price",
-    x=plot_d.index,
-    open=plot_d["Open"], high=plot_d["High"],
-    low=plot_d["Low"], close=plot_d["Close"]
-))
-fig.add_trace(go.Scatter(
+    x=plot_c.index,
+    open=plot_c["Open"], high=plot_c["High"],
+    low=plot_c["Low"], close=plot_c["Close"]
+), row=1, col=1)
+fig.add_trace(go.Scattergl(
     name="BUY",
     x=buys.index,
-    y=plot_d.loc[buys.index, "Low"] * 0.999,
-    mode="text",
-    text="🟢 BUY",
+    y=buys["y"],
+    mode="markers",
+    marker=dict(symbol="triangle-up", size=11, color="#22c55e"),
+    hovertemplate="🟢 BUY %{x}<extra></extra>",
     showlegend=False
-))
-fig.add_trace(go.Scatter(
+), row=1, col=1)
+fig.add_trace(go.Scattergl(
     name="SELL",
     x=sells.index,
-    y=plot_d.loc[sells.index, "High"] * 1.001,
-    mode="text",
-    text="🔴 SELL",
+    y=sells["y"],
+    mode="markers",
+    marker=dict(symbol="triangle-down", size=11, color="#ef4444"),
+    hovertemplate="🔴 SELL %{x}<extra></extra>",
     showlegend=False
-))
+), row=1, col=1)
+
+for col, color in [("zspeed", "#38bdf8"), ("zaccel", "#f59e0b"), ("zenergy", "#a78bfa")]:
+    z = decimate_series(plot_sig[col], MAX_LINE_POINTS, method="lttb")
+    fig.add_trace(go.Scattergl(
+        name=col, x=z.index, y=z.values,
+        mode="lines", line=dict(width=1, color=color),
+    ), row=2, col=1)
+
+titulo_k = "" if k_bucket == 1 else f" · buckets de {k_bucket} velas"
 fig.update_layout(
     template="plotly_dark",
     xaxis_rangeslider_visible=False,
-    height=560,
-    title=f"BTCUSDT — Winner/Champion (últimas {min(MAX_VELAS, len(plot_sig))} velas)",
+    height=700,
+    title=f"BTCUSDT — Winner/Champion ({ventana}: {len(plot_sig)} velas{titulo_k})",
     hovermode="x unified",
-    xaxis=dict(
-        showspikes=True, spikemode="across",
-        spikesnap="cursor", spikethickness=1,
-        spikecolor="#888", showline=True
-    ),
-    yaxis=dict(
-        showspikes=True, spikemode="across",
-        spikesnap="cursor", spikethickness=1,
-        spikecolor="#888", showline=True
-    )
+    legend=dict(orientation="h", y=0.27, x=0),
+)
+fig.update_xaxes(
+    showspikes=True, spikemode="across",
+    spikesnap="cursor", spikethickness=1,
+    spikecolor="#888", showline=True
+)
+fig.update_yaxes(
+    showspikes=True, spikemode="across",
+    spikesnap="cursor", spikethickness=1,
+    spikecolor="#888", showline=True
 )
+fig.update_yaxes(title_text="z", row=2, col=1)
 st.plotly_chart(fig, use_container_width=True)
 
 # ==============================
@@ -0,0 +1,208 @@
+# scripts/bench_evaluation.py
+# Paridad + benchmark de utils/evaluation.py (loops iterrows/df.at vs vectorizado):
+#   calcular_estadisticas_modelo, calcular_estadisticas_long_only, simular_capital_long_only
+#
+# 1) Paridad EXACTA (mismos floats, inf incluido) sobre BENCH_CASES casos
+#    aleatorios: largos cortos/vacíos, NaN/None, 'H', B/S repetidas,
+#    variantes 'BUY'/'SELL' y posición abierta al final.
+# 2) Tiempos sobre BENCH_ROWS filas (loops medidos sobre BENCH_LOOP_ROWS y extrapolados).
+#
+# Config por env:
+#   BENCH_CASES       casos aleatorios de paridad (default 300)
+#   BENCH_ROWS        filas sintéticas del benchmark (default 1_000_000)
+#   BENCH_LOOP_ROWS   filas para las versiones con loop (default 50_000)
+# Exit code 1 si algún caso difiere.
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+
+from utils.evaluation import (
+    calcular_estadisticas_modelo,
+    calcular_estadisticas_long_only,
+    simular_capital_long_only,
+)
+
+BENCH_CASES     = int(os.getenv("BENCH_CASES", "300"))
+BENCH_ROWS      = int(os.getenv("BENCH_ROWS", "1000000"))
+BENCH_LOOP_ROWS = int(os.getenv("BENCH_LOOP_ROWS", "50000"))
+
+SEÑALES = np.array(['B', 'S', 'BUY', 'SELL', 'H', None, np.nan], dtype=object)
+
+
+# =====================================================
+# Versiones anteriores (loops)
+# =====================================================
+
+def _stats(pares):
+    if not pares:
+        return 0.0, 0, 0.0, 0.0, 0.0
+
+    pares = np.array(pares)
+    ganancias = pares[pares > 0]
+    perdidas = pares[pares <= 0]
+
+    hit_rate = 100 * len(ganancias) / len(pares)
+    ganancia_media = ganancias.mean() if len(ganancias) > 0 else 0.0
+    perdida_media = perdidas.mean() if len(perdidas) > 0 else 0.0
+    profit_factor = ganancias.sum() / abs(perdidas.sum()) if perdidas.sum() != 0 else np.inf
+
+    return hit_rate, len(pares), ganancia_media, perdida_media, profit_factor
+
+
+def _loop_modelo(df, señal_col='B-H-S Signal', precio_col='Close'):
+    pares = []
+    buy_price = None
+
+    for _, row in df.iterrows():
+        señal = row[señal_col]
+        precio = row[precio_col]
+
+        if pd.isna(señal):
+            continue
+
+        if señal == 'B':
+            buy_price = precio
+        elif señal == 'S' and buy_price is not None:
+            pares.append(precio - buy_price)
+            buy_price = None
+
+    return _stats(pares)
+
+
+def _loop_long_only(df, señal_col='Signal Final', precio_col='Close'):
+    df = df.reset_index(drop=True)
+    pares = []
+    en_compra = False
+    precio_compra = None
+
+    for _, row in df.iterrows():
+        señal = row[señal_col]
+        precio = row[precio_col]
+
+        if pd.isna(señal):
+            continue
+
+        if señal in ['B', 'BUY'] and not en_compra:
+            precio_compra = precio
+            en_compra = True
+
+        elif señal in ['S', 'SELL'] and en_compra:
+            pares.append(precio - precio_compra)
+            en_compra = False
+            precio_compra = None
+
+    return _stats(pares)
+
+
+def _loop_capital(df, capital_inicial, señal_col='Eval Signal', precio_col='Close'):
+    df = df.copy().reset_index(drop=True)
+    capital = capital_inicial
+    en_posicion = False
+    precio_entrada = 0
+
+    for i in range(len(df)):
+        señal = df.at[i, señal_col]
+        precio = df.at[i, precio_col]
+
+        if señal == 'B' and not en_posicion:
+            precio_entrada = precio
+            en_posicion = True
+
+        elif señal == 'S' and en_posicion:
+            capital *= precio / precio_entrada
+            en_posicion = False
+
+    if en_posicion:
+        capital *= df[precio_col].iloc[-1] / precio_entrada
+
+    return capital
+
+
+# =====================================================
+# Helpers
+# =====================================================
+
+def datos_sinteticos(n: int, rng, p_senal: float = 0.1) -> pd.DataFrame:
+    close = 100.0 * np.exp(np.cumsum(rng.normal(0, 0.003, n)))
+    señal = np.where(rng.random(n) < p_senal, rng.choice(SEÑALES, n), None).astype(object)
+    # índice no-RangeIndex: las versiones con loop hacían reset_index
+    idx = pd.date_range("2025-01-01", periods=n, freq="5min", tz="UTC")
+    return pd.DataFrame({"Close": close, "Signal": señal}, index=idx)
+
+
+def _igual(a, b) -> bool:
+    a = np.atleast_1d(np.asarray(a, dtype=float))
+    b = np.atleast_1d(np.asarray(b, dtype=float))
+    return a.shape == b.shape and np.array_equal(a, b, equal_nan=True)
+
+
+CASOS = [
+    ("calcular_estadisticas_modelo",
+     lambda df: _loop_modelo(df, 'Signal'),
+     lambda df: calcular_estadisticas_modelo(df, 'Signal')),
+    ("calcular_estadisticas_long_only",
+     lambda df: _loop_long_only(df, 'Signal'),
+     lambda df: calcular_estadisticas_long_only(df, 'Signal')),
+    ("simular_capital_long_only",
+     lambda df: _loop_capital(df, 1000.0, 'Signal'),
+     lambda df: simular_capital_long_only(df, 1000.0, 'Signal')),
+]
+
+
+def _timeit(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - t0
+
+
+# =====================================================
+# MAIN
+# =====================================================
+
+def main():
+    rng = np.random.default_rng(0)
+
+    print(f"🔍 Paridad sobre {BENCH_CASES} casos aleatorios...")
+    fallas = {}
+    for k in range(BENCH_CASES):
+        n = int(rng.integers(1, 400))
+        df = datos_sinteticos(n, rng, p_senal=float(rng.uniform(0.02, 0.9)))
+        for nombre, loop_fn, vec_fn in CASOS:
+            ref, new = loop_fn(df), vec_fn(df)
+            if not _igual(ref, new):
+                fallas.setdefault(nombre, []).append((k, ref, new))
+
+    for nombre, _, _ in CASOS:
+        malos = fallas.get(nombre, [])
+        print(f"   {'✗' if malos else '✓'} {nombre}: {BENCH_CASES - len(malos)}/{BENCH_CASES}")
+        for k, ref, new in malos[:3]:
+            print(f"      caso {k}: loop={ref} vectorizado={new}")
+
+    n_loop = min(BENCH_LOOP_ROWS, BENCH_ROWS)
+    escala = BENCH_ROWS / n_loop
+    df = datos_sinteticos(BENCH_ROWS, rng)
+    print(f"\n🧪 {BENCH_ROWS:,} filas (loops medidos sobre {n_loop:,} y extrapolados)")
+
+    for nombre, loop_fn, vec_fn in CASOS:
+        ref, t_loop = _timeit(loop_fn, df.iloc[:n_loop])
+        new, _ = _timeit(vec_fn, df.iloc[:n_loop])
+        if not _igual(ref, new):
+            fallas.setdefault(nombre, []).append(("bench", ref, new))
+        _, t_vec = _timeit(vec_fn, df)
+        print(f"{nombre:<32} | loop ≈ {t_loop * escala:8.2f}s | vectorizado {t_vec:6.3f}s | x{t_loop * escala / t_vec:,.0f}")
+
+    if fallas:
+        print(f"\n❌ Paridad FALLÓ: {sorted(fallas)}")
+        sys.exit(1)
+    print("\n✅ Vectorizado == loops originales")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# scripts/bench_signal_cleanup.py
+# Benchmark de limpieza de señales consecutivas (loop df.at vs deduplicar_señales).
+#
+# Config por env:
+#   BENCH_ROWS        filas sintéticas (default 1_000_000)
+#   BENCH_LOOP_ROWS   filas para las versiones con loop (se extrapola a BENCH_ROWS)
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+
+from utils.signal_postprocessing import deduplicar_señales, limpiar_señales_consecutivas
+
+BENCH_ROWS      = int(os.getenv("BENCH_ROWS", "1000000"))
+BENCH_LOOP_ROWS = int(os.getenv("BENCH_LOOP_ROWS", "100000"))
+
+
+def _loop_limpiar(df, columna='Momentum Signal'):
+    # versión anterior de limpiar_señales_consecutivas
+    df = df.copy()
+    df['Signal Final'] = df[columna]
+    for i in range(1, len(df)):
+        if df.at[i, 'Signal Final'] == df.at[i-1, 'Signal Final']:
+            df.at[i, 'Signal Final'] = None
+    df['Signal Final'] = df['Signal Final'].ffill()
+    return df
+
+
+def _loop_momentum(señales):
+    # versión anterior del paso 6 de calcular_momentum_fisico_speed
+    last_signal = None
+    signals = []
+    for sig in señales:
+        if sig != last_signal:
+            signals.append(sig)
+            last_signal = sig
+        else:
+            signals.append(None)
+    return signals
+
+
+def _timeit(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - t0
+
+
+def main():
+    rng = np.random.default_rng(0)
+    # rachas de señales como en 5m: mayoría sin señal, BUY/SELL en bloques
+    codes = np.repeat(rng.choice(np.array([0, 1, -1], dtype=np.int8), BENCH_ROWS // 4 + 1, p=[0.6, 0.2, 0.2]), 4)[:BENCH_ROWS]
+    texto = np.where(codes == 1, 'BUY', np.where(codes == -1, 'SELL', None)).astype(object)
+    df = pd.DataFrame({'Momentum Signal': texto})
+
+    n_loop = min(BENCH_LOOP_ROWS, BENCH_ROWS)
+    escala = BENCH_ROWS / n_loop
+    print(f"🧪 {BENCH_ROWS:,} filas (loops medidos sobre {n_loop:,} y extrapolados)")
+
+    # limpiar_señales_consecutivas
+    ref, t_loop = _timeit(_loop_limpiar, df.iloc[:n_loop])
+    new, _ = _timeit(limpiar_señales_consecutivas, df.iloc[:n_loop])
+    assert ref['Signal Final'].equals(new['Signal Final']), "paridad limpiar_señales_consecutivas"
+    _, t_vec = _timeit(limpiar_señales_consecutivas, df)
+    print(f"limpiar_señales_consecutivas | loop ≈ {t_loop * escala:8.2f}s | vectorizado {t_vec:6.3f}s | x{t_loop * escala / t_vec:,.0f}")
+
+    # dedup de Momentum Signal (códigos int8)
+    ref, t_loop = _timeit(_loop_momentum, texto[:n_loop])
+    new, _ = _timeit(deduplicar_señales, codes[:n_loop])
+    ref_codes = np.array([1 if s == 'BUY' else -1 if s == 'SELL' else 0 for s in ref], dtype=np.int8)
+    assert np.array_equal(ref_codes, new), "paridad momentum_fisico"
+    _, t_vec = _timeit(deduplicar_señales, codes)
+    print(f"momentum_fisico (dedup)      | loop ≈ {t_loop * escala:8.2f}s | vectorizado {t_vec:6.3f}s | x{t_loop * escala / t_vec:,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# scripts/check_candle_aggregation.py
+# Paridad de utils/candle_aggregation.py contra pandas resample (UTC).
+#
+# Velas 5m sintéticas con huecos y, como en el histórico real, closes
+# .998 en las filas que escribió update_incremental.fix_gaps (una de
+# ellas abre justo en un borde 4h). Compara batch e incremental
+# (CandleAggregator por chunks) contra resample para 15m/1h/4h.
+#
+# Config por env:
+#   CHECK_ROWS    velas 5m sintéticas (default 5000)
+#   CHECK_CHUNK   velas por update del agregador incremental (default 37)
+# Exit code 1 si algo difiere.
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+
+from utils.candle_aggregation import OHLCV_COLS, CandleAggregator, aggregate_ohlcv
+
+CHECK_ROWS  = int(os.getenv("CHECK_ROWS", "5000"))
+CHECK_CHUNK = int(os.getenv("CHECK_CHUNK", "37"))
+
+RULES = {"15m": "15min", "1h": "1h", "4h": "4h"}
+
+
+def velas_sinteticas(n: int, seed: int = 0):
+    """(df5 indexado por Close time UTC con algunos .998, opens UTC, # .998 en borde 4h)."""
+    rng = np.random.default_rng(seed)
+    opens = pd.date_range("2025-01-01", periods=n, freq="5min", tz="UTC")
+    opens = opens[rng.random(n) > 0.03]  # huecos
+    m = len(opens)
+    close = 100.0 * np.exp(np.cumsum(rng.normal(0, 0.002, m)))
+    open_ = np.r_[close[0], close[:-1]]
+    df = pd.DataFrame({
+        "Open": open_,
+        "High": np.maximum(open_, close) * (1 + rng.uniform(0, 0.002, m)),
+        "Low": np.minimum(open_, close) * (1 - rng.uniform(0, 0.002, m)),
+        "Close": close,
+        "Volume": rng.uniform(1, 50, m),
+    })
+
+    ms = np.full(m, 5 * 60 * 1000 - 1)
+    ms[rng.random(m) < 0.2] -= 1  # filas de fix_gaps
+    borde_4h = np.flatnonzero((opens.hour % 4 == 0) & (opens.minute == 0))
+    n_borde = max(len(borde_4h) // 2, 1)
+    ms[borde_4h[:n_borde]] = 5 * 60 * 1000 - 2
+    df.index = pd.DatetimeIndex(opens + pd.to_timedelta(ms, unit="ms"), name="ts")
+    return df, opens, n_borde
+
+
+def referencia(df5: pd.DataFrame, opens: pd.DatetimeIndex, timeframe: str) -> pd.DataFrame:
+    rule = RULES[timeframe]
+    r = df5.set_axis(opens).resample(rule, origin="epoch")
+    out = pd.DataFrame({
+        "Open": r["Open"].first(),
+        "High": r["High"].max(),
+        "Low": r["Low"].min(),
+        "Close": r["Close"].last(),
+        "Volume": r["Volume"].sum(),
+        "n_5m": r["Close"].count(),
+    })
+    out = out[out["n_5m"] > 0]
+    out.index = out.index + pd.Timedelta(rule) - pd.Timedelta(milliseconds=1)
+    return out
+
+
+def diferencias(got: pd.DataFrame, ref: pd.DataFrame) -> list:
+    if not got.index.equals(ref.index):
+        return ["index"]
+    bad = [c for c in OHLCV_COLS if not np.allclose(got[c], ref[c], rtol=1e-12, atol=0)]
+    if not np.array_equal(got["n_5m"].to_numpy(), ref["n_5m"].to_numpy()):
+        bad.append("n_5m")
+    return bad
+
+
+def main():
+    df5, opens, n_borde = velas_sinteticas(CHECK_ROWS)
+    n998 = int((df5.index.asi8 // 10**6 % 1000 == 998).sum())
+    print(f"🧪 {len(df5)} velas 5m, {n998} con close .998 ({n_borde} abren en borde 4h)")
+
+    fallas = {}
+    for tf, rule in RULES.items():
+        ref = referencia(df5, opens, tf)
+        por_bucket = int(pd.Timedelta(rule) / pd.Timedelta("5min"))
+
+        batch = aggregate_ohlcv(df5, tf)
+        bad = diferencias(batch, ref)
+        if not np.array_equal(batch["complete"].to_numpy(), (ref["n_5m"] == por_bucket).to_numpy()):
+            bad.append("complete")
+        if bad:
+            fallas[f"batch:{tf}"] = bad
+
+        agg = CandleAggregator(tf)
+        for i in range(0, len(df5), CHECK_CHUNK):
+            inc = agg.update(df5.iloc[: i + CHECK_CHUNK])
+        bad = diferencias(inc, ref)
+        if bad:
+            fallas[f"incremental:{tf}"] = bad
+
+        print(f"   {'✗' if any(k.endswith(tf) for k in fallas) else '✓'} {tf}: {len(ref)} buckets")
+
+    if fallas:
+        print(f"\n❌ Agregación FALLÓ: {fallas}")
+        sys.exit(1)
+    print("\n✅ Agregación == resample (closes .998 incluidos)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# scripts/check_feature_store_parity.py
+# Paridad FeatureStore incremental vs recálculo completo.
+#
+# Alimenta velas sintéticas de a BATCH (con una racha larga de volumen 0,
+# más larga que el lookback) y compara TODAS las columnas contra un
+# rebuild sobre la historia completa. También pasa por save/load_snapshot
+# a mitad de camino (mismo path que el warm-start del bot).
+#
+# Config por env:
+#   PARITY_ROWS       velas sintéticas (default 3000)
+#   PARITY_BATCH      velas por update (default 7)
+#   PARITY_ZERO_RUN   largo de la racha de volumen 0 (default 400)
+# Exit code 1 si algo difiere.
+
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+
+from utils.feature_store import FeatureStore
+
+PARITY_ROWS     = int(os.getenv("PARITY_ROWS", "3000"))
+PARITY_BATCH    = int(os.getenv("PARITY_BATCH", "7"))
+PARITY_ZERO_RUN = int(os.getenv("PARITY_ZERO_RUN", "400"))
+
+
+def velas_sinteticas(n: int, zero_run: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100.0 * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+    open_ = np.r_[close[0], close[:-1]]
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.002, n))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.002, n))
+    vol = rng.uniform(1, 50, n)
+    ini = n // 3
+    vol[ini:ini + zero_run] = 0.0
+    idx = pd.date_range("2025-01-01 00:04:59.999", periods=n, freq="5min", tz="UTC", name="ts")
+    return pd.DataFrame({"Open": open_, "High": high, "Low": low, "Close": close, "Volume": vol}, index=idx)
+
+
+def diferencias(a: pd.DataFrame, b: pd.DataFrame) -> dict:
+    out = {}
+    for c in b.columns:
+        x = a[c].to_numpy(dtype=float)
+        y = b[c].to_numpy(dtype=float)
+        bad = ~np.isclose(x, y, rtol=1e-9, atol=1e-12, equal_nan=True)
+        if bad.any():
+            out[c] = int(bad.sum())
+    return out
+
+
+def main():
+    ohlcv = velas_sinteticas(PARITY_ROWS, PARITY_ZERO_RUN)
+    n = len(ohlcv)
+
+    ref = FeatureStore(max_rows=n)
+    ref.update(ohlcv)
+    full, _ = ref.snapshot()
+
+    inc = FeatureStore(max_rows=n)
+    inc.update(ohlcv.iloc[:500])
+    mitad = n // 2
+    with tempfile.TemporaryDirectory() as tmp:
+        snap = os.path.join(tmp, "estado.features.npz")
+        for end in range(500 + PARITY_BATCH, n + PARITY_BATCH, PARITY_BATCH):
+            inc.update(ohlcv.iloc[:end])
+            if mitad <= end < mitad + PARITY_BATCH:
+                # warm start: el resto sale de un store restaurado del snapshot
+                inc.save_snapshot(snap)
+                frame_prev, _ = inc.snapshot()
+                inc = FeatureStore(max_rows=n)
+                res = inc.load_snapshot(snap, candles=ohlcv.iloc[:end])
+                assert res["ok"], res
+                warm_from = frame_prev.index[-len(inc.snapshot()[0])]
+
+    got, _ = inc.snapshot()
+    fallas = {}
+
+    # tramo post warm-start (el store restaurado solo tiene la cola)
+    fallas.update({f"warm:{c}": v for c, v in diferencias(got, full.loc[got.index]).items()})
+    print(f"▶ incremental (batch={PARITY_BATCH}) + warm start desde {warm_from}: {len(got)} filas comparadas")
+
+    # recorrido completo sin snapshot
+    inc2 = FeatureStore(max_rows=n)
+    inc2.update(ohlcv.iloc[:500])
+    for end in range(500 + PARITY_BATCH, n + PARITY_BATCH, PARITY_BATCH):
+        inc2.update(ohlcv.iloc[:end])
+    got2, _ = inc2.snapshot()
+    fallas.update(diferencias(got2, full))
+    print(f"▶ incremental (batch={PARITY_BATCH}): {len(got2)} filas comparadas")
+
+    if fallas:
+        print(f"\n❌ Paridad FALLÓ (columna: filas distintas): {fallas}")
+        sys.exit(1)
+    print("\n✅ Incremental == recálculo completo")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# scripts/check_rolling_median.py
+# Paridad EXACTA de utils/rolling_median.py (batch y RollingMedian) contra
+# pandas rolling(window, min_periods).median().
+#
+# Casos aleatorios con NaN, ±inf (pandas los trata como NaN), valores
+# repetidos (redondeo) y ventanas de ambos lados de MAX_SORTED_WINDOW.
+#
+# Config por env:
+#   CHECK_CASES   casos aleatorios (default 500)
+# Exit code 1 si algún caso difiere.
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+
+from utils.rolling_median import RollingMedian, rolling_median
+
+CHECK_CASES = int(os.getenv("CHECK_CASES", "500"))
+
+# casos fijos: ventanas con inf junto a NaN / min_periods
+FIJOS = [
+    ([np.nan, 1.0, np.inf], 3, 2),
+    ([np.nan, 1.0, np.inf], 3, 1),
+    ([1.0, np.inf, 2.0, 3.0], 3, 1),
+    ([5.0, np.inf, -np.inf, 3.0], 4, 1),
+    ([np.inf, np.inf, np.inf], 3, 1),
+    ([-np.inf, 1.0, 2.0], 3, 3),
+]
+
+
+def caso_aleatorio(rng):
+    n = int(rng.integers(0, 400))
+    w = int(rng.integers(1, 40))
+    mp = int(rng.integers(1, w + 1))
+    x = rng.normal(size=n).round(int(rng.integers(0, 3)))
+    if n:
+        x[rng.random(n) < 0.1] = np.nan
+        x[rng.random(n) < 0.05] = np.inf
+        x[rng.random(n) < 0.05] = -np.inf
+    return x, w, mp
+
+
+def main():
+    rng = np.random.default_rng(0)
+    casos = [(np.array(x), w, mp) for x, w, mp in FIJOS]
+    casos += [caso_aleatorio(rng) for _ in range(CHECK_CASES)]
+
+    fallas = []
+    for k, (x, w, mp) in enumerate(casos):
+        ref = pd.Series(x, dtype=float).rolling(w, min_periods=mp).median().to_numpy()
+        got = rolling_median(x, w, mp)
+        rm = RollingMedian(w, mp)
+        inc = np.array([rm.update(v) for v in x], dtype=float)
+        for nombre, out in (("batch", got), ("incremental", inc)):
+            if not np.array_equal(ref, out, equal_nan=True):
+                fallas.append((nombre, k, len(x), w, mp))
+
+    print(f"🔍 {len(casos)} casos ({len(FIJOS)} fijos con ±inf)")
+    if fallas:
+        for f in fallas[:10]:
+            print(f"   ✗ {f[0]} caso {f[1]} (n={f[2]}, window={f[3]}, min_periods={f[4]})")
+        print(f"\n❌ Paridad FALLÓ en {len(fallas)} casos")
+        sys.exit(1)
+    print("\n✅ rolling_median == pandas rolling().median() (bit a bit)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+# scripts/check_startup_time.py
+# Regresión de tiempo de arranque de los entry points (cron / daemon).
+#
+# Para cada entry point importa el módulo en un proceso nuevo con
+# `python -X importtime` y reporta:
+#   - tiempo acumulado de imports (suma de los imports top-level)
+#   - los imports más pesados
+#   - módulos que NO deben cargarse en ese path (ej. DRY_RUN sin python-binance,
+#     SPOT sin el executor margin) → falla siempre
+#
+# Config por env:
+#   STARTUP_RUNS        corridas por entry point (se usa la mediana; default 5)
+#   STARTUP_BASELINE    JSON con {entry: ms} (versionado: scripts/startup_baseline.json);
+#                       un entry point sin baseline hace fallar el check
+#   STARTUP_TOLERANCE   crecimiento permitido vs baseline (default 0.25 = +25%)
+#   STARTUP_BUDGET_MS   tope absoluto opcional por entry point
+#
+# Uso:
+#   python scripts/check_startup_time.py                 # reporte + checks
+#   python scripts/check_startup_time.py --save-baseline # escribe STARTUP_BASELINE
+# Exit code 1 si algún check falla.
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+STARTUP_RUNS      = int(os.getenv("STARTUP_RUNS", "5"))
+STARTUP_BASELINE  = os.getenv("STARTUP_BASELINE", os.path.join(ROOT, "scripts", "startup_baseline.json"))
+STARTUP_TOLERANCE = float(os.getenv("STARTUP_TOLERANCE", "0.25"))
+STARTUP_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", "0") or 0)
+
+# env "seguro": sin trading, sin credenciales → ningún import debería necesitarlas
+SAFE_ENV = {
+    "DRY_RUN": "true",
+    "USE_MARGIN": "false",
+    "BINANCE_API_KEY": "",
+    "BINANCE_API_SECRET": "",
+    "GOOGLE_SERVICE_ACCOUNT_JSON": "",
+}
+
+HEAVY_TRADING = ["binance", "utils.trade_executor_v2", "utils.trade_executor_margin"]
+HEAVY_SHEETS = ["gspread", "google.oauth2"]
+
+ENTRY_POINTS = {
+    "alert_bot": {
+        "module": "alert_bot",
+        "paths": [ROOT, os.path.join(ROOT, "alertas")],
+        "forbidden": HEAVY_TRADING + HEAVY_SHEETS,
+    },
+    "update_incremental": {
+        "module": "update_incremental",
+        "paths": [ROOT, os.path.join(ROOT, "scripts")],
+        "forbidden": HEAVY_TRADING + HEAVY_SHEETS,
+    },
+    "trade_executor_router": {
+        "module": "utils.trade_executor_router",
+        "paths": [ROOT],
+        "forbidden": HEAVY_TRADING + HEAVY_SHEETS,
+    },
+}
+
+
+def _parse_importtime(stderr: str):
+    """Líneas `import time: self | cumulative | name` → [(name, cumulative_us, depth)]."""
+    out = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        _, cum_us, name = parts
+        # los imports anidados llevan 2 espacios extra por nivel
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        out.append((name.strip(), int(cum_us), depth))
+    return out
+
+
+def medir(entry: dict):
+    env = dict(os.environ, **SAFE_ENV)
+    env["PYTHONPATH"] = os.pathsep.join(entry["paths"])
+    code = f"import {entry['module']}"
+
+    totales, imports = [], None
+    for _ in range(max(STARTUP_RUNS, 1)):
+        r = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+        )
+        if r.returncode != 0:
+            tail = "\n".join(r.stderr.splitlines()[-5:])
+            raise RuntimeError(f"import {entry['module']} falló:\n{tail}")
+        imports = _parse_importtime(r.stderr)
+        totales.append(sum(cum for _, cum, depth in imports if depth == 0) / 1000.0)
+
+    cargados = {name for name, _, _ in imports}
+    prohibidos = sorted(
+        m for m in entry["forbidden"]
+        if any(c == m or c.startswith(m + ".") for c in cargados)
+    )
+    # imports directos más pesados del entry point (y otros top-level)
+    top = sorted(
+        ((cum / 1000.0, name) for name, cum, depth in imports
+         if depth <= 1 and name != entry["module"]),
+        reverse=True,
+    )[:8]
+    return {"ms": statistics.median(totales), "forbidden": prohibidos, "top": top}
+
+
+def main():
+    save = "--save-baseline" in sys.argv
+
+    baseline = {}
+    if os.path.exists(STARTUP_BASELINE) and not save:
+        with open(STARTUP_BASELINE) as f:
+            baseline = json.load(f)
+
+    fallas, medidos = [], {}
+    for nombre, entry in ENTRY_POINTS.items():
+        res = medir(entry)
+        medidos[nombre] = round(res["ms"], 1)
+
+        print(f"\n▶ {nombre}: {res['ms']:.1f} ms (mediana de {STARTUP_RUNS})")
+        for ms, mod in res["top"]:
+            print(f"    {ms:8.1f} ms  {mod}")
+
+        if res["forbidden"]:
+            fallas.append(f"{nombre}: importa {res['forbidden']} en el path DRY_RUN/SPOT")
+
+        ref = baseline.get(nombre)
+        if not save and not ref:
+            fallas.append(f"{nombre}: sin baseline en {STARTUP_BASELINE} (correr --save-baseline)")
+        elif ref and res["ms"] > ref * (1 + STARTUP_TOLERANCE):
+            fallas.append(f"{nombre}: {res['ms']:.1f} ms > baseline {ref:.1f} ms (+{STARTUP_TOLERANCE:.0%})")
+
+        if STARTUP_BUDGET_MS and res["ms"] > STARTUP_BUDGET_MS:
+            fallas.append(f"{nombre}: {res['ms']:.1f} ms > budget {STARTUP_BUDGET_MS:.0f} ms")
+
+    if save:
+        with open(STARTUP_BASELINE, "w") as f:
+            json.dump(medidos, f, indent=2)
+        print(f"\n💾 Baseline guardado en {STARTUP_BASELINE}: {medidos}")
+
+    if fallas:
+        print("\n❌ Startup check FALLÓ:")
+        for f in fallas:
+            print(f"  - {f}")
+        sys.exit(1)
+
+    print("\n✅ Startup check OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# scripts/import_binance_dumps.py
+# Carga histórico multi-año desde los dumps públicos de Binance
+# (https://data.binance.vision → spot/monthly|daily/klines/<SYMBOL>/<interval>/)
+# al cache local de klines, sin paginar /api/v3/klines.
+#
+# Los ZIP/CSV se descargan aparte (wget/curl, o copiados a mano): este
+# script solo lee el directorio local → funciona offline.
+#
+# Config por env:
+#   DUMP_DIR        directorio con los ZIP/CSV (default ./binance_dumps)
+#   DUMP_SYMBOLS    símbolos a importar, separados por coma (default: todos)
+#   DUMP_INTERVAL   intervalo (default 5m)
+#   KLINE_CACHE_DIR destino (ver utils/kline_cache.py)
+#
+# Uso:
+#   python scripts/import_binance_dumps.py          # importa + reporta frontera
+#   python scripts/import_binance_dumps.py --fill   # además baja por REST lo que
+#                                                   # falta hasta la última vela (solo 5m)
+
+import os
+import sys
+
+import pandas as pd
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+
+from utils.kline_dump_import import import_dumps
+
+DUMP_DIR      = os.getenv("DUMP_DIR", os.path.join(ROOT, "binance_dumps"))
+DUMP_SYMBOLS  = [s.strip().upper() for s in os.getenv("DUMP_SYMBOLS", "").split(",") if s.strip()]
+DUMP_INTERVAL = os.getenv("DUMP_INTERVAL", "5m")
+
+
+def _fmt(ms: int) -> str:
+    return pd.to_datetime(ms, unit="ms", utc=True).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def main():
+    fill = "--fill" in sys.argv
+
+    print(f"📦 Importando dumps {DUMP_INTERVAL} desde {DUMP_DIR}...")
+    reports = import_dumps(DUMP_DIR, symbols=DUMP_SYMBOLS or None, interval=DUMP_INTERVAL)
+
+    if not reports:
+        print("⚠️ No se encontraron dumps (esperado: SYMBOL-INTERVAL-YYYY-MM[-DD].zip|csv).")
+        return
+
+    for symbol, rep in reports.items():
+        print(
+            f"\n➡️ {symbol}: {rep['files']} archivos, {rep['rows']} velas "
+            f"({_fmt(rep['first_ms'])} → {_fmt(rep['last_ms'])} UTC)"
+            if rep["first_ms"] is not None else f"\n➡️ {symbol}: {rep['files']} archivos vacíos"
+        )
+        if rep["overlap_diffs"]:
+            print(f"   ⚠️ {rep['overlap_diffs']} velas ya cacheadas (REST) difieren del dump → gana el dump")
+
+        faltan = rep["missing"]
+        if not faltan:
+            print("   ✓ Sin huecos hasta la última vela cerrada.")
+            continue
+        for a, b in faltan[:5]:
+            print(f"   hueco {_fmt(a)} → {_fmt(b)} UTC")
+
+        if fill and DUMP_INTERVAL == "5m":
+            # read-through: solo se piden a la red estos rangos
+            from utils.binance_fetch import get_binance_5m_data_between
+            for a, b in faltan:
+                try:
+                    get_binance_5m_data_between(symbol, _fmt(a), _fmt(b))
+                except Exception as e:
+                    print(f"   ✗ {symbol} {_fmt(a)} → {_fmt(b)}: {e}")
+
+    print("\n🎉 Importación completa.")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,7 +8,7 @@ import sys
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 sys.path.append(ROOT)
 
-from utils.binance_fetch import get_binance_5m_data
+from utils.binance_fetch import get_binance_5m_data, with_local_times
 from utils.google_client import get_gsheet_client
 
 SHEET_ID = os.getenv("GOOGLE_SHEET_ID")
@@ -16,6 +16,9 @@ SYMBOLS = ["BTCUSDT", "ETHUSDT", "ADAUSDT", "XRPUSDT", "BNBUSDT"]
 
 LIMIT_5M = 900  # 3 días
 
+# columnas A:G que leen load_from_sheets / update_incremental
+SHEET_COLS = ["Open time", "Open", "High", "Low", "Close", "Volume", "Close time"]
+
 
 def df_to_sheet(df, ws):
     ws.clear()
@@ -33,7 +36,7 @@ def main():
         print(f"\n➡️ Descargando {symbol}...")
 
         # Descargar solo 900 velas
-        df = get_binance_5m_data(symbol, limit=LIMIT_5M)
+        df = with_local_times(get_binance_5m_data(symbol, limit=LIMIT_5M))[SHEET_COLS]
 
         try:
             ws = sh.worksheet(symbol)
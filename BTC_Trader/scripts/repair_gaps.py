@@ -0,0 +1,194 @@
+# scripts/repair_gaps.py
+# Escaneo + reparación del histórico de velas guardado en Sheets.
+#
+# A diferencia de update_incremental.fix_gaps (que solo mira el borde
+# entre la última vela guardada y la última de Binance), esto revisa TODO
+# el histórico de todas las hojas:
+#   1) 1 read batch (load_symbols_df) → scan_all vectorizado
+#      (huecos internos, duplicados, opens desalineados)
+#   2) descarga SOLO los rangos faltantes, en paralelo
+#   3) reescribe cada hoja afectada ordenada/deduplicada en 1 write batch
+#      (+ 1 clear batch de las filas sobrantes)
+#   4) justo antes de escribir re-lee las hojas: si el cron incremental
+#      agregó/purgó filas mientras tanto, aborta (reescribir pisaría esas filas)
+#
+# Config por env:
+#   REPAIR_WORKERS      descargas concurrentes (default 4)
+#   REPAIR_MERGE_BARS   rangos separados por <= N velas se bajan juntos (default 12)
+#
+# Uso:
+#   python scripts/repair_gaps.py            # escanea y repara
+#   python scripts/repair_gaps.py --dry-run  # solo reporte
+
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+
+from utils.google_client import get_gsheet_client
+from utils.load_from_sheets import load_symbols_df
+from utils.binance_fetch import get_binance_5m_data_between, with_local_times
+from utils.candle_integrity import (
+    FIVE_MIN_MS,
+    scan_all,
+    rebuild_candles,
+    format_sheet_rows,
+)
+
+SHEET_ID = os.getenv("GOOGLE_SHEET_ID")
+SYMBOLS = ["BTCUSDT", "ETHUSDT", "ADAUSDT", "XRPUSDT", "BNBUSDT"]
+MAX_KEEP = 1200  # límite global de filas (incluye encabezado)
+
+REPAIR_WORKERS = int(os.getenv("REPAIR_WORKERS", "4"))
+REPAIR_MERGE_BARS = int(os.getenv("REPAIR_MERGE_BARS", "12"))
+
+
+# =====================================================
+# Helpers
+# =====================================================
+
+def _fmt(ms: int) -> str:
+    return pd.to_datetime(ms, unit="ms", utc=True).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def merge_ranges(ranges, merge_ms: int):
+    """Une rangos [start, end) cercanos (menos requests a Binance)."""
+    out = []
+    for start, end in sorted(ranges):
+        if out and start - out[-1][1] <= merge_ms:
+            out[-1][1] = max(out[-1][1], end)
+        else:
+            out.append([start, end])
+    return [tuple(r) for r in out]
+
+
+def fetch_range(symbol: str, start_ms: int, end_ms: int) -> pd.DataFrame:
+    df = get_binance_5m_data_between(symbol, _fmt(start_ms), _fmt(end_ms))
+    ms = (df["Open time UTC"].astype("int64") // 10**6).to_numpy()
+    return with_local_times(df[(ms >= start_ms) & (ms < end_ms)])
+
+
+def fetch_missing(reports: dict) -> dict:
+    """Descarga concurrente de todos los rangos faltantes → {symbol: df}."""
+    tareas = [
+        (symbol, start, end)
+        for symbol, rep in reports.items()
+        for start, end in merge_ranges(rep["missing"], REPAIR_MERGE_BARS * FIVE_MIN_MS)
+    ]
+    out = {}
+    if not tareas:
+        return out
+
+    print(f"⬇️  Descargando {len(tareas)} rangos ({REPAIR_WORKERS} workers)...")
+    with ThreadPoolExecutor(max_workers=max(REPAIR_WORKERS, 1)) as ex:
+        futs = {ex.submit(fetch_range, *t): t for t in tareas}
+        for fut in as_completed(futs):
+            symbol, start, end = futs[fut]
+            try:
+                df = fut.result()
+            except Exception as e:
+                # ej. mantenimiento del exchange: el hueco existe también en Binance
+                print(f"   ✗ {symbol} {_fmt(start)} → {_fmt(end)}: {e}")
+                continue
+            out.setdefault(symbol, []).append(df)
+
+    return {s: pd.concat(frames, ignore_index=True) for s, frames in out.items()}
+
+
+def _firma(df) -> tuple:
+    """(# filas, último Open time): cambia si el incremental agregó o purgó filas."""
+    if df is None or len(df) == 0:
+        return (0, None)
+    return (len(df), pd.Timestamp(df["Open time"].max()))
+
+
+def hojas_cambiadas(antes: dict, symbols) -> list:
+    """Símbolos cuya hoja cambió desde la lectura `antes` (1 read batch)."""
+    ahora = load_symbols_df(symbols)
+    return [s for s in symbols if _firma(ahora.get(s)) != _firma(antes.get(s))]
+
+
+def imprimir_reporte(reports: dict) -> None:
+    for symbol, rep in reports.items():
+        if rep["ok"]:
+            print(f"   ✓ {symbol}: {rep['rows']} velas, sin problemas.")
+            continue
+        print(
+            f"   ⚠️ {symbol}: {rep['rows']} velas | faltan {rep['n_missing']} "
+            f"en {len(rep['missing'])} huecos | duplicados {len(rep['duplicates'])} "
+            f"| desalineados {len(rep['misaligned'])} | ilegibles {rep['invalid']}"
+        )
+        for start, end in rep["missing"][:5]:
+            print(f"      hueco {_fmt(start)} → {_fmt(end)} UTC")
+
+
+# =====================================================
+# MAIN
+# =====================================================
+
+def main():
+    dry_run = "--dry-run" in sys.argv
+
+    print("🔍 Escaneando integridad del histórico...")
+    frames = load_symbols_df(SYMBOLS)
+    reports = scan_all(frames)
+    imprimir_reporte(reports)
+
+    afectados = [s for s, rep in reports.items() if not rep["ok"]]
+    if not afectados:
+        print("\n🎉 Histórico íntegro, nada que reparar.")
+        return
+    if dry_run:
+        print("\n(dry-run) no se escribe nada.")
+        return
+
+    fetched = fetch_missing({s: reports[s] for s in afectados})
+
+    sh = get_gsheet_client().open_by_key(SHEET_ID)
+    data, clears, escritos = [], [], []
+    for symbol in afectados:
+        fixed = rebuild_candles(frames[symbol], fetched.get(symbol), max_rows=MAX_KEEP - 1)
+        rows = format_sheet_rows(fixed)
+        if not rows:
+            continue
+
+        last_row = len(rows) + 1
+        ws = sh.worksheet(symbol)
+        if ws.row_count < last_row:
+            ws.add_rows(last_row - ws.row_count)
+
+        data.append({"range": f"'{symbol}'!A2:G{last_row}", "values": rows})
+        if frames[symbol] is not None and len(frames[symbol]) + 1 > last_row:
+            clears.append(f"'{symbol}'!A{last_row + 1}:G")
+
+        escritos.append(symbol)
+        print(f"   🛠️ {symbol}: {len(frames[symbol])} → {len(rows)} velas")
+
+    cambiadas = hojas_cambiadas(frames, escritos) if escritos else []
+    if cambiadas:
+        print(f"\n⛔ {cambiadas} cambiaron durante la reparación (¿corrió el incremental?). "
+              "No se escribe nada; volver a correr el script.")
+        sys.exit(1)
+
+    if data:
+        # RAW: Sheets no reinterpreta los strings de fecha
+        sh.values_batch_update({"valueInputOption": "RAW", "data": data})
+    if clears:
+        sh.values_batch_clear(body={"ranges": clears})
+
+    # verificación: re-escaneo de lo que quedó escrito
+    post = scan_all(load_symbols_df(afectados))
+    pendientes = {s: r for s, r in post.items() if not r["ok"]}
+    if pendientes:
+        print("\n⚠️ Quedan problemas (huecos que Binance tampoco tiene?):")
+        imprimir_reporte(pendientes)
+    else:
+        print("\n🎉 Reparación completa.")
+
+
+if __name__ == "__main__":
+    main()
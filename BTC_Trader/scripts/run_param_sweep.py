@@ -0,0 +1,60 @@
+# scripts/run_param_sweep.py
+# Sweep de parámetros Winner/Champion sobre histórico 5m largo (BTC trigger → BNB exec).
+#
+# Config por env:
+#   SWEEP_START / SWEEP_END   rango UTC (ej. 2025-01-01)
+#   SWEEP_MODE                grid | random | bayes
+#   SWEEP_N_ITER              combinaciones (random/bayes)
+#   SWEEP_WORKERS             procesos (default: cpu_count)
+#   SWEEP_OBJECTIVE           métrica a maximizar (total_return, profit_factor, ...)
+#   SWEEP_OUT                 CSV de salida
+
+import os
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+
+from utils.binance_fetch import get_binance_5m_data_between
+from utils.backtest import ohlcv_from_klines
+from utils.param_sweep import run_sweep, DEFAULT_GRID
+
+TRIGGER_SYMBOL = os.getenv("TRIGGER_SYMBOL", "BTCUSDT").strip().upper()
+TRADE_SYMBOL   = os.getenv("TRADE_SYMBOL", "BNBUSDT").strip().upper()
+
+SWEEP_START     = os.getenv("SWEEP_START", "2025-01-01")
+SWEEP_END       = os.getenv("SWEEP_END") or None
+SWEEP_MODE      = os.getenv("SWEEP_MODE", "random")
+SWEEP_N_ITER    = int(os.getenv("SWEEP_N_ITER", "200"))
+SWEEP_WORKERS   = int(os.getenv("SWEEP_WORKERS", "0")) or None
+SWEEP_OBJECTIVE = os.getenv("SWEEP_OBJECTIVE", "total_return")
+SWEEP_OUT       = os.getenv("SWEEP_OUT", "sweep_results.csv")
+
+FEE_BPS      = float(os.getenv("FEE_BPS", "10"))
+SLIPPAGE_BPS = float(os.getenv("SLIPPAGE_BPS", "2"))
+
+
+def main():
+    print(f"🔬 Sweep {SWEEP_MODE} | {TRIGGER_SYMBOL} → {TRADE_SYMBOL} | {SWEEP_START} → {SWEEP_END or 'ahora'}")
+
+    trig = ohlcv_from_klines(get_binance_5m_data_between(TRIGGER_SYMBOL, SWEEP_START, SWEEP_END))
+    exe = ohlcv_from_klines(get_binance_5m_data_between(TRADE_SYMBOL, SWEEP_START, SWEEP_END))
+
+    table = run_sweep(
+        trig,
+        space=DEFAULT_GRID,
+        mode=SWEEP_MODE,
+        n_iter=SWEEP_N_ITER,
+        exec_df=exe,
+        workers=SWEEP_WORKERS,
+        objective=SWEEP_OBJECTIVE,
+        out_path=SWEEP_OUT,
+        fee_bps=FEE_BPS,
+        slippage_bps=SLIPPAGE_BPS,
+    )
+
+    print(table.head(20).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
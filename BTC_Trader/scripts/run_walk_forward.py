@@ -0,0 +1,70 @@
+# scripts/run_walk_forward.py
+# Walk-forward Winner/Champion sobre histórico 5m (BTC trigger → BNB exec).
+#
+# Config por env:
+#   WF_START / WF_END            rango UTC (ej. 2025-01-01)
+#   WF_TRAIN_DAYS / WF_TEST_DAYS tamaño de ventanas
+#   WF_STEP_DAYS                 paso entre folds (default = WF_TEST_DAYS)
+#   WF_MODE                      grid | random
+#   WF_N_ITER                    combinaciones (random)
+#   WF_WORKERS                   procesos (default: cpu_count)
+#   WF_OBJECTIVE                 métrica de selección en train
+#   WF_OUT                       CSV de salida (una fila por fold)
+
+import os
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+
+from utils.binance_fetch import get_binance_5m_data_between
+from utils.backtest import ohlcv_from_klines
+from utils.param_sweep import DEFAULT_GRID
+from utils.walk_forward import run_walk_forward
+
+TRIGGER_SYMBOL = os.getenv("TRIGGER_SYMBOL", "BTCUSDT").strip().upper()
+TRADE_SYMBOL   = os.getenv("TRADE_SYMBOL", "BNBUSDT").strip().upper()
+
+WF_START      = os.getenv("WF_START", "2025-01-01")
+WF_END        = os.getenv("WF_END") or None
+WF_TRAIN_DAYS = float(os.getenv("WF_TRAIN_DAYS", "30"))
+WF_TEST_DAYS  = float(os.getenv("WF_TEST_DAYS", "7"))
+WF_STEP_DAYS  = float(os.getenv("WF_STEP_DAYS", "0")) or None
+WF_MODE       = os.getenv("WF_MODE", "random")
+WF_N_ITER     = int(os.getenv("WF_N_ITER", "200"))
+WF_WORKERS    = int(os.getenv("WF_WORKERS", "0")) or None
+WF_OBJECTIVE  = os.getenv("WF_OBJECTIVE", "total_return")
+WF_OUT        = os.getenv("WF_OUT", "walk_forward.csv")
+
+FEE_BPS      = float(os.getenv("FEE_BPS", "10"))
+SLIPPAGE_BPS = float(os.getenv("SLIPPAGE_BPS", "2"))
+
+
+def main():
+    print(f"🧪 Walk-forward {WF_MODE} | train={WF_TRAIN_DAYS}d test={WF_TEST_DAYS}d | {WF_START} → {WF_END or 'ahora'}")
+
+    trig = ohlcv_from_klines(get_binance_5m_data_between(TRIGGER_SYMBOL, WF_START, WF_END))
+    exe = ohlcv_from_klines(get_binance_5m_data_between(TRADE_SYMBOL, WF_START, WF_END))
+
+    out = run_walk_forward(
+        trig,
+        space=DEFAULT_GRID,
+        mode=WF_MODE,
+        n_iter=WF_N_ITER,
+        exec_df=exe,
+        train_days=WF_TRAIN_DAYS,
+        test_days=WF_TEST_DAYS,
+        step_days=WF_STEP_DAYS,
+        workers=WF_WORKERS,
+        objective=WF_OBJECTIVE,
+        out_path=WF_OUT,
+        fee_bps=FEE_BPS,
+        slippage_bps=SLIPPAGE_BPS,
+    )
+
+    print(out["folds"].to_string(index=False))
+    print("\n📊 OOS:", out["summary"])
+
+
+if __name__ == "__main__":
+    main()
@@ -134,7 +134,9 @@ def fix_gaps(symbol, df_sheet, last_close_utc, next_open_utc, ws, preferred_base
         return used_rows
 
     # Reconstrucción EXACTA para Google Sheets
-    df_missing["Open time"] = df_missing["Open time"].dt.strftime("%Y-%m-%d %H:%M:%S%z")
+    df_missing["Open time"] = (
+        df_missing["Open time UTC"].dt.tz_convert("America/Costa_Rica")
+    ).dt.strftime("%Y-%m-%d %H:%M:%S%z")
 
     df_missing["Close time"] = (
         df_missing["Close time UTC"].dt.tz_convert("America/Costa_Rica")
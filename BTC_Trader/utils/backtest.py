@@ -0,0 +1,208 @@
+# utils/backtest.py
+# ==========================================================
+# Backtester vectorizado — Winner/Champion (BTC trigger → BNB exec)
+# ----------------------------------------------------------
+# - Consume la salida de build_features_winner + buy_signal_champion
+# - Salida por sell_raw (misma state machine que simulate_sellraw_only)
+# - Fees + slippage por lado
+# - Ejecución cross-symbol: la señal de la vela i (trigger) se llena
+#   en la vela i+1 del símbolo de ejecución (Open), o en su Close si
+#   fill="close".
+# - Sin loops por vela: todo en arrays NumPy (100k–1M velas < 1s).
+# NO hace I/O.
+# ==========================================================
+
+from __future__ import annotations
+
+from typing import Dict, Any, Literal, Optional
+import numpy as np
+import pandas as pd
+
+from .strategy_winner_champion import sellraw_position
+
+
+def ohlcv_from_klines(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    DF de binance_fetch (get_binance_5m_data_between, etc.) → OHLCV numérico
+    indexado por Close time UTC (misma convención que el bot sobre Sheets).
+    """
+    out = df[["Open", "High", "Low", "Close", "Volume"]].astype(float).copy()
+    out.index = pd.DatetimeIndex(df["Close time UTC"], name="ts")
+    out = out[~out.index.duplicated(keep="last")].sort_index()
+    return out
+
+
+def _exec_prices(d: pd.DataFrame, exec_df: Optional[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Alinea el OHLC del símbolo de ejecución al index del trigger (Close time).
+    Sin exec_df, el trigger se ejecuta sobre sí mismo.
+    """
+    src = d if exec_df is None else exec_df
+    ex = src[["Open", "Close"]].reindex(d.index)
+    ex = ex.apply(pd.to_numeric, errors="coerce")
+
+    # velas faltantes del símbolo de ejecución: mark-to-market con el último close
+    ex["Close"] = ex["Close"].ffill()
+    return ex
+
+
+def _max_drawdown(equity: np.ndarray) -> float:
+    if len(equity) == 0:
+        return 0.0
+    peak = np.maximum.accumulate(equity)
+    dd = equity / peak - 1.0
+    return float(dd.min())
+
+
+def run_backtest(
+    d: pd.DataFrame,
+    buy_ok: pd.Series,
+    exec_df: Optional[pd.DataFrame] = None,
+    fee_bps: float = 10.0,
+    slippage_bps: float = 2.0,
+    capital_inicial: float = 1000.0,
+    fill: Literal["next_open", "close"] = "next_open",
+    close_open_at_end: bool = True,
+) -> Dict[str, Any]:
+    """
+    Backtest long-only de la estrategia activa.
+
+    d:        features de build_features_winner (necesita 'sell_raw' y Close).
+    buy_ok:   salida de buy_signal_champion (mismo index que d).
+    exec_df:  OHLCV del símbolo de ejecución (ej. BNBUSDT) indexado por
+              Close time igual que d. None = se ejecuta el propio trigger.
+    fee_bps / slippage_bps: costo por lado, en puntos básicos.
+
+    Retorna:
+      {
+        "trades":   DataFrame (una fila por trade),
+        "equity":   Series (equity mark-to-market por vela),
+        "position": Series bool (en posición al cierre de cada vela),
+        "stats":    dict resumen,
+      }
+    """
+    n = len(d)
+    fee = float(fee_bps) / 1e4
+    slip = float(slippage_bps) / 1e4
+    lag = 1 if fill == "next_open" else 0
+
+    ex = _exec_prices(d, exec_df)
+    close = ex["Close"].to_numpy(dtype=float)
+    if fill == "next_open":
+        # próxima apertura disponible (si falta la vela i+1, la siguiente que exista)
+        fill_px = ex["Open"].shift(-1).bfill().to_numpy(dtype=float)
+    else:
+        fill_px = close.copy()
+
+    # ---------- señales → entradas/salidas ----------
+    in_pos = sellraw_position(buy_ok.reindex(d.index).fillna(False), d["sell_raw"].fillna(False))
+    prev = np.concatenate(([False], in_pos[:-1]))
+    entries = np.flatnonzero(in_pos & ~prev)
+    exits = np.flatnonzero(~in_pos & prev)
+
+    # entradas sin precio de fill (última vela / sin data de ejecución) no se abren;
+    # al descartar una entrada, su salida pareada también cae
+    valid = ~np.isnan(fill_px[entries]) & (entries + lag < n)
+    exits = exits[valid[: len(exits)]]
+    entries = entries[valid]
+
+    # posición abierta al final: cierre forzado al último close (o se descarta)
+    forced = np.zeros(len(entries), dtype=bool)
+    if len(entries) > len(exits):
+        if close_open_at_end:
+            exits = np.append(exits, n - 1)
+            forced[-1] = True
+        else:
+            entries = entries[:-1]
+            forced = forced[:-1]
+
+    entry_fill_i = entries + lag
+    exit_fill_i = np.where(forced, n - 1, exits + lag)
+
+    # salida sin fill (vela final sin i+1) → también cierre forzado
+    bad = (exit_fill_i >= n) | np.isnan(fill_px[np.minimum(exits, n - 1)])
+    forced = forced | bad
+    exit_fill_i = np.where(forced, n - 1, exit_fill_i)
+
+    entry_px = fill_px[entries] * (1.0 + slip)
+    exit_raw = np.where(forced, close[-1] if n else np.nan, fill_px[np.minimum(exits, n - 1)])
+    exit_px = exit_raw * (1.0 - slip)
+
+    # ---------- equity mark-to-market (factor close→close por vela) ----------
+    marks = np.zeros(n + 1, dtype=np.int64)
+    np.add.at(marks, entry_fill_i, 1)
+    np.add.at(marks, exit_fill_i, -1)
+    held = np.cumsum(marks[:n]) > 0          # en posición al cierre de la vela
+
+    prev_close = np.concatenate(([np.nan], close[:-1]))
+    factor = np.ones(n)
+    factor[held] = close[held] / prev_close[held]
+
+    # vela de entrada: desde el fill hasta el close
+    factor[entry_fill_i] = close[entry_fill_i] / entry_px * (1.0 - fee)
+
+    # vela de salida: desde el close previo hasta el fill
+    same_bar = exit_fill_i == entry_fill_i
+    factor[exit_fill_i] = np.where(
+        same_bar,
+        exit_px / entry_px * (1.0 - fee) ** 2,
+        exit_px / prev_close[exit_fill_i] * (1.0 - fee),
+    )
+
+    factor = np.where(np.isfinite(factor), factor, 1.0)
+    equity = float(capital_inicial) * np.cumprod(factor)
+
+    # ---------- trades ----------
+    idx = d.index
+    ret = exit_px / entry_px * (1.0 - fee) ** 2 - 1.0
+    trades = pd.DataFrame({
+        "entry_ts": idx[entries],
+        "exit_ts": idx[exits],
+        "entry_fill_ts": idx[entry_fill_i],
+        "exit_fill_ts": idx[exit_fill_i],
+        "entry_price": entry_px,
+        "exit_price": exit_px,
+        "ret": ret,
+        "bars_held": exit_fill_i - entry_fill_i,
+        "forced_close": forced,
+    })
+
+    stats = backtest_stats(ret, equity, held, capital_inicial)
+    return {
+        "trades": trades,
+        "equity": pd.Series(equity, index=idx, name="equity"),
+        "position": pd.Series(held, index=idx, name="in_position"),
+        "stats": stats,
+    }
+
+
+def backtest_stats(
+    ret: np.ndarray,
+    equity: np.ndarray,
+    held: np.ndarray,
+    capital_inicial: float = 1000.0,
+) -> Dict[str, float]:
+    """
+    Resumen por corrida. Mismas definiciones que evaluation.calcular_estadisticas_long_only
+    (hit rate sobre ganancia > 0; profit factor = ganancias / |pérdidas|), pero en retorno %.
+    """
+    n_trades = int(len(ret))
+    wins = ret[ret > 0]
+    losses = ret[ret <= 0]
+
+    hit_rate = 100.0 * len(wins) / n_trades if n_trades else 0.0
+    loss_sum = abs(losses.sum())
+    if n_trades == 0:
+        profit_factor = 0.0
+    else:
+        profit_factor = float(wins.sum() / loss_sum) if loss_sum != 0 else np.inf
+
+    return {
+        "n_trades": n_trades,
+        "hit_rate": float(hit_rate),
+        "avg_ret": float(ret.mean()) if n_trades else 0.0,
+        "profit_factor": profit_factor,
+        "total_return": float(equity[-1] / capital_inicial - 1.0) if len(equity) else 0.0,
+        "max_drawdown": _max_drawdown(equity),
+        "exposure": float(np.mean(held)) if len(held) else 0.0,
+    }
@@ -4,7 +4,8 @@ import pandas as pd
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 import time
-import pytz
+
+from .kline_cache import INTERVAL_MS, decode_klines, read_through
 
 # ============================================================
 # CONFIGURACIÓN GLOBAL
@@ -14,6 +15,9 @@ US_HOST = (os.getenv("BINANCE_US_URL") or "https://api.binance.us").rstrip("/")
 MIRROR  = (os.getenv("BINANCE_MIRROR_URL") or "https://data-api.binance.vision").rstrip("/")
 API_BINANCE = "https://api.binance.com"
 
+# bases del exchange global: las únicas que entran al cache de klines
+CACHEABLE_BASES = {MIRROR, API_BINANCE}
+
 US_SYMBOLS   = {"BTCUSDT", "ETHUSDT", "ADAUSDT", "XRPUSDT"}
 MIRROR_FIRST = {"BNBUSDT"}
 
@@ -68,9 +72,14 @@ def bases_para(symbol: str):
 # FETCH HISTÓRICO SIMPLE (4H / 5M — pero 5M NO SE USA AQUÍ)
 # ============================================================
 
-def _fetch_klines(base: str, symbol: str, interval: str, limit: int, timeout: int = 12):
+def _fetch_klines(base: str, symbol: str, interval: str, limit: int, timeout: int = 12,
+                  start_ms: int = None, end_ms: int = None):
     url = f"{base}/api/v3/klines"
     params = {"symbol": symbol, "interval": interval, "limit": limit}
+    if start_ms is not None:
+        params["startTime"] = int(start_ms)
+    if end_ms is not None:
+        params["endTime"] = int(end_ms) - 1  # end exclusivo
     r = _session.get(url, params=params, timeout=timeout, headers=_HEADERS)
 
     if r.status_code in (451, 403):
@@ -85,6 +94,63 @@ def _fetch_klines(base: str, symbol: str, interval: str, limit: int, timeout: in
     return data
 
 
+LOCAL_TZ = "America/Costa_Rica"
+
+
+def klines_frame(arr) -> pd.DataFrame:
+    """
+    Array tipado de klines (kline_cache.decode_klines) → DF con SOLO lo que
+    se usa: Open time UTC, OHLCV float64, Close time UTC.
+    Sin copias en hora local: ver with_local_times().
+    """
+    return pd.DataFrame({
+        "Open time UTC":  pd.to_datetime(arr["open_ms"], unit="ms", utc=True),
+        "Open":   arr["open"],
+        "High":   arr["high"],
+        "Low":    arr["low"],
+        "Close":  arr["close"],
+        "Volume": arr["volume"],
+        "Close time UTC": pd.to_datetime(arr["close_ms"], unit="ms", utc=True),
+    })
+
+
+def with_local_times(df: pd.DataFrame, tz: str = LOCAL_TZ) -> pd.DataFrame:
+    """Agrega Open time / Close time en hora CR (solo para mostrar o escribir en Sheets)."""
+    return df.assign(**{
+        "Open time":  df["Open time UTC"].dt.tz_convert(tz),
+        "Close time": df["Close time UTC"].dt.tz_convert(tz),
+    })
+
+
+def _latest_klines(base: str, symbol: str, interval: str, limit: int) -> pd.DataFrame:
+    """
+    Últimas `limit` velas (incluye la vela en curso, igual que `limit` en REST).
+    Read-through: las cerradas salen del cache en disco; a Binance solo se
+    piden los rangos que faltan (normalmente solo la cola).
+    Solo se cachean fuentes globales: Binance.US es otro exchange (otros
+    precios/volúmenes) y no puede mezclarse con el cache global.
+    """
+    if base not in CACHEABLE_BASES:
+        arr = decode_klines(_fetch_klines(base, symbol, interval, limit))
+        if len(arr) == 0:
+            raise ValueError(f"Sin klines {interval} para {symbol} desde {base}")
+        return klines_frame(arr[-limit:])
+
+    iv = INTERVAL_MS[interval]
+    cur_open = (int(time.time() * 1000) // iv) * iv
+    start_ms = cur_open - (limit - 1) * iv
+    # +1 vela de holgura por si el reloj local va atrasado vs Binance
+    end_ms = cur_open + 2 * iv
+
+    arr = read_through(
+        symbol, interval, start_ms, end_ms,
+        lambda a, b: _fetch_klines(base, symbol, interval, limit, start_ms=a, end_ms=b),
+    )
+    if len(arr) == 0:
+        raise ValueError(f"Sin klines {interval} para {symbol} desde {base}")
+    return klines_frame(arr[-limit:])
+
+
 
 # ============================================================
 # HISTÓRICO 4H (permanece igual)
@@ -102,24 +168,7 @@ def get_binance_4h_data(symbol: str, limit: int = 300, preferred_base: str = Non
 
     for base in [b for b in bases if b]:
         try:
-            data = _fetch_klines(base, symbol, "4h", limit)
-            cols = [
-                "Open time","Open","High","Low","Close","Volume",
-                "Close time","Quote asset volume","Number of trades",
-                "Taker buy base asset volume","Taker buy quote asset volume","Ignore"
-            ]
-            df = pd.DataFrame(data, columns=cols)
-
-            for c in ["Open","High","Low","Close","Volume"]:
-                df[c] = pd.to_numeric(df[c], errors="coerce")
-
-            df["Open time UTC"]  = pd.to_datetime(df["Open time"],  unit="ms", utc=True)
-            df["Close time UTC"] = pd.to_datetime(df["Close time"], unit="ms", utc=True)
-
-            df["Open time"]  = df["Open time UTC"].dt.tz_convert("America/Costa_Rica")
-            df["Close time"] = df["Close time UTC"].dt.tz_convert("America/Costa_Rica")
-
-            df = df.sort_values("Open time UTC").reset_index(drop=True)
+            df = _latest_klines(base, symbol, "4h", limit)
 
             _PREFERRED_BASE[symbol] = base
             print(f"[binance_fetch] {symbol} ✓ usando base: {base}")
@@ -150,29 +199,8 @@ def get_binance_5m_data(symbol: str, limit: int = 1000, preferred_base: str = No
 
     for base in [b for b in bases if b]:
         try:
-            # llamada central reutilizable
-            data = _fetch_klines(base, symbol, "5m", limit)
-
-            cols = [
-                "Open time","Open","High","Low","Close","Volume",
-                "Close time","Quote asset volume","Number of trades",
-                "Taker buy base asset volume","Taker buy quote asset volume","Ignore"
-            ]
-            df = pd.DataFrame(data, columns=cols)
-
-            # valores numéricos
-            for c in ["Open","High","Low","Close","Volume"]:
-                df[c] = pd.to_numeric(df[c], errors="coerce")
-
-            # timestamps UTC
-            df["Open time UTC"]  = pd.to_datetime(df["Open time"],  unit="ms", utc=True)
-            df["Close time UTC"] = pd.to_datetime(df["Close time"], unit="ms", utc=True)
-
-            # convertir a CR para visualización
-            df["Open time"]  = df["Open time UTC"].dt.tz_convert("America/Costa_Rica")
-            df["Close time"] = df["Close time UTC"].dt.tz_convert("America/Costa_Rica")
-
-            df = df.sort_values("Open time UTC").reset_index(drop=True)
+            # llamada central reutilizable (cache en disco + cola desde red)
+            df = _latest_klines(base, symbol, "5m", limit)
 
             # memorizar host funcionó
             _PREFERRED_BASE[symbol] = base
@@ -231,37 +259,35 @@ def fetch_last_closed_kline_5m(symbol: str, base_url: str, session=None):
     return k, last_open, last_close, server_time_ms
 
 
+def get_server_time_offset_ms(base_url: str = API_BINANCE, session=None) -> int:
+    """
+    Offset (ms) = reloj de Binance - reloj local.
+    Se toma el punto medio del request para descontar la latencia.
+    """
+    s = session or _session
+
+    t0 = time.time()
+    r = s.get(f"{base_url}/api/v3/time", headers=_HEADERS, timeout=5)
+    t1 = time.time()
+    r.raise_for_status()
+
+    server_time_ms = int(r.json()["serverTime"])
+    return server_time_ms - int((t0 + t1) * 500)
+
+
 
 # ============================================================
 # *** HISTÓRICO 5M ENTRE FECHAS (VERSIÓN ESTABLE) ***
 # ============================================================
 
-def get_binance_5m_data_between(symbol: str, start_dt: str, end_dt: str = None, preferred_base=None):
+def _fetch_5m_range(symbol: str, start_ms: int, end_ms: int) -> list:
     """
-    Descarga histórico EXACTO 5m entre start_dt y end_dt.
+    Klines 5m crudas con start_ms <= open < end_ms, paginando de a 1000.
     SOLO DESDE Binance Vision (SIN GEO RESTRICCIONES).
     """
-
-    # === 1) convertir fechas ===
-    start_ms = int(pd.Timestamp(start_dt, tz="UTC").timestamp() * 1000)
-
-    # === 2) Determinar end_ms ===
-    if end_dt is None:
-        # USAR SIEMPRE BINANCE VISION (NO tiene bloqueos)
-        base_for_time = MIRROR  
-        r = _session.get(f"{base_for_time}/api/v3/time", timeout=5, headers=_HEADERS)
-        r.raise_for_status()
-        end_ms = int(r.json()["serverTime"])
-    else:
-        end_ms = int(pd.Timestamp(end_dt, tz="UTC").timestamp() * 1000)
-
-    print(f"[binance_fetch] HISTÓRICO {symbol} 5m → desde {start_dt} hasta {pd.to_datetime(end_ms, unit='ms')}")
-    print(f"[binance_fetch] base: [{MIRROR}] (forzado)")
-
-    # ========== USAR SOLO BINANCE VISION ==========
     bases = [MIRROR]
 
-    frames = []
+    out = []
     fetch_size = 1000
     current_start = start_ms
 
@@ -273,18 +299,8 @@ def get_binance_5m_data_between(symbol: str, start_dt: str, end_dt: str = None,
 
         for base in bases:
             try:
-                url = f"{base}/api/v3/klines"
-                params = {
-                    "symbol": symbol,
-                    "interval": "5m",
-                    "startTime": current_start,
-                    "endTime": current_end - 1,
-                    "limit": 1000,
-                }
-
-                resp = _session.get(url, params=params, timeout=10, headers=_HEADERS)
-                resp.raise_for_status()
-                data = resp.json()
+                data = _fetch_klines(base, symbol, "5m", fetch_size, timeout=10,
+                                     start_ms=current_start, end_ms=current_end)
                 break
 
             except Exception as e:
@@ -295,36 +311,50 @@ def get_binance_5m_data_between(symbol: str, start_dt: str, end_dt: str = None,
             raise last_exc
 
         if len(data) == 0:
-            break
+            # página vacía (antes del listing / caída del exchange): seguir con
+            # la siguiente en vez de cortar todo el rango
+            current_start = current_end
+            continue
 
-        cols = [
-            "Open time","Open","High","Low","Close","Volume",
-            "Close time","Quote asset volume","Number of trades",
-            "Taker buy base asset volume","Taker buy quote asset volume","Ignore"
-        ]
-        df = pd.DataFrame(data, columns=cols)
+        out.extend(data)
 
-        for c in ["Open","High","Low","Close","Volume"]:
-            df[c] = pd.to_numeric(df[c], errors="coerce")
+        # siguiente página: justo después del último open recibido
+        current_start = int(data[-1][0]) + FIVE_MIN_MS
 
-        df["Open time UTC"]  = pd.to_datetime(df["Open time"],  unit="ms", utc=True)
-        df["Close time UTC"] = pd.to_datetime(df["Close time"], unit="ms", utc=True)
+        time.sleep(0.08)
+
+    return out
+
+
+def get_binance_5m_data_between(symbol: str, start_dt: str, end_dt: str = None, preferred_base=None):
+    """
+    Descarga histórico EXACTO 5m entre start_dt y end_dt.
+    SOLO DESDE Binance Vision (SIN GEO RESTRICCIONES).
+    """
 
-        df["Open time"]  = df["Open time UTC"].dt.tz_convert("America/Costa_Rica")
-        df["Close time"] = df["Close time UTC"].dt.tz_convert("America/Costa_Rica")
+    # === 1) convertir fechas ===
+    start_ms = int(pd.Timestamp(start_dt, tz="UTC").timestamp() * 1000)
 
-        frames.append(df)
+    # === 2) Determinar end_ms ===
+    if end_dt is None:
+        # USAR SIEMPRE BINANCE VISION (NO tiene bloqueos)
+        base_for_time = MIRROR  
+        r = _session.get(f"{base_for_time}/api/v3/time", timeout=5, headers=_HEADERS)
+        r.raise_for_status()
+        end_ms = int(r.json()["serverTime"])
+    else:
+        end_ms = int(pd.Timestamp(end_dt, tz="UTC").timestamp() * 1000)
 
-        last_close_ms = int(df["Close time UTC"].iloc[-1].timestamp() * 1000)
-        current_start = last_close_ms + FIVE_MIN_MS
+    print(f"[binance_fetch] HISTÓRICO {symbol} 5m → desde {start_dt} hasta {pd.to_datetime(end_ms, unit='ms')}")
+    print(f"[binance_fetch] base: [{MIRROR}] (forzado)")
 
-        time.sleep(0.08)
+    # solo los rangos que no están en el cache en disco van a la red
+    arr = read_through(symbol, "5m", start_ms, end_ms, lambda a, b: _fetch_5m_range(symbol, a, b))
 
-    if not frames:
+    if len(arr) == 0:
         raise RuntimeError(f"No se obtuvo historial 5m para {symbol}")
 
-    final_df = pd.concat(frames, ignore_index=True)
-    final_df = final_df.sort_values("Open time UTC").reset_index(drop=True)
+    final_df = klines_frame(arr)
 
     print(f"[binance_fetch] ✓ obtenido histórico consistente: {len(final_df)} velas.")
     return final_df
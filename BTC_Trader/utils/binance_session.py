@@ -3,12 +3,10 @@ import os
 import time
 from typing import Optional
 
-try:
-    from binance.client import Client
-    _client_import_error = None
-except Exception as e:
-    Client = None
-    _client_import_error = str(e)
+# python-binance se importa recién en get_client() (import pesado: requests,
+# aiohttp, dateparser...). DRY_RUN / paths sin trading nunca lo cargan.
+Client = None
+_client_import_error = None
 
 _client = None
 _client_key_fingerprint = None
@@ -70,6 +68,8 @@ def _mark_ban_from_message(msg: Optional[str]) -> None:
 
 def binance_enabled() -> bool:
     key, sec = _current_creds()
+    if key and sec and Client is None:
+        _import_client_class()
     return bool(key and sec and Client is not None)
 
 
@@ -85,6 +85,16 @@ def get_retry_after_sec() -> int:
     return max(0, int((_banned_until_ms - _now_ms()) / 1000))
 
 
+def _import_client_class() -> None:
+    global Client, _client_import_error
+    try:
+        from binance.client import Client as _Client
+        Client = _Client
+        _client_import_error = None
+    except Exception as e:
+        _client_import_error = str(e)
+
+
 def get_client():
     """
     Lazy singleton:
@@ -103,6 +113,9 @@ def get_client():
 
     key, sec = _current_creds()
 
+    if Client is None:
+        _import_client_class()
+
     if Client is None:
         _last_init_err = f"Binance Client import failed: {_client_import_error}"
         return None
@@ -0,0 +1,222 @@
+# utils/candle_aggregation.py
+# ==========================================================
+# Velas 15m / 1h / 4h derivadas de las velas 5m guardadas
+# ----------------------------------------------------------
+# - Entrada: OHLCV 5m indexado por Close time UTC (xx:04:59.999),
+#   la misma convención del bot y de backtest.ohlcv_from_klines.
+#   El open se deriva ajustando a la grilla 5m → también acepta los
+#   closes .998 que escribe update_incremental.fix_gaps.
+#   close_index_utc convierte el "Close time" de Sheets (hora CR).
+# - Buckets alineados en UTC igual que Binance (4h → 00/04/08/... UTC),
+#   NO en hora de Costa Rica.
+# - Salida indexada por el Close time UTC del bucket, con n_5m y
+#   `complete` (bucket con todas sus velas 5m y ya cerrado).
+# - CandleAggregator es incremental: solo agrega velas nuevas y
+#   fusiona el último bucket abierto; get_aggregator lo cachea por
+#   (símbolo, timeframe) → sin llamadas extra a la API.
+# ==========================================================
+
+from __future__ import annotations
+
+import threading
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+CR_TZ = "America/Costa_Rica"
+
+BASE_MS = 5 * 60 * 1000
+TIMEFRAMES_MS: Dict[str, int] = {
+    "15m": 15 * 60 * 1000,
+    "30m": 30 * 60 * 1000,
+    "1h": 60 * 60 * 1000,
+    "2h": 2 * 60 * 60 * 1000,
+    "4h": 4 * 60 * 60 * 1000,
+    "1d": 24 * 60 * 60 * 1000,
+}
+
+OHLCV_COLS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+def close_index_utc(s: pd.Series) -> pd.DatetimeIndex:
+    """
+    "Close time" → DatetimeIndex UTC.
+    Naive = hora CR (como se guarda en Sheets); tz-aware se convierte directo.
+    """
+    dt = pd.to_datetime(s, errors="coerce")
+    if getattr(dt.dt, "tz", None) is None:
+        dt = dt.dt.tz_localize(CR_TZ, ambiguous="infer", nonexistent="shift_forward")
+    return pd.DatetimeIndex(dt.dt.tz_convert("UTC"), name="ts")
+
+
+def _interval_ms(timeframe: str) -> int:
+    try:
+        return TIMEFRAMES_MS[timeframe]
+    except KeyError:
+        raise ValueError(f"timeframe inválido: {timeframe} (válidos: {list(TIMEFRAMES_MS)})")
+
+
+def _close_ms(idx: pd.DatetimeIndex) -> np.ndarray:
+    if idx.tz is None:
+        raise ValueError("El índice 5m debe ser tz-aware (Close time UTC).")
+    return idx.tz_convert("UTC").asi8 // 1_000_000
+
+
+def _aggregate_arrays(close_ms: np.ndarray, o, h, l, c, v, interval_ms: int) -> Dict[str, np.ndarray]:
+    """Agregación vectorizada (reduceat) de velas 5m ordenadas por tiempo."""
+    # grilla 5m, no close + 1 - 5m: fix_gaps guarda closes xx:04:59.998
+    open_ms = (close_ms // BASE_MS) * BASE_MS
+    bucket = (open_ms // interval_ms) * interval_ms
+
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], len(bucket)] - 1
+
+    return {
+        "bucket": bucket[starts],
+        "Open": o[starts],
+        "High": np.maximum.reduceat(h, starts),
+        "Low": np.minimum.reduceat(l, starts),
+        "Close": c[ends],
+        "Volume": np.add.reduceat(v, starts),
+        "n_5m": np.diff(np.r_[starts, len(bucket)]),
+        "last_close_ms": open_ms[ends] + BASE_MS - 1,
+    }
+
+
+def _to_frame(agg: Dict[str, np.ndarray], interval_ms: int, now_ms: Optional[int]) -> pd.DataFrame:
+    bucket_close_ms = agg["bucket"] + interval_ms - 1
+    full = agg["n_5m"] == interval_ms // BASE_MS
+    if now_ms is not None:
+        full &= bucket_close_ms < now_ms
+
+    out = pd.DataFrame(
+        {col: agg[col] for col in OHLCV_COLS},
+        index=pd.DatetimeIndex(pd.to_datetime(bucket_close_ms, unit="ms", utc=True), name="ts"),
+    )
+    out["n_5m"] = agg["n_5m"].astype(np.int32)
+    out["complete"] = full & (agg["last_close_ms"] == bucket_close_ms)
+    return out
+
+
+def _prep_5m(df5: pd.DataFrame) -> pd.DataFrame:
+    d = df5[OHLCV_COLS]
+    if not d.index.is_monotonic_increasing or d.index.has_duplicates:
+        d = d[~d.index.duplicated(keep="last")].sort_index()
+    return d
+
+
+def aggregate_ohlcv(df5: pd.DataFrame, timeframe: str, now: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+    """
+    Agregación batch 5m → timeframe (15m, 1h, 4h, ...).
+
+    df5: OHLCV indexado por Close time UTC (tz-aware).
+    now: si se pasa, el bucket en curso queda complete=False aunque tenga todas las velas.
+    """
+    interval_ms = _interval_ms(timeframe)
+    d = _prep_5m(df5)
+    if d.empty:
+        return pd.DataFrame(columns=OHLCV_COLS + ["n_5m", "complete"], index=pd.DatetimeIndex([], tz="UTC", name="ts"))
+
+    arr = d.to_numpy(dtype=float)
+    agg = _aggregate_arrays(_close_ms(d.index), *arr.T, interval_ms)
+    now_ms = None if now is None else int(pd.Timestamp(now).timestamp() * 1000)
+    return _to_frame(agg, interval_ms, now_ms)
+
+
+# ----------------------------------------------------------
+# Incremental + cache
+# ----------------------------------------------------------
+
+class CandleAggregator:
+    """
+    Agregador incremental de un timeframe.
+
+    update(df5) procesa solo las velas con Close time > última procesada y
+    fusiona con el último bucket (que puede estar abierto). Es O(velas nuevas).
+    Si la fuente 5m reescribe velas viejas (fix de gaps), llamar reset().
+    """
+
+    def __init__(self, timeframe: str, max_bars: Optional[int] = None):
+        self.timeframe = timeframe
+        self.interval_ms = _interval_ms(timeframe)
+        self.max_bars = max_bars
+        self._agg: Optional[Dict[str, np.ndarray]] = None
+        self.last_close_ms: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._agg = None
+            self.last_close_ms = None
+
+    def _merge(self, new: Dict[str, np.ndarray]) -> None:
+        old = self._agg
+        if old is None or len(old["bucket"]) == 0:
+            self._agg = new
+            return
+
+        if old["bucket"][-1] == new["bucket"][0]:
+            # el primer bucket nuevo continúa el último bucket guardado
+            head = {
+                "bucket": new["bucket"][:1],
+                "Open": old["Open"][-1:],
+                "High": np.maximum(old["High"][-1:], new["High"][:1]),
+                "Low": np.minimum(old["Low"][-1:], new["Low"][:1]),
+                "Close": new["Close"][:1],
+                "Volume": old["Volume"][-1:] + new["Volume"][:1],
+                "n_5m": old["n_5m"][-1:] + new["n_5m"][:1],
+                "last_close_ms": new["last_close_ms"][:1],
+            }
+            merged = {k: np.concatenate((old[k][:-1], head[k], new[k][1:])) for k in old}
+        else:
+            merged = {k: np.concatenate((old[k], new[k])) for k in old}
+
+        if self.max_bars and len(merged["bucket"]) > self.max_bars:
+            merged = {k: v[-self.max_bars:] for k, v in merged.items()}
+        self._agg = merged
+
+    def update(self, df5: pd.DataFrame, now: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        with self._lock:
+            d = _prep_5m(df5)
+            close_ms = _close_ms(d.index) if len(d) else np.empty(0, dtype=np.int64)
+
+            if self.last_close_ms is not None:
+                keep = close_ms > self.last_close_ms
+                d, close_ms = d[keep], close_ms[keep]
+
+            if len(d):
+                arr = d.to_numpy(dtype=float)
+                self._merge(_aggregate_arrays(close_ms, *arr.T, self.interval_ms))
+                self.last_close_ms = int(close_ms[-1])
+
+            return self.frame(now)
+
+    def frame(self, now: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        if self._agg is None:
+            return aggregate_ohlcv(pd.DataFrame(columns=OHLCV_COLS, index=pd.DatetimeIndex([], tz="UTC")), self.timeframe)
+        now_ms = None if now is None else int(pd.Timestamp(now).timestamp() * 1000)
+        return _to_frame(self._agg, self.interval_ms, now_ms)
+
+
+_AGGREGATORS: Dict[Tuple[str, str], CandleAggregator] = {}
+_AGG_LOCK = threading.Lock()
+
+
+def get_aggregator(symbol: str, timeframe: str, max_bars: Optional[int] = None) -> CandleAggregator:
+    key = (symbol.upper(), timeframe)
+    with _AGG_LOCK:
+        agg = _AGGREGATORS.get(key)
+        if agg is None:
+            agg = _AGGREGATORS[key] = CandleAggregator(timeframe, max_bars=max_bars)
+        return agg
+
+
+def multi_timeframe(
+    symbol: str,
+    df5: pd.DataFrame,
+    timeframes=("15m", "1h", "4h"),
+    now: Optional[pd.Timestamp] = None,
+) -> Dict[str, pd.DataFrame]:
+    """Actualiza (incremental, cacheado) y devuelve {timeframe: OHLCV} desde las velas 5m."""
+    return {tf: get_aggregator(symbol, tf).update(df5, now=now) for tf in timeframes}
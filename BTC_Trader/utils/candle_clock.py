@@ -0,0 +1,72 @@
+# utils/candle_clock.py
+# ==========================================================
+# Reloj alineado a cierres de vela (hora del servidor Binance)
+# ----------------------------------------------------------
+# - offset = reloj Binance - reloj local (se re-sincroniza cada
+#   resync_sec); si la sincronización falla se mantiene el último
+#   offset (o 0): el reloj local suele estar a <1s.
+# - next_close_ms: próximo límite de vela (= open de la siguiente).
+# - sleep_until: espera interrumpible (threading.Event) para que
+#   SIGTERM corte la espera al instante.
+# ==========================================================
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, Optional
+
+FIVE_MIN_MS = 5 * 60 * 1000
+
+
+class CandleClock:
+    def __init__(
+        self,
+        interval_ms: int = FIVE_MIN_MS,
+        offset_fn: Optional[Callable[[], int]] = None,
+        resync_sec: float = 3600.0,
+    ):
+        self.interval_ms = int(interval_ms)
+        self.offset_fn = offset_fn
+        self.resync_sec = float(resync_sec)
+        self.offset_ms = 0
+        self.last_sync: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def sync(self) -> int:
+        if self.offset_fn is None:
+            return self.offset_ms
+        try:
+            self.offset_ms = int(self.offset_fn())
+            self.last_error = None
+        except Exception as e:
+            self.last_error = f"{type(e).__name__}: {e}"
+        self.last_sync = time.time()
+        return self.offset_ms
+
+    def maybe_sync(self) -> int:
+        if self.last_sync is None or time.time() - self.last_sync >= self.resync_sec:
+            return self.sync()
+        return self.offset_ms
+
+    def now_ms(self) -> int:
+        return int(time.time() * 1000) + self.offset_ms
+
+    def last_close_ms(self, now_ms: Optional[int] = None) -> int:
+        """Límite de la última vela cerrada (open de la vela en curso)."""
+        now_ms = self.now_ms() if now_ms is None else int(now_ms)
+        return (now_ms // self.interval_ms) * self.interval_ms
+
+    def next_close_ms(self, now_ms: Optional[int] = None) -> int:
+        return self.last_close_ms(now_ms) + self.interval_ms
+
+    def seconds_until(self, target_ms: int) -> float:
+        return max((int(target_ms) - self.now_ms()) / 1000.0, 0.0)
+
+    def sleep_until(self, target_ms: int, stop: Optional[threading.Event] = None) -> bool:
+        """Duerme hasta target_ms (hora servidor). Retorna False si stop se activó."""
+        secs = self.seconds_until(target_ms)
+        if stop is None:
+            time.sleep(secs)
+            return True
+        return not stop.wait(secs)
@@ -0,0 +1,193 @@
+# utils/candle_integrity.py
+# ==========================================================
+# Integridad del histórico de velas (todas las hojas, una pasada)
+# ----------------------------------------------------------
+# - Trabaja en int64 (ms UTC) sobre el "Open time": sin loops por fila.
+# - Todos los símbolos se apilan en UN array (símbolo, open_ms) y se
+#   ordenan con un solo lexsort → huecos / duplicados / desalineados
+#   de todas las hojas salen del mismo np.diff.
+# - missing: rangos [start_ms, end_ms) de opens faltantes DENTRO del
+#   histórico guardado (el borde final lo cubre update_incremental).
+# - rebuild_candles: une lo guardado + lo descargado, descarta filas
+#   desalineadas, deduplica (gana lo descargado) y ordena.
+# NO hace I/O.
+# ==========================================================
+
+from __future__ import annotations
+
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+import pandas as pd
+
+FIVE_MIN_MS = 5 * 60 * 1000
+LOCAL_TZ = "America/Costa_Rica"
+
+CANDLE_COLS = ["Open time", "Open", "High", "Low", "Close", "Volume", "Close time"]
+
+
+def open_ms(df: pd.DataFrame, col: str = "Open time") -> np.ndarray:
+    """Open time → int64 ms UTC. Naive = hora CR. NaT queda como -1."""
+    t = pd.to_datetime(df[col], errors="coerce")
+    if getattr(t.dt, "tz", None) is None:
+        t = t.dt.tz_localize(LOCAL_TZ, ambiguous="NaT", nonexistent="NaT")
+    t = t.dt.tz_convert("UTC")
+    ms = t.to_numpy(dtype="datetime64[ms]").astype(np.int64)
+    ms[t.isna().to_numpy()] = -1
+    return ms
+
+
+def _reporte_vacio(rows: int = 0) -> Dict[str, Any]:
+    return {
+        "rows": rows,
+        "first_ms": None,
+        "last_ms": None,
+        "missing": [],
+        "n_missing": 0,
+        "duplicates": [],
+        "misaligned": [],
+        "invalid": 0,
+        "ok": True,
+    }
+
+
+def scan_all(
+    frames: Dict[str, pd.DataFrame],
+    interval_ms: int = FIVE_MIN_MS,
+    col: str = "Open time",
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Escanea todas las hojas en una pasada vectorizada.
+    Retorna {symbol: reporte}; reporte = {
+        rows, first_ms, last_ms,
+        missing:    [(start_ms, end_ms), ...]  # opens faltantes, end exclusivo
+        n_missing:  int,
+        duplicates: [open_ms, ...]             # opens repetidos (una vez c/u)
+        misaligned: [open_ms, ...]             # opens fuera de la grilla
+        invalid:    int                        # Open time ilegible
+        ok:         bool,
+    }
+    """
+    symbols = list(frames)
+    out = {s: _reporte_vacio(0 if frames[s] is None else len(frames[s])) for s in symbols}
+
+    partes = [
+        open_ms(frames[s], col) if frames[s] is not None and len(frames[s]) else np.empty(0, np.int64)
+        for s in symbols
+    ]
+    if not partes or sum(len(p) for p in partes) == 0:
+        return out
+
+    ms = np.concatenate(partes)
+    gid = np.repeat(np.arange(len(symbols)), [len(p) for p in partes])
+
+    invalid = ms < 0
+    misaligned = ~invalid & (ms % interval_ms != 0)
+    valid = ~invalid & ~misaligned
+
+    for i, n in enumerate(np.bincount(gid[invalid], minlength=len(symbols))):
+        out[symbols[i]]["invalid"] = int(n)
+    for g, t in zip(gid[misaligned], ms[misaligned]):
+        out[symbols[g]]["misaligned"].append(int(t))
+
+    # ---- orden único (símbolo, open) ----
+    ms_v, gid_v = ms[valid], gid[valid]
+    order = np.lexsort((ms_v, gid_v))
+    ms_v, gid_v = ms_v[order], gid_v[order]
+
+    if len(ms_v):
+        mismo = gid_v[1:] == gid_v[:-1]
+        d = np.diff(ms_v)
+
+        # duplicados: mismo símbolo y diff 0 (se reporta cada open una vez)
+        dup = mismo & (d == 0)
+        dup_first = dup & ~np.r_[False, dup[:-1]]
+        for k in np.flatnonzero(dup_first):
+            out[symbols[gid_v[k]]]["duplicates"].append(int(ms_v[k]))
+
+        # huecos: mismo símbolo y diff > intervalo
+        gap = np.flatnonzero(mismo & (d > interval_ms))
+        for k in gap:
+            rep = out[symbols[gid_v[k]]]
+            start, end = int(ms_v[k]) + interval_ms, int(ms_v[k + 1])
+            rep["missing"].append((start, end))
+            rep["n_missing"] += (end - start) // interval_ms
+
+        # primer / último open por símbolo
+        bordes = np.flatnonzero(np.r_[True, ~mismo, True])
+        for a, b in zip(bordes[:-1], bordes[1:]):
+            rep = out[symbols[gid_v[a]]]
+            rep["first_ms"], rep["last_ms"] = int(ms_v[a]), int(ms_v[b - 1])
+
+    for rep in out.values():
+        rep["ok"] = not (rep["missing"] or rep["duplicates"] or rep["misaligned"] or rep["invalid"])
+    return out
+
+
+def scan_candles(df: pd.DataFrame, interval_ms: int = FIVE_MIN_MS, col: str = "Open time") -> Dict[str, Any]:
+    """Reporte de integridad de UNA hoja (ver scan_all)."""
+    return scan_all({"_": df}, interval_ms=interval_ms, col=col)["_"]
+
+
+def rebuild_candles(
+    df: pd.DataFrame,
+    fetched: Optional[pd.DataFrame] = None,
+    interval_ms: int = FIVE_MIN_MS,
+    max_rows: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Histórico reparado: guardado + descargado (ambos con "Open time"),
+    sin filas desalineadas/ilegibles, sin duplicados (gana `fetched`, luego
+    la última fila guardada), ordenado. Agrega columna `open_ms`.
+    max_rows: conserva solo las últimas N velas.
+    """
+    partes = []
+    for prioridad, frame in ((0, df), (1, fetched)):
+        if frame is None or frame.empty:
+            continue
+        f = frame[[c for c in CANDLE_COLS if c in frame.columns]].copy()
+        f["open_ms"] = open_ms(f)
+        f["_prio"] = prioridad
+        partes.append(f)
+
+    if not partes:
+        return pd.DataFrame(columns=CANDLE_COLS + ["open_ms"])
+
+    allc = pd.concat(partes, ignore_index=True)
+    ms = allc["open_ms"].to_numpy()
+    allc = allc[(ms >= 0) & (ms % interval_ms == 0)]
+
+    # estable: a igual open, queda la última fila de mayor prioridad
+    allc = allc.sort_values(["open_ms", "_prio"], kind="mergesort")
+    allc = allc.drop_duplicates("open_ms", keep="last").drop(columns="_prio")
+
+    if max_rows is not None:
+        allc = allc.tail(int(max_rows))
+    return allc.reset_index(drop=True)
+
+
+def format_sheet_rows(df: pd.DataFrame, interval_ms: int = FIVE_MIN_MS, tz: str = LOCAL_TZ) -> List[list]:
+    """
+    Filas A:G con el formato del histórico:
+      Open time  → "YYYY-MM-DD HH:MM:SS-06:00"
+      Close time → open + intervalo - 1ms → "YYYY-MM-DD HH:MM:SS.999000-06:00"
+    Requiere `open_ms` (rebuild_candles); el Close time se recalcula desde el open.
+    """
+    if df.empty:
+        return []
+
+    def _iso(t: pd.DatetimeIndex, fmt: str) -> np.ndarray:
+        s = pd.Series(t.strftime(fmt + "%z"))
+        return (s.str[:-2] + ":" + s.str[-2:]).to_numpy()
+
+    t_open = pd.DatetimeIndex(pd.to_datetime(df["open_ms"].to_numpy(), unit="ms", utc=True)).tz_convert(tz)
+    t_close = t_open + pd.Timedelta(milliseconds=int(interval_ms) - 1)
+
+    cols = {
+        "Open time": _iso(t_open, "%Y-%m-%d %H:%M:%S"),
+        "Close time": _iso(t_close, "%Y-%m-%d %H:%M:%S.%f"),
+    }
+    for c in ["Open", "High", "Low", "Close", "Volume"]:
+        cols[c] = pd.to_numeric(df[c], errors="coerce").astype(float).to_numpy()
+
+    return pd.DataFrame(cols)[CANDLE_COLS].values.tolist()
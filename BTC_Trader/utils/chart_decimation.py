@@ -0,0 +1,156 @@
+# utils/chart_decimation.py
+# ==========================================================
+# Decimación server-side para gráficos largos (Plotly)
+# ----------------------------------------------------------
+# - Velas: min-max por bucket de k velas consecutivas
+#   (Open primero, High máx, Low mín, Close último, Volume suma),
+#   así los extremos nunca se pierden al alejar el zoom.
+# - Líneas (z-scores): LTTB (Largest-Triangle-Three-Buckets)
+#   o min-max, con # de puntos acotado.
+# - Marcadores BUY/SELL por máscara numpy (sin .loc por fila).
+# El payload al navegador queda acotado sin importar la historia.
+# NO hace I/O ni depende de Streamlit.
+# ==========================================================
+
+from __future__ import annotations
+
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+OHLCV_COLS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+def bucket_size(n: int, max_points: int) -> int:
+    """Velas por bucket para que n velas queden en <= max_points."""
+    return max(1, int(np.ceil(n / max(int(max_points), 1))))
+
+
+def decimate_ohlc(df: pd.DataFrame, max_bars: int) -> pd.DataFrame:
+    """
+    Agrupa velas consecutivas en buckets de k (k = ceil(n / max_bars)).
+    Index = tiempo de la ÚLTIMA vela del bucket. Agrega columna `n_bars`.
+    Con k == 1 devuelve las velas tal cual.
+    """
+    n = len(df)
+    k = bucket_size(n, max_bars)
+    cols = [c for c in OHLCV_COLS if c in df.columns]
+    if k == 1 or n == 0:
+        out = df[cols].copy()
+        out["n_bars"] = 1
+        return out
+
+    # buckets anclados al final: la última vela siempre cierra un bucket completo
+    starts = np.arange((n - 1) % k + 1 - k, n, k)
+    starts[0] = 0
+    ends = np.r_[starts[1:], n] - 1
+
+    data: Dict[str, np.ndarray] = {
+        "Open": df["Open"].to_numpy(dtype=float)[starts],
+        "High": np.maximum.reduceat(df["High"].to_numpy(dtype=float), starts),
+        "Low": np.minimum.reduceat(df["Low"].to_numpy(dtype=float), starts),
+        "Close": df["Close"].to_numpy(dtype=float)[ends],
+    }
+    if "Volume" in df.columns:
+        data["Volume"] = np.add.reduceat(df["Volume"].to_numpy(dtype=float), starts)
+
+    out = pd.DataFrame(data, index=df.index[ends])
+    out["n_bars"] = ends - starts + 1
+    return out
+
+
+def lttb_indices(y, n_out: int, x=None) -> np.ndarray:
+    """
+    Índices elegidos por LTTB (conserva forma/picos visuales).
+    x: eje numérico opcional (default: posición). NaN en y se tratan como 0
+    para elegir, pero se devuelve el índice original.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    n_out = int(n_out)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.arange(n, dtype=float) if x is None else np.asarray(x, dtype=float)
+    yv = np.nan_to_num(y)
+
+    # n_out - 2 buckets interiores; primero y último fijos
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    # promedio del bucket siguiente (para el vértice C del triángulo)
+    csum_x = np.concatenate(([0.0], np.cumsum(x)))
+    csum_y = np.concatenate(([0.0], np.cumsum(yv)))
+    nxt_lo = np.r_[edges[1:-1], n - 1]
+    nxt_hi = np.r_[edges[2:], n]
+    cnt = np.maximum(nxt_hi - nxt_lo, 1)
+    avg_x = (csum_x[nxt_hi] - csum_x[nxt_lo]) / cnt
+    avg_y = (csum_y[nxt_hi] - csum_y[nxt_lo]) / cnt
+
+    out = np.empty(n_out, dtype=np.int64)
+    out[0] = 0
+    out[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if hi <= lo:
+            hi = lo + 1
+        xs, ys = x[lo:hi], yv[lo:hi]
+        area = np.abs((x[a] - avg_x[i]) * (ys - yv[a]) - (x[a] - xs) * (avg_y[i] - yv[a]))
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+def minmax_indices(y, n_out: int) -> np.ndarray:
+    """Índices del mín y máx de cada bucket (2 puntos por bucket), ordenados."""
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    n_buckets = max(int(n_out) // 2, 1)
+    if 2 * n_buckets >= n:
+        return np.arange(n)
+
+    k = bucket_size(n, n_buckets)
+    pad = (-n) % k
+    v = np.concatenate((np.nan_to_num(y), np.full(pad, np.nan))).reshape(-1, k)
+    base = np.arange(v.shape[0]) * k
+    lo = base + np.nanargmin(v, axis=1)
+    hi = base + np.nanargmax(v, axis=1)
+    return np.unique(np.concatenate((lo, hi)))
+
+
+def decimate_series(s: pd.Series, max_points: int, method: str = "lttb") -> pd.Series:
+    """Serie reducida a <= max_points puntos (lttb | minmax)."""
+    if len(s) <= max_points:
+        return s
+    if method == "lttb":
+        idx = lttb_indices(s.to_numpy(dtype=float), max_points)
+    elif method == "minmax":
+        idx = minmax_indices(s.to_numpy(dtype=float), max_points)
+    else:
+        raise ValueError(f"method inválido: {method} (lttb | minmax)")
+    return s.iloc[idx]
+
+
+def signal_markers(
+    sig: pd.DataFrame,
+    col: str,
+    price_col: str,
+    offset: float = 0.0,
+    dedup: bool = True,
+) -> pd.DataFrame:
+    """
+    Puntos (index, y) para marcadores de señal.
+    dedup: solo la primera vela de cada racha True (igual que prev_buy/prev_sell).
+    y = price_col * (1 + offset).
+    """
+    m = sig[col].to_numpy(dtype=bool)
+    if dedup:
+        m = m & ~np.r_[False, m[:-1]]
+    pos = np.flatnonzero(m)
+    y = sig[price_col].to_numpy(dtype=float)[pos] * (1.0 + float(offset))
+    return pd.DataFrame({"y": y}, index=sig.index[pos])
+
+
+def window_slice(df: pd.DataFrame, bars: Optional[int]) -> pd.DataFrame:
+    """Últimas `bars` filas (None = todo)."""
+    return df if bars is None else df.tail(int(bars))
@@ -3,27 +3,17 @@
 import numpy as np
 import pandas as pd
 
-def calcular_estadisticas_modelo(df, señal_col='B-H-S Signal', precio_col='Close'):
-    pares = []
-    buy_price = None
-
-    for _, row in df.iterrows():
-        señal = row[señal_col]
-        precio = row[precio_col]
-
-        if pd.isna(señal):
-            continue
-
-        if señal == 'B':
-            buy_price = precio
-        elif señal == 'S' and buy_price is not None:
-            pares.append(precio - buy_price)
-            buy_price = None
+BARS_PER_YEAR_5M = 365 * 24 * 12
 
-    if not pares:
+def estadisticas_desde_pares(pares):
+    """
+    Métricas sobre la ganancia de cada trade (BUY → SELL):
+    (hit_rate %, # trades, ganancia media, pérdida media, profit factor).
+    """
+    if len(pares) == 0:
         return 0.0, 0, 0.0, 0.0, 0.0
 
-    pares = np.array(pares)
+    pares = np.asarray(pares, dtype=float)
     ganancias = pares[pares > 0]
     perdidas = pares[pares <= 0]
 
@@ -34,48 +24,61 @@ def calcular_estadisticas_modelo(df, señal_col='B-H-S Signal', precio_col='Clos
 
     return hit_rate, len(pares), ganancia_media, perdida_media, profit_factor
 
+# ----------------------------------------------------------
+# Núcleo vectorizado: códigos de estado B/S
+# ----------------------------------------------------------
+
+def _estado_long(es_buy: np.ndarray, es_sell: np.ndarray) -> np.ndarray:
+    """
+    Estado (1 = comprado) al cierre de cada vela para la regla
+    "BUY abre si no hay posición / SELL cierra si la hay".
+    Código por vela: 1 = B, 0 = S, -1 = sin señal → ffill del último código.
+    """
+    n = len(es_buy)
+    code = np.full(n, -1, dtype=np.int8)
+    code[es_sell] = 0
+    code[es_buy] = 1
+    last = np.maximum.accumulate(np.where(code >= 0, np.arange(n), -1))
+    return np.where(last >= 0, code[np.maximum(last, 0)], 0).astype(np.int8)
+
+def _pares_long(es_buy: np.ndarray, es_sell: np.ndarray):
+    """Índices (entradas, salidas) de cada operación larga. len(entradas) >= len(salidas)."""
+    estado = _estado_long(es_buy, es_sell)
+    prev = np.concatenate(([0], estado[:-1]))
+    entradas = np.flatnonzero((estado == 1) & (prev == 0))
+    salidas = np.flatnonzero((estado == 0) & (prev == 1))
+    return entradas, salidas, estado
+
+def _es_senal(serie: pd.Series, valores) -> np.ndarray:
+    return serie.isin(valores).to_numpy(dtype=bool)
+
+def calcular_estadisticas_modelo(df, señal_col='B-H-S Signal', precio_col='Close'):
+    """
+    Pares B → S. Una 'B' repetida antes del cierre actualiza el precio de compra
+    (se empareja cada 'S' con la última 'B').
+    """
+    es_buy = _es_senal(df[señal_col], ['B'])
+    es_sell = _es_senal(df[señal_col], ['S'])
+    precios = df[precio_col].to_numpy()
+
+    _, salidas, _ = _pares_long(es_buy, es_sell)
+    ultima_b = np.maximum.accumulate(np.where(es_buy, np.arange(len(df)), -1))
+
+    pares = precios[salidas] - precios[ultima_b[salidas]]
+    return estadisticas_desde_pares(pares)
+
 def calcular_estadisticas_long_only(df, señal_col='Signal Final', precio_col='Close'):
     """
     Evalúa pares BUY → SELL secuenciales.
     Solo cuenta trades largos. Ignora señales que no formen pares.
     """
-    df = df.reset_index(drop=True)
-    pares = []
-    en_compra = False
-    precio_compra = None
-
-    for _, row in df.iterrows():
-        señal = row[señal_col]
-        precio = row[precio_col]
-
-        if pd.isna(señal):
-            continue
-
-        if señal in ['B', 'BUY'] and not en_compra:
-            # Inicio de operación
-            precio_compra = precio
-            en_compra = True
-
-        elif señal in ['S', 'SELL'] and en_compra:
-            # Cierre de operación
-            ganancia = precio - precio_compra
-            pares.append(ganancia)
-            en_compra = False
-            precio_compra = None
-
-    if not pares:
-        return 0.0, 0, 0.0, 0.0, 0.0
-
-    pares = np.array(pares)
-    ganancias = pares[pares > 0]
-    perdidas = pares[pares <= 0]
-
-    hit_rate = 100 * len(ganancias) / len(pares)
-    ganancia_media = ganancias.mean() if len(ganancias) > 0 else 0.0
-    perdida_media = perdidas.mean() if len(perdidas) > 0 else 0.0
-    profit_factor = ganancias.sum() / abs(perdidas.sum()) if perdidas.sum() != 0 else np.inf
+    es_buy = _es_senal(df[señal_col], ['B', 'BUY'])
+    es_sell = _es_senal(df[señal_col], ['S', 'SELL'])
+    precios = df[precio_col].to_numpy()
 
-    return hit_rate, len(pares), ganancia_media, perdida_media, profit_factor
+    entradas, salidas, _ = _pares_long(es_buy, es_sell)
+    pares = precios[salidas] - precios[entradas[:len(salidas)]]
+    return estadisticas_desde_pares(pares)
 
 def simular_capital_long_only(df, capital_inicial, señal_col='Eval Signal', precio_col='Close'):
     """
@@ -90,31 +93,102 @@ def simular_capital_long_only(df, capital_inicial, señal_col='Eval Signal', pre
     Returns:
         float: Capital final tras aplicar la estrategia.
     """
-    df = df.copy().reset_index(drop=True)
-    capital = capital_inicial
-    en_posicion = False
-    precio_entrada = 0
-
-    for i in range(len(df)):
-        señal = df.at[i, señal_col]
-        precio = df.at[i, precio_col]
-
-        if señal == 'B' and not en_posicion:
-            # Entramos al mercado
-            precio_entrada = precio
-            en_posicion = True
-
-        elif señal == 'S' and en_posicion:
-            # Salimos del mercado, calculamos ganancia
-            cambio = precio / precio_entrada
-            capital *= cambio
-            en_posicion = False
+    es_buy = _es_senal(df[señal_col], ['B'])
+    es_sell = _es_senal(df[señal_col], ['S'])
+    precios = df[precio_col].to_numpy()
+
+    entradas, salidas, _ = _pares_long(es_buy, es_sell)
+    cambios = precios[salidas] / precios[entradas[:len(salidas)]]
 
     # Si quedamos con una posición abierta al final, asumimos que se cierra con el último precio
-    if en_posicion:
-        capital *= df[precio_col].iloc[-1] / precio_entrada
+    if len(entradas) > len(salidas):
+        cambios = np.append(cambios, precios[-1] / precios[entradas[-1]])
 
-    return capital
+    # acumulado secuencial (mismo orden de redondeo que capital *= cambio)
+    return np.multiply.accumulate(np.concatenate(([capital_inicial], cambios)))[-1]
 
+# ----------------------------------------------------------
+# Métricas extendidas
+# ----------------------------------------------------------
 
+def ratios_riesgo(retornos, periods_per_year=BARS_PER_YEAR_5M):
+    """
+    Sharpe y Sortino anualizados sobre retornos por vela (rf = 0).
+    Sortino usa la desviación a la baja (RMS de los retornos negativos).
+    """
+    r = np.asarray(retornos, dtype=float)
+    r = r[np.isfinite(r)]
+    if len(r) < 2:
+        return 0.0, 0.0
+
+    media = r.mean()
+    sd = r.std(ddof=1)
+    downside = np.sqrt(np.mean(np.minimum(r, 0.0) ** 2))
+
+    escala = np.sqrt(periods_per_year)
+    sharpe = media / sd * escala if sd > 0 else 0.0
+    sortino = media / downside * escala if downside > 0 else 0.0
+    return float(sharpe), float(sortino)
+
+def max_drawdown(equity):
+    eq = np.asarray(equity, dtype=float)
+    if len(eq) == 0:
+        return 0.0
+    pico = np.maximum.accumulate(eq)
+    return float((eq / pico - 1.0).min())
+
+def metricas_long_only(
+    df,
+    señal_col='Signal Final',
+    precio_col='Close',
+    capital_inicial=1.0,
+    periods_per_year=BARS_PER_YEAR_5M,
+):
+    """
+    Versión extendida de calcular_estadisticas_long_only (mismos pares BUY → SELL)
+    con equity mark-to-market por vela.
 
+    Returns:
+        dict: hit_rate, n_trades, ganancia_media, perdida_media, profit_factor,
+              capital_final, max_drawdown, sharpe, sortino, exposure,
+              avg_holding_bars y avg_holding_time (si el index es datetime).
+    """
+    es_buy = _es_senal(df[señal_col], ['B', 'BUY'])
+    es_sell = _es_senal(df[señal_col], ['S', 'SELL'])
+    precios = df[precio_col].to_numpy(dtype=float)
+
+    entradas, salidas, estado = _pares_long(es_buy, es_sell)
+    pares = precios[salidas] - precios[entradas[:len(salidas)]]
+    hit_rate, n, ganancia_media, perdida_media, profit_factor = estadisticas_desde_pares(pares)
+
+    # retorno por vela: se gana el movimiento t-1 → t si estábamos comprados al cierre de t-1
+    prev_precio = np.concatenate(([np.nan], precios[:-1]))
+    expuesto = np.concatenate(([0], estado[:-1])) == 1
+    r = np.where(expuesto, precios / prev_precio - 1.0, 0.0)
+    r = np.where(np.isfinite(r), r, 0.0)
+    equity = capital_inicial * np.cumprod(1.0 + r)
+
+    sharpe, sortino = ratios_riesgo(r, periods_per_year)
+
+    duracion = salidas - entradas[:len(salidas)]
+    avg_bars = float(duracion.mean()) if len(duracion) else 0.0
+
+    avg_time = None
+    if isinstance(df.index, pd.DatetimeIndex) and len(duracion):
+        idx = df.index
+        avg_time = (idx[salidas] - idx[entradas[:len(salidas)]]).mean()
+
+    return {
+        "hit_rate": hit_rate,
+        "n_trades": n,
+        "ganancia_media": ganancia_media,
+        "perdida_media": perdida_media,
+        "profit_factor": profit_factor,
+        "capital_final": float(equity[-1]) if len(equity) else float(capital_inicial),
+        "max_drawdown": max_drawdown(equity),
+        "sharpe": sharpe,
+        "sortino": sortino,
+        "exposure": float(np.mean(estado == 1)) if len(estado) else 0.0,
+        "avg_holding_bars": avg_bars,
+        "avg_holding_time": avg_time,
+    }
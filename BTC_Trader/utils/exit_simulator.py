@@ -0,0 +1,317 @@
+# utils/exit_simulator.py
+# ==========================================================
+# Simulación de salidas SL/TP intrabar (High/Low) — long-only
+# ----------------------------------------------------------
+# - Para cada posición: primera vela con Low <= SL o High >= TP_k
+#   (búsqueda first-touch vectorizada por bloques crecientes).
+# - Regla conservadora: si en la misma vela se tocan SL y TP,
+#   cuenta el SL primero. Gap por debajo del SL → fill al Open.
+# - Salidas parciales: tramo k (fracción tp_fracs[k]) sale en TP_k
+#   o en el SL; el resto (1 - sum) sale por SL, señal o fin.
+# - Opcional: salida por señal (ej. sell_raw) en una vela dada,
+#   que cierra todo lo que siga abierto al Open de esa vela.
+# - Niveles: risk_levels.build_levels_batch.
+# NO hace I/O.
+# ==========================================================
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Literal, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .backtest import backtest_stats
+from .risk_levels import build_levels_batch
+from .strategy_winner_champion import sellraw_position
+
+# celdas máximas (posiciones activas x velas) por bloque de búsqueda
+MAX_BLOCK_CELLS = 4_000_000
+
+# tamaño de bloque del nivel grueso (min/max por bloque) para holds largos
+COARSE_BLOCK = 256
+
+
+def _block_extreme(values: np.ndarray, size: int, below: bool) -> np.ndarray:
+    pad = (-len(values)) % size
+    fill = np.inf if below else -np.inf
+    v = np.concatenate((values, np.full(pad, fill))).reshape(-1, size)
+    v = np.where(np.isnan(v), fill, v)
+    return v.min(axis=1) if below else v.max(axis=1)
+
+
+def _scan(values, start, stop, level, below, res, active, max_cells=None, block=32):
+    """Búsqueda fina por bloques crecientes; devuelve (activos sin resolver, offset alcanzado)."""
+    offset = np.zeros(len(start), dtype=np.int64)
+    b = int(block)
+    while len(active):
+        b = max(1, min(b, MAX_BLOCK_CELLS // len(active)))
+        s = start[active] + offset[active]
+        cols = s[:, None] + np.arange(b)[None, :]
+        in_range = cols < stop[active][:, None]
+        v = values[np.minimum(cols, len(values) - 1)]
+        lv = level[active][:, None]
+        hit = ((v <= lv) if below else (v >= lv)) & in_range
+
+        found = hit.any(axis=1)
+        res[active[found]] = s[found] + hit[found].argmax(axis=1)
+
+        done = found | (s + b >= stop[active])
+        offset[active] += b
+        active = active[~done]
+        if max_cells is not None and b >= max_cells:
+            break
+        b *= 2
+    return active, offset
+
+
+def first_touch(
+    values: np.ndarray,
+    start: np.ndarray,
+    stop: np.ndarray,
+    level: np.ndarray,
+    below: bool,
+    block: int = 32,
+) -> np.ndarray:
+    """
+    Para cada i: primer índice j en [start[i], stop[i]) con values[j] <= level[i]
+    (below=True) o values[j] >= level[i] (below=False). -1 si no hay.
+
+    Primero recorre en bloques que se duplican (holds cortos, el caso común);
+    las posiciones que siguen abiertas saltan por un nivel grueso de
+    min/max por bloque (recursivo), así un hold de 100k velas no cuesta 100k celdas.
+    """
+    values = np.asarray(values, dtype=float)
+    start = np.asarray(start, dtype=np.int64)
+    stop = np.minimum(np.asarray(stop, dtype=np.int64), len(values))
+    level = np.asarray(level, dtype=float)
+
+    res = np.full(len(start), -1, dtype=np.int64)
+    active = np.flatnonzero((start < stop) & ~np.isnan(level))
+
+    B = COARSE_BLOCK
+    if len(values) < 4 * B:
+        _scan(values, start, stop, level, below, res, active, block=block)
+        return res
+
+    active, offset = _scan(values, start, stop, level, below, res, active, max_cells=B, block=block)
+    if not len(active):
+        return res
+
+    # completar hasta el borde del bloque grueso (<= B celdas)
+    s = start[active] + offset[active]
+    edge = np.minimum(-(-s // B) * B, stop[active])
+    sub = np.full(len(active), -1, dtype=np.int64)
+    _scan(values, s, edge, level[active], below, sub, np.arange(len(active)), block=B)
+    hit = sub >= 0
+    res[active[hit]] = sub[hit]
+    active, s = active[~hit], edge[~hit]
+    active, s = active[s < stop[active]], s[s < stop[active]]
+    if not len(active):
+        return res
+
+    # nivel grueso: primer bloque cuyo min/max toca el nivel
+    ext = _block_extreme(values, B, below)
+    cb = first_touch(ext, s // B, -(-stop[active] // B), level[active], below, block=block)
+    found = cb >= 0
+    active, cb = active[found], cb[found]
+    if not len(active):
+        return res
+
+    # refinar dentro del bloque encontrado
+    a = cb * B
+    z = np.minimum(a + B, stop[active])
+    sub = np.full(len(active), -1, dtype=np.int64)
+    _scan(values, a, z, level[active], below, sub, np.arange(len(active)), block=B)
+    res[active] = sub
+    return res
+
+
+def simulate_exits(
+    ohlc: pd.DataFrame,
+    entry_pos: np.ndarray,
+    entry_px: np.ndarray,
+    sl: np.ndarray,
+    tps: np.ndarray,
+    tp_fracs: Sequence[float] = (0.5, 0.25, 0.25),
+    exit_pos: Optional[np.ndarray] = None,
+    max_bars: Optional[int] = None,
+    fee_bps: float = 10.0,
+    slippage_bps: float = 2.0,
+) -> pd.DataFrame:
+    """
+    Salidas SL/TP para posiciones largas ya abiertas.
+
+    ohlc:      Open/High/Low/Close del símbolo ejecutado.
+    entry_pos: vela del fill de entrada (la búsqueda incluye esa vela).
+    entry_px:  precio de entrada (ya con slippage).
+    sl:        stop por posición. tps: matriz (posiciones, k) de TPs.
+    tp_fracs:  fracción de la posición que sale en cada TP (sum <= 1).
+    exit_pos:  vela de salida por señal (fill al Open), o -1 / None = sin salida por señal.
+    max_bars:  time stop (cierre al Close de entry_pos + max_bars).
+
+    Retorna un DataFrame por posición con, para cada tramo (tp1.., rest):
+    <tramo>_pos, <tramo>_price, <tramo>_reason (tp | sl | signal | end);
+    más ret (ponderado, neto de fees), exit_last_pos, bars_held y tp_hits.
+    """
+    o = ohlc["Open"].to_numpy(dtype=float)
+    h = ohlc["High"].to_numpy(dtype=float)
+    l = ohlc["Low"].to_numpy(dtype=float)
+    c = ohlc["Close"].to_numpy(dtype=float)
+    n = len(c)
+
+    entry_pos = np.asarray(entry_pos, dtype=np.int64)
+    entry_px = np.asarray(entry_px, dtype=float)
+    sl = np.asarray(sl, dtype=float)
+    tps = np.asarray(tps, dtype=float).reshape(len(entry_pos), -1)
+    fracs = np.asarray(tp_fracs, dtype=float)[: tps.shape[1]]
+    if fracs.sum() > 1.0 + 1e-9:
+        raise ValueError("tp_fracs no puede sumar más de 1.")
+    fee = float(fee_bps) / 1e4
+    slip = float(slippage_bps) / 1e4
+
+    # horizonte: [entry_pos, stop) — la vela de señal sale al Open, no cuenta su rango
+    stop = np.full(len(entry_pos), n, dtype=np.int64)
+    if exit_pos is not None:
+        ep = np.asarray(exit_pos, dtype=np.int64)
+        stop = np.where(ep >= 0, np.minimum(stop, ep), stop)
+    if max_bars is not None:
+        stop = np.minimum(stop, entry_pos + int(max_bars) + 1)
+    signal_exit = np.zeros(len(entry_pos), dtype=bool)
+    if exit_pos is not None:
+        signal_exit = (ep >= 0) & (ep < n) & (ep == stop)
+
+    t_sl = first_touch(l, entry_pos, stop, sl, below=True)
+    sl_fill = np.where(t_sl >= 0, np.minimum(sl, o[np.maximum(t_sl, 0)]), np.nan)
+
+    # fin sin toque: señal (Open de stop) o Close de la última vela del horizonte
+    end_pos = np.where(signal_exit, stop, np.minimum(stop, n) - 1)
+    end_px = np.where(signal_exit, o[np.minimum(stop, n - 1)], c[np.maximum(end_pos, 0)])
+    end_reason = np.where(signal_exit, "signal", "end")
+
+    out = {
+        "entry_pos": entry_pos,
+        "entry_price": entry_px,
+        "sl": sl,
+    }
+
+    ret = np.zeros(len(entry_pos))
+    last_exit = np.full(len(entry_pos), -1, dtype=np.int64)
+    tp_hits = np.zeros(len(entry_pos), dtype=np.int64)
+
+    def _tranche(name: str, frac: float, t_hit: np.ndarray, hit_px: np.ndarray):
+        nonlocal ret, last_exit
+        # SL gana si llega antes o en la misma vela (regla conservadora)
+        by_tp = (t_hit >= 0) & ((t_sl < 0) | (t_hit < t_sl))
+        by_sl = ~by_tp & (t_sl >= 0)
+
+        pos = np.where(by_tp, t_hit, np.where(by_sl, t_sl, end_pos))
+        raw = np.where(by_tp, hit_px, np.where(by_sl, sl_fill, end_px))
+        px = raw * (1.0 - slip)
+        reason = np.where(by_tp, "tp", np.where(by_sl, "sl", end_reason))
+
+        out[f"{name}_pos"] = pos
+        out[f"{name}_price"] = px
+        out[f"{name}_reason"] = reason
+
+        ret += frac * (px / entry_px * (1.0 - fee) ** 2 - 1.0)
+        last_exit = np.maximum(last_exit, pos)
+        return by_tp
+
+    for k in range(tps.shape[1]):
+        t_tp = first_touch(h, entry_pos, stop, tps[:, k], below=False)
+        tp_hits += _tranche(f"tp{k + 1}", float(fracs[k]) if k < len(fracs) else 0.0, t_tp, tps[:, k])
+
+    rest = 1.0 - float(fracs.sum())
+    no_tp = np.full(len(entry_pos), -1, dtype=np.int64)
+    _tranche("rest", rest, no_tp, np.full(len(entry_pos), np.nan))
+
+    out["ret"] = ret
+    out["exit_last_pos"] = last_exit
+    out["bars_held"] = last_exit - entry_pos
+    out["tp_hits"] = tp_hits
+    return pd.DataFrame(out, index=ohlc.index[entry_pos])
+
+
+def run_backtest_levels(
+    d: pd.DataFrame,
+    buy_ok: pd.Series,
+    exec_df: Optional[pd.DataFrame] = None,
+    rr_targets: List[float] = [1.0, 1.5, 1.75],
+    tp_fracs: Sequence[float] = (0.5, 0.25, 0.25),
+    sl_method: Literal["window", "fractal"] = "window",
+    window: int = 5, left: int = 2, right: int = 2, atr_k: float = 0.0,
+    use_signal_exit: bool = True,
+    max_bars: Optional[int] = None,
+    fee_bps: float = 10.0,
+    slippage_bps: float = 2.0,
+    capital_inicial: float = 1000.0,
+) -> Dict[str, Any]:
+    """
+    Igual que backtest.run_backtest (señal en vela i, fill al Open de i+1 del
+    símbolo de ejecución) pero saliendo por SL/TP de build_levels sobre el
+    OHLC de ejecución, con sell_raw como salida adicional si use_signal_exit.
+
+    Retorna {"trades", "equity" (por salida, escalonada), "stats"}.
+    """
+    src = d if exec_df is None else exec_df
+    ex = src[["Open", "High", "Low", "Close"]].reindex(d.index).apply(pd.to_numeric, errors="coerce")
+    ex["Close"] = ex["Close"].ffill()
+    ex["Open"] = ex["Open"].fillna(ex["Close"])
+    ex["High"] = ex["High"].fillna(ex[["Open", "Close"]].max(axis=1))
+    ex["Low"] = ex["Low"].fillna(ex[["Open", "Close"]].min(axis=1))
+    n = len(ex)
+
+    in_pos = sellraw_position(buy_ok.reindex(d.index).fillna(False), d["sell_raw"].fillna(False))
+    prev = np.concatenate(([False], in_pos[:-1]))
+    sig_entries = np.flatnonzero(in_pos & ~prev)
+    sig_exits = np.flatnonzero(~in_pos & prev)
+
+    keep = (sig_entries + 1 < n) & ~np.isnan(ex["Open"].to_numpy()[np.minimum(sig_entries + 1, n - 1)])
+    exit_fill = np.full(len(sig_entries), -1, dtype=np.int64)
+    exit_fill[: len(sig_exits)] = sig_exits + 1
+    sig_entries, exit_fill = sig_entries[keep], exit_fill[keep]
+
+    entry_fill = sig_entries + 1
+    entry_px = ex["Open"].to_numpy()[entry_fill] * (1.0 + float(slippage_bps) / 1e4)
+
+    lv = build_levels_batch(
+        ex, sig_entries, side="BUY", entry=entry_px, rr_targets=rr_targets,
+        sl_method=sl_method, window=window, left=left, right=right, atr_k=atr_k,
+    )
+    tps = lv[[f"tp{k}" for k in range(1, len(rr_targets) + 1)]].to_numpy()
+
+    res = simulate_exits(
+        ex, entry_fill, entry_px, lv["sl"].to_numpy(), tps,
+        tp_fracs=tp_fracs,
+        exit_pos=exit_fill if use_signal_exit else None,
+        max_bars=max_bars,
+        fee_bps=fee_bps, slippage_bps=slippage_bps,
+    )
+
+    # posiciones solapadas: la siguiente entrada solo si la anterior ya cerró
+    last = res["exit_last_pos"].to_numpy()
+    ok = np.ones(len(res), dtype=bool)
+    busy_until = -1
+    for i, (a, z) in enumerate(zip(entry_fill, last)):
+        if a <= busy_until:
+            ok[i] = False
+        else:
+            busy_until = z
+    res = res[ok]
+
+    ret = res["ret"].to_numpy()
+    equity_vals = np.full(n, np.nan)
+    equity_vals[res["exit_last_pos"].to_numpy()] = float(capital_inicial) * np.cumprod(1.0 + ret)
+    equity = pd.Series(equity_vals, index=d.index, name="equity").ffill().fillna(float(capital_inicial))
+
+    marks = np.zeros(n + 1, dtype=np.int64)
+    np.add.at(marks, res["entry_pos"].to_numpy(), 1)
+    np.add.at(marks, res["exit_last_pos"].to_numpy(), -1)
+    held = np.cumsum(marks[:n]) > 0
+
+    return {
+        "trades": res,
+        "equity": equity,
+        "stats": backtest_stats(ret, equity.to_numpy(), held, capital_inicial),
+    }
@@ -0,0 +1,120 @@
+# utils/feature_cache.py
+# ==========================================================
+# Cache de bloques de features (memoización)
+# ----------------------------------------------------------
+# Key = (bloque, huella de las columnas de entrada, parámetros del bloque)
+#   → si solo cambian parámetros de momentum, Structure sale del cache;
+#     si solo cambia Volume, solo se recalcula Structure.
+# Eviction LRU por memoria (bytes), thread-safe (Streamlit multi-sesión).
+# ==========================================================
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_MAX_MB = float(os.getenv("FEATURE_CACHE_MB", "512"))
+
+
+def data_fingerprint(df: pd.DataFrame, cols: Iterable[str]) -> str:
+    """
+    Hash (blake2b) del index + columnas dadas. Mismo contenido → misma huella,
+    sin importar si es otro objeto DataFrame.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    idx = df.index
+    if isinstance(idx, pd.DatetimeIndex):
+        h.update(idx.asi8.tobytes())
+    else:
+        h.update(np.asarray(idx).tobytes())
+
+    for c in cols:
+        h.update(c.encode())
+        h.update(np.ascontiguousarray(df[c].to_numpy(dtype=float)).tobytes())
+    return h.hexdigest()
+
+
+def _nbytes(value: Any) -> int:
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=False).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=False))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    return 64
+
+
+class FeatureCache:
+    """
+    Mapping LRU acotado por memoria. Compatible con el `cache=` de
+    build_features_winner (usa get / __setitem__).
+    """
+
+    def __init__(self, max_mb: float = DEFAULT_MAX_MB):
+        self.max_bytes = int(float(max_mb) * 1024 * 1024)
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sizes = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        with self._lock:
+            if key not in self._data:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return self._data[key]
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        size = _nbytes(value)
+        with self._lock:
+            if key in self._data:
+                self._bytes -= self._sizes.pop(key)
+                del self._data[key]
+
+            # un bloque más grande que todo el cache no se guarda
+            if size > self.max_bytes:
+                return
+
+            self._data[key] = value
+            self._sizes[key] = size
+            self._bytes += size
+
+            while self._bytes > self.max_bytes and self._data:
+                old_key, _ = self._data.popitem(last=False)
+                self._bytes -= self._sizes.pop(old_key)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self._bytes = 0
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._data),
+            "mb": round(self._bytes / (1024 * 1024), 2),
+            "max_mb": round(self.max_bytes / (1024 * 1024), 2),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
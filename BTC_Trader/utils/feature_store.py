@@ -0,0 +1,321 @@
+# utils/feature_store.py
+# ==========================================================
+# Store de features + señales Winner/Champion (incremental)
+# ----------------------------------------------------------
+# - Mantiene OHLCV + features + BUY/SELL ya calculados.
+# - update(ohlcv) solo procesa velas nuevas: recalcula la cola
+#   mínima (lookback de todas las ventanas) y agrega las filas nuevas;
+#   la state machine sellraw continúa desde el último estado.
+# - Thread-safe: en Streamlit vive en st.cache_resource y lo
+#   comparten todas las sesiones; el render solo lee snapshot().
+# - update_many: varios símbolos (un store por símbolo) en paralelo.
+# - save_snapshot / load_snapshot: cola mínima + estado de posición en
+#   un .npz compacto para arrancar en caliente (bot por cron). Solo se
+#   usa si coincide con la config y con las velas actuales.
+# Solo I/O: los snapshots .npz.
+# ==========================================================
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from .strategy_winner_champion import (
+    P_DEFAULT,
+    CFG_DEFAULT,
+    build_features_winner,
+    buy_signal_champion,
+    sellraw_position,
+)
+
+OHLCV_COLS = ["Open", "High", "Low", "Close", "Volume"]
+
+# subir si cambia el formato del snapshot o el cálculo de features
+SNAPSHOT_VERSION = 2
+
+
+def lookback_bars(P: Dict[str, Any], cfg: Dict[str, Any]) -> int:
+    """
+    Velas previas necesarias para que la última fila de la cola sea igual a un
+    recálculo completo (suma de las ventanas encadenadas + margen).
+    Ojo: el Volume con ffill (vol_z) tiene memoria no acotada; eso NO lo cubre
+    el lookback sino la columna vol_ffill (ver FeatureStore.update).
+    """
+    wins = [
+        P["mom_win"], P["speed_win"], P["accel_win"], P["z_win"],
+        cfg["ENERGY_ZWIN"], cfg["STRUCT_ZWIN"], cfg["STRUCT_WIN"], cfg["DON_WIN"],
+        cfg["ENTRY_N_DOWN"],
+    ]
+    return int(sum(int(w) for w in wins)) + 16
+
+
+def config_hash(P: Dict[str, Any], cfg: Dict[str, Any]) -> str:
+    raw = json.dumps({"P": P, "cfg": cfg}, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+
+def snapshot_path_for(state_path: str) -> Path:
+    """Snapshot junto al archivo de estado: estado.json → estado.features.npz."""
+    p = Path(state_path)
+    return p.with_name(p.stem + ".features.npz")
+
+
+class FeatureStore:
+    """
+    Features/señales de un símbolo, actualizadas vela a vela.
+
+        store = FeatureStore()
+        store.update(ohlcv)            # ohlcv: Open..Volume indexado por tiempo
+        frame, meta = store.snapshot()
+    """
+
+    def __init__(
+        self,
+        P: Optional[Dict[str, Any]] = None,
+        cfg: Optional[Dict[str, Any]] = None,
+        max_rows: int = 5000,
+    ):
+        self.P = dict(P or P_DEFAULT)
+        self.cfg = dict(CFG_DEFAULT, **(cfg or {}))
+        self.max_rows = int(max_rows)
+        self.lookback = lookback_bars(self.P, self.cfg)
+
+        self._frame: Optional[pd.DataFrame] = None
+        self._in_pos = False
+        self.version = 0
+        self.updated_at: Optional[pd.Timestamp] = None
+        self._lock = threading.Lock()
+
+    # ---------- cálculo ----------
+    def _compute(self, ohlcv: pd.DataFrame) -> pd.DataFrame:
+        cfg = self.cfg
+        d = build_features_winner(
+            ohlcv,
+            P=self.P,
+            ENERGY_ZWIN=cfg["ENERGY_ZWIN"],
+            STRUCT_ZWIN=cfg["STRUCT_ZWIN"],
+            STRUCT_WIN=cfg["STRUCT_WIN"],
+            DON_WIN=cfg["DON_WIN"],
+        )
+        d["buy_ok"] = buy_signal_champion(
+            d,
+            P=self.P,
+            ENTRY_ZENERGY_MIN=cfg["ENTRY_ZENERGY_MIN"],
+            ENTRY_K_STRUCT=cfg["ENTRY_K_STRUCT"],
+            ENTRY_USE_ASYM=cfg["ENTRY_USE_ASYM"],
+            ENTRY_N_DOWN=cfg["ENTRY_N_DOWN"],
+        )
+        # volumen "efectivo" de vol_z (0 → último volumen válido): se guarda para
+        # sembrar la cola en update() sin depender de cuánto historial hay
+        d["vol_ffill"] = ohlcv["Volume"].replace(0, np.nan).ffill().fillna(0.0)
+        return d
+
+    def _with_signals(self, d: pd.DataFrame, initial: bool) -> pd.DataFrame:
+        in_pos = sellraw_position(d["buy_ok"], d["sell_raw"].fillna(False), initial=initial)
+        prev = np.concatenate(([initial], in_pos[:-1]))
+        d["in_position"] = in_pos
+        d["BUY"] = in_pos & ~prev
+        d["SELL"] = ~in_pos & prev
+        return d
+
+    def _rebuild(self, ohlcv: pd.DataFrame) -> None:
+        d = self._with_signals(self._compute(ohlcv), False)
+        self._frame = d.tail(self.max_rows)
+        self._in_pos = bool(d["in_position"].iloc[-1]) if len(d) else False
+
+    # ---------- API ----------
+    def update(self, ohlcv: pd.DataFrame) -> int:
+        """
+        Incorpora velas nuevas (index > última guardada). Retorna # filas agregadas.
+        Si la fuente no se solapa con lo guardado (hueco), recalcula todo.
+        """
+        src = ohlcv[OHLCV_COLS]
+        if src.empty:
+            return 0
+
+        with self._lock:
+            if self._frame is None or src.index[0] > self._frame.index[-1]:
+                self._rebuild(src)
+                added = len(self._frame)
+            else:
+                new = src[src.index > self._frame.index[-1]]
+                if new.empty:
+                    return 0
+
+                # la cola guardada entra con su volumen ya ffilleado: una racha de
+                # volumen 0 más larga que el lookback sigue arrastrando el último
+                # volumen válido, igual que en un recálculo completo
+                stored = self._frame.tail(self.lookback)
+                seeded = stored[OHLCV_COLS].assign(Volume=stored["vol_ffill"])
+                hist = pd.concat([seeded, new])
+                tail = self._compute(hist).iloc[-len(new):].copy()
+                tail = self._with_signals(tail, self._in_pos)
+
+                self._frame = pd.concat([self._frame, tail]).tail(self.max_rows)
+                self._in_pos = bool(tail["in_position"].iloc[-1])
+                added = len(new)
+
+            self.version += 1
+            self.updated_at = pd.Timestamp.now(tz="UTC")
+            return added
+
+    # ---------- warm start ----------
+    def save_snapshot(self, path) -> bool:
+        """
+        Guarda la cola mínima (lookback filas con features/señales) + estado de
+        posición en .npz (escritura atómica). Retorna False si no hay nada que guardar.
+        """
+        with self._lock:
+            frame = self._frame
+            if frame is None or frame.empty:
+                return False
+            tail = frame.tail(self.lookback)
+            idx = pd.DatetimeIndex(tail.index)
+            meta = {
+                "version": SNAPSHOT_VERSION,
+                "config": config_hash(self.P, self.cfg),
+                "in_pos": bool(self._in_pos),
+                "tz": None if idx.tz is None else str(idx.tz),
+                "index_name": idx.name,
+                "saved_at": pd.Timestamp.now(tz="UTC").isoformat(),
+            }
+            cols = list(tail.columns)
+            bool_cols = [c for c in cols if tail[c].dtype == bool]
+            values = tail.to_numpy(dtype=float, na_value=np.nan)
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                ts=idx.asi8,
+                values=values,
+                cols=np.array(cols, dtype=str),
+                bool_cols=np.array(bool_cols, dtype=str),
+                meta=np.array(json.dumps(meta)),
+            )
+        os.replace(tmp, path)
+        return True
+
+    def load_snapshot(self, path, candles: Optional[pd.DataFrame] = None, rtol: float = 1e-9) -> Dict[str, Any]:
+        """
+        Restaura un snapshot si es válido. Retorna {"ok": bool, "reason": str, "rows": int}.
+
+        Se descarta (el próximo update recalcula todo) si:
+          - no existe / no se puede leer / versión o config distinta
+          - candles (la fuente actual) ya no contiene la última vela del snapshot
+            (snapshot viejo) o sus OHLCV no coinciden en el tramo común
+        """
+        path = Path(path)
+        if not path.exists():
+            return {"ok": False, "reason": "NO_SNAPSHOT", "rows": 0}
+
+        try:
+            with np.load(path, allow_pickle=False) as z:
+                meta = json.loads(str(z["meta"]))
+                cols = [str(c) for c in z["cols"]]
+                bool_cols = {str(c) for c in z["bool_cols"]}
+                values = z["values"]
+                ts = z["ts"]
+        except Exception as e:
+            return {"ok": False, "reason": f"UNREADABLE: {e}", "rows": 0}
+
+        if meta.get("version") != SNAPSHOT_VERSION:
+            return {"ok": False, "reason": "VERSION_MISMATCH", "rows": 0}
+        if meta.get("config") != config_hash(self.P, self.cfg):
+            return {"ok": False, "reason": "CONFIG_MISMATCH", "rows": 0}
+        if len(ts) < self.lookback:
+            return {"ok": False, "reason": "SHORT_SNAPSHOT", "rows": 0}
+
+        idx = pd.to_datetime(ts, utc=True)
+        idx = idx.tz_localize(None) if meta.get("tz") is None else idx.tz_convert(meta["tz"])
+        frame = pd.DataFrame(values, index=pd.DatetimeIndex(idx, name=meta.get("index_name")), columns=cols)
+        for c in bool_cols:
+            frame[c] = frame[c].fillna(0).astype(bool)
+
+        if candles is not None:
+            reason = _snapshot_mismatch(frame, candles, rtol)
+            if reason:
+                return {"ok": False, "reason": reason, "rows": 0}
+
+        with self._lock:
+            self._frame = frame
+            self._in_pos = bool(meta.get("in_pos", False))
+        return {"ok": True, "reason": "OK", "rows": len(frame)}
+
+    def mismatch(self, candles: pd.DataFrame, rtol: float = 1e-9) -> Optional[str]:
+        """
+        None si la cola guardada sigue cuadrando con `candles` (misma validación
+        que load_snapshot); si no, el motivo. Útil para procesos largos cuando la
+        fuente pudo reescribir velas (fix de gaps).
+        """
+        with self._lock:
+            frame = self._frame
+        if frame is None or frame.empty:
+            return "EMPTY"
+        return _snapshot_mismatch(frame.tail(self.lookback), candles, rtol)
+
+    def snapshot(self):
+        """(frame, meta). El frame no se modifica en el lugar: tratarlo como read-only."""
+        with self._lock:
+            frame = self._frame
+            meta = {
+                "version": self.version,
+                "updated_at": self.updated_at,
+                "last_ts": frame.index[-1] if frame is not None and len(frame) else None,
+                "rows": 0 if frame is None else len(frame),
+            }
+        return frame, meta
+
+
+def _snapshot_mismatch(frame: pd.DataFrame, candles: pd.DataFrame, rtol: float) -> Optional[str]:
+    """None si el snapshot es consistente con las velas actuales; si no, el motivo."""
+    if candles.empty or frame.index[-1] not in candles.index:
+        return "STALE_SNAPSHOT"
+    common = frame.index.intersection(candles.index)
+    if len(common) < len(frame):
+        return "CANDLE_GAP"
+    a = frame.loc[common, OHLCV_COLS].to_numpy(dtype=float)
+    b = candles.loc[common, OHLCV_COLS].to_numpy(dtype=float)
+    if not np.allclose(a, b, rtol=rtol, atol=0.0, equal_nan=True):
+        return "CANDLE_MISMATCH"
+    return None
+
+
+def update_many(
+    stores: Dict[str, FeatureStore],
+    frames: Dict[str, pd.DataFrame],
+    prep: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None,
+    max_workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Actualiza un store por símbolo en paralelo (hilos: numpy/pandas sueltan el GIL
+    en los kernels pesados). prep: normalización opcional del DF crudo.
+    Retorna {symbol: filas agregadas | excepción}; un símbolo con error no frena a los demás.
+    """
+    jobs = {s: df for s, df in frames.items() if s in stores and df is not None and len(df)}
+    if not jobs:
+        return {}
+
+    def _one(symbol: str):
+        df = jobs[symbol]
+        return stores[symbol].update(prep(df) if prep is not None else df)
+
+    out: Dict[str, Any] = {}
+    with ThreadPoolExecutor(max_workers=max_workers or len(jobs)) as ex:
+        futs = {s: ex.submit(_one, s) for s in jobs}
+        for s, f in futs.items():
+            try:
+                out[s] = f.result()
+            except Exception as e:
+                out[s] = e
+    return out
@@ -1,14 +1,26 @@
 import os
 import json
-import gspread
-from google.oauth2.service_account import Credentials
+
+# gspread / google-auth se importan en get_gsheet_client() (import pesado):
+# los entry points que no tocan Sheets (o aún no) no pagan ese costo.
+
+# Cliente cacheado por proceso: en modo daemon / Streamlit se autoriza una
+# sola vez (gspread renueva el token solo). fresh=True fuerza re-autorizar.
+_client = None
 
 # === Cargar credenciales del environment ===
-def get_gsheet_client():
+def get_gsheet_client(fresh: bool = False):
+    global _client
+    if _client is not None and not fresh:
+        return _client
+
     raw_json = os.getenv("GOOGLE_SERVICE_ACCOUNT_JSON")
     if not raw_json:
         raise RuntimeError("❌ GOOGLE_SERVICE_ACCOUNT_JSON no está configurado en Railway.")
 
+    import gspread
+    from google.oauth2.service_account import Credentials
+
     info = json.loads(raw_json)
 
     scopes = [
@@ -17,5 +29,5 @@ def get_gsheet_client():
     ]
 
     creds = Credentials.from_service_account_info(info, scopes=scopes)
-    client = gspread.authorize(creds)
-    return client
+    _client = gspread.authorize(creds)
+    return _client
@@ -1,17 +1,57 @@
 # --- utils/indicators.py ---
 # Cálculo de EMAs, MACD, RSI y Stochastic RSI
+import math
+from collections import deque
+
 import numpy as np
 import pandas as pd
 
-def calculate_stochastic_rsi(df, rsi_length=14, stoch_length=14, k_period=3, d_period=3):
-    delta = df['Close'].diff()
+from .rolling_median import rolling_median_series
+from .signal_postprocessing import deduplicar_señales
+
+# --- Códigos de señal (int8) ---
+# Las señales se guardan como códigos compactos; para consumidores que
+# comparan contra strings ('BUY', 'MACD Cross', ...) se exponen como
+# pd.Categorical (1 byte/fila, `== 'BUY'` e `isin` siguen funcionando).
+SIGNAL_SELL = np.int8(-1)
+SIGNAL_NONE = np.int8(0)
+SIGNAL_BUY = np.int8(1)
+_SIGNAL_CATS = ['SELL', 'BUY']
+
+MACD_COMP_CATS = ['Signal', 'MACD']                                   # 0 / 1
+CROSS_CHECK_CATS = ['Signal', 'MACD', 'Signal Cross', 'MACD Cross']   # comp + 2 * cruce
+
+def señales_a_categoria(codes):
+    """int8 (-1/0/1) → Categorical ['SELL', 'BUY'] con NaN donde no hay señal."""
+    codes = np.asarray(codes, dtype=np.int8)
+    cat_codes = np.where(codes == SIGNAL_BUY, 1, np.where(codes == SIGNAL_SELL, 0, -1))
+    return pd.Categorical.from_codes(cat_codes.astype(np.int8), categories=_SIGNAL_CATS)
+
+def señales_a_texto(codes):
+    """Vista object (None/'BUY'/'SELL') para código que necesite strings puros."""
+    codes = np.asarray(codes, dtype=np.int8)
+    out = np.full(len(codes), None, dtype=object)
+    out[codes == SIGNAL_BUY] = 'BUY'
+    out[codes == SIGNAL_SELL] = 'SELL'
+    return out
+
+def _rsi_sma(close, length=14):
+    # RSI con medias simples (no Wilder), igual que el cálculo original
+    delta = close.diff()
     gain = delta.where(delta > 0, 0)
     loss = -delta.where(delta < 0, 0)
-    avg_gain = gain.rolling(window=rsi_length, min_periods=rsi_length).mean()
-    avg_loss = loss.rolling(window=rsi_length, min_periods=rsi_length).mean()
+    avg_gain = gain.rolling(window=length, min_periods=length).mean()
+    avg_loss = loss.rolling(window=length, min_periods=length).mean()
     rs = avg_gain / avg_loss
-    rsi = 100 - (100 / (1 + rs))
-    stoch_rsi = (rsi - rsi.rolling(window=stoch_length).min()) / (rsi.rolling(window=stoch_length).max() - rsi.rolling(window=stoch_length).min())
+    return 100 - (100 / (1 + rs))
+
+def calculate_stochastic_rsi(df, rsi_length=14, stoch_length=14, k_period=3, d_period=3, rsi=None):
+    # rsi: serie ya calculada (p.ej. df['RSI'] de calculate_indicators) para no recalcularla
+    if rsi is None:
+        rsi = _rsi_sma(df['Close'], rsi_length)
+    rsi_min = rsi.rolling(window=stoch_length).min()
+    rsi_max = rsi.rolling(window=stoch_length).max()
+    stoch_rsi = (rsi - rsi_min) / (rsi_max - rsi_min)
     df['%K'] = stoch_rsi.rolling(window=k_period).mean() * 100
     df['%D'] = df['%K'].rolling(window=d_period).mean()
     return df
@@ -26,17 +66,13 @@ def calculate_indicators(df):
     df['MACD'] = df['EMA_12'] - df['EMA_26']
     df['Signal_Line'] = df['MACD'].ewm(span=9, adjust=False).mean()
     df['Histogram'] = df['MACD'] - df['Signal_Line']
-    delta = df['Close'].diff()
-    gain = delta.where(delta > 0, 0)
-    loss = -delta.where(delta < 0, 0)
-    avg_gain = gain.rolling(window=14).mean()
-    avg_loss = loss.rolling(window=14).mean()
-    rs = avg_gain / avg_loss
-    df['RSI'] = 100 - (100 / (1 + rs))
-    df = calculate_stochastic_rsi(df)
-    df['MACD Comp'] = np.where(df['MACD'] > df['Signal_Line'], 'MACD', 'Signal')
-    df['Cross Check'] = df['MACD Comp'] != df['MACD Comp'].shift(1)
-    df['Cross Check'] = np.where(df['Cross Check'], df['MACD Comp'] + " Cross", df['MACD Comp'])
+    df['RSI'] = _rsi_sma(df['Close'], 14)
+    df = calculate_stochastic_rsi(df, rsi=df['RSI'])
+    comp = (df['MACD'] > df['Signal_Line']).to_numpy(dtype=np.int8)
+    cruce = np.ones(len(comp), dtype=np.int8)
+    cruce[1:] = comp[1:] != comp[:-1]
+    df['MACD Comp'] = pd.Categorical.from_codes(comp, categories=MACD_COMP_CATS)
+    df['Cross Check'] = pd.Categorical.from_codes(comp + 2 * cruce, categories=CROSS_CHECK_CATS)
     df['EMA20 Check'] = (df['Close'] > df['EMA20']).astype(int)
     df['EMA50 Check'] = (df['Close'] > df['EMA50']).astype(int)
     df['EMA 200 Check'] = (df['Close'] > df['EMA200']).astype(int)
@@ -90,11 +126,11 @@ def calcular_momentum_fisico_speed(
 
     # 2) Speed (derivada de mom_smooth)
     df["speed"] = df["mom_smooth"].diff()
-    df["speed_smooth"] = df["speed"].rolling(speed_win, min_periods=1).median()
+    df["speed_smooth"] = rolling_median_series(df["speed"], speed_win, min_periods=1)
 
     # 3) Acceleration
     df["accel"] = df["speed_smooth"].diff()
-    df["accel_smooth"] = df["accel"].rolling(accel_win, min_periods=1).median()
+    df["accel_smooth"] = rolling_median_series(df["accel"], accel_win, min_periods=1)
 
     # 4) Z-scores
     std_speed = df["speed_smooth"].rolling(30).std().replace(0, np.nan)
@@ -103,38 +139,178 @@ def calcular_momentum_fisico_speed(
     df["zspeed"] = (df["speed_smooth"] / std_speed).fillna(0)
     df["zaccel"] = (df["accel_smooth"] / std_accel).fillna(0)
 
-    # 5) Señales iniciales
-    df["Momentum Signal"] = None
+    # 5) Señales iniciales (int8: 1 BUY, -1 SELL, 0 nada; SELL pisa a BUY como antes)
+    zs = df["zspeed"].to_numpy()
+    za = df["zaccel"].to_numpy()
+    code = np.zeros(len(df), dtype=np.int8)
+    code[(zs > zspeed_min) & (za > zaccel_min)] = SIGNAL_BUY
+    code[(zs < -zspeed_min) & (za < -zaccel_min)] = SIGNAL_SELL
 
-    df.loc[
-        (df["zspeed"] > zspeed_min) & (df["zaccel"] > zaccel_min),
-        "Momentum Signal"
-    ] = "BUY"
+    # 6) Limpiar señales consecutivas ("BUY BUY BUY" → solo 1)
+    final = deduplicar_señales(code, vacio=SIGNAL_NONE)
 
-    df.loc[
-        (df["zspeed"] < -zspeed_min) & (df["zaccel"] < -zaccel_min),
-        "Momentum Signal"
-    ] = "SELL"
+    df["Momentum Code"] = code
+    df["Signal Final Code"] = final
+    df["Momentum Signal"] = señales_a_categoria(code)
+    df["Signal Final"] = señales_a_categoria(final)
 
-    # 6) Limpiar señales consecutivas ("BUY BUY BUY" → solo 1)
-    df["Signal Final"] = None
-    last_signal = None
+    return df
+
+# --- Motor incremental (streaming) de calculate_indicators ---
+# Misma definición que la versión pandas, pero O(1) por vela:
+#   - EMAs: recurrencia adjust=False (y = y_prev + a * (x - y_prev))
+#   - RSI: sumas móviles de gain/loss (ventana simple, no Wilder)
+#   - Stoch RSI: min/max con deques monotónicas + medias cortas %K/%D
+# Asume Close sin NaN (ya viene limpio de Sheets/Binance).
 
-    signals = []
+class _RollingMean:
+    """Media móvil de ventana fija; NaN si la ventana no está llena o contiene NaN."""
 
-    for sig in df["Momentum Signal"]:
-        if sig != last_signal:
-            signals.append(sig)
-            last_signal = sig
+    def __init__(self, window):
+        self.window = window
+        self.buf = deque(maxlen=window)
+        self.total = 0.0
+        self.n_nan = 0
+        self.n_nonzero = 0
+
+    def update(self, x):
+        if len(self.buf) == self.window:
+            old = self.buf[0]
+            if math.isnan(old):
+                self.n_nan -= 1
+            else:
+                self.total -= old
+                if old != 0:
+                    self.n_nonzero -= 1
+        self.buf.append(x)
+        if math.isnan(x):
+            self.n_nan += 1
         else:
-            signals.append(None)
+            self.total += x
+            if x != 0:
+                self.n_nonzero += 1
 
-    df["Signal Final"] = signals
+        if len(self.buf) < self.window or self.n_nan:
+            return np.nan
+        # ventana de ceros exactos → 0 exacto (sin residuo de las restas)
+        if self.n_nonzero == 0:
+            self.total = 0.0
+        return self.total / self.window
 
-    return df
 
+class _RollingExtrema:
+    """Min y max de ventana fija con deques monotónicas; NaN si la ventana tiene NaN."""
+
+    def __init__(self, window):
+        self.window = window
+        self.i = -1
+        self.last_nan = -1
+        self.qmin = deque()
+        self.qmax = deque()
+
+    def update(self, x):
+        self.i += 1
+        i, w = self.i, self.window
 
+        if math.isnan(x):
+            self.last_nan = i
+        else:
+            while self.qmin and self.qmin[-1][1] >= x:
+                self.qmin.pop()
+            self.qmin.append((i, x))
+            while self.qmax and self.qmax[-1][1] <= x:
+                self.qmax.pop()
+            self.qmax.append((i, x))
+
+        while self.qmin and self.qmin[0][0] <= i - w:
+            self.qmin.popleft()
+        while self.qmax and self.qmax[0][0] <= i - w:
+            self.qmax.popleft()
+
+        if i + 1 < w or i - self.last_nan < w:
+            return np.nan, np.nan
+        return self.qmin[0][1], self.qmax[0][1]
+
+
+class IndicatorStream:
+    """
+    Versión incremental de calculate_indicators (columnas numéricas).
+
+    Uso:
+        stream = IndicatorStream.from_frame(df_hist)   # warm start
+        vals = stream.update(close_nuevo)             # dict con EMA20, MACD, RSI, %K, ...
+    """
+
+    EMA_SPANS = {"EMA20": 20, "EMA50": 50, "EMA200": 200, "EMA_12": 12, "EMA_26": 26}
+
+    def __init__(self, rsi_length=14, stoch_length=14, k_period=3, d_period=3, signal_span=9):
+        self._alpha = {k: 2.0 / (span + 1.0) for k, span in self.EMA_SPANS.items()}
+        self._alpha_signal = 2.0 / (signal_span + 1.0)
+        self._ema = {}
+        self._signal = None
+        self._prev_close = None
+
+        self._avg_gain = _RollingMean(rsi_length)
+        self._avg_loss = _RollingMean(rsi_length)
+        self._rsi_ext = _RollingExtrema(stoch_length)
+        self._k = _RollingMean(k_period)
+        self._d = _RollingMean(d_period)
+
+        self.n = 0
+        self.last = {}
+
+    def _ema_step(self, key, x):
+        prev = self._ema.get(key)
+        y = x if prev is None else prev + self._alpha[key] * (x - prev)
+        self._ema[key] = y
+        return y
+
+    def update(self, close):
+        close = float(close)
+        out = {"Close": close}
+
+        for key in self.EMA_SPANS:
+            out[key] = self._ema_step(key, close)
+
+        macd = out["EMA_12"] - out["EMA_26"]
+        self._signal = macd if self._signal is None else self._signal + self._alpha_signal * (macd - self._signal)
+        out["MACD"] = macd
+        out["Signal_Line"] = self._signal
+        out["Histogram"] = macd - self._signal
+
+        # RSI (la primera vela entra con gain = loss = 0, como diff() + where)
+        delta = 0.0 if self._prev_close is None else close - self._prev_close
+        self._prev_close = close
+        avg_gain = self._avg_gain.update(delta if delta > 0 else 0.0)
+        avg_loss = self._avg_loss.update(-delta if delta < 0 else 0.0)
+        out["RSI"] = _rsi_from_avgs(avg_gain, avg_loss)
+
+        # Stochastic RSI
+        rsi_min, rsi_max = self._rsi_ext.update(out["RSI"])
+        rango = rsi_max - rsi_min
+        if math.isnan(rango) or rango == 0:
+            stoch = np.nan
+        else:
+            stoch = (out["RSI"] - rsi_min) / rango
+        out["%K"] = self._k.update(stoch) * 100
+        out["%D"] = self._d.update(out["%K"])
 
+        self.n += 1
+        self.last = out
+        return out
 
+    @classmethod
+    def from_frame(cls, df, **kwargs):
+        stream = cls(**kwargs)
+        for c in pd.to_numeric(df['Close'], errors='coerce').to_numpy(dtype=float):
+            stream.update(c)
+        return stream
 
 
+def _rsi_from_avgs(avg_gain, avg_loss):
+    # misma aritmética que pandas: rs = g / l (inf si l == 0, NaN si ambos 0)
+    if math.isnan(avg_gain) or math.isnan(avg_loss):
+        return np.nan
+    if avg_loss == 0:
+        return np.nan if avg_gain == 0 else 100.0
+    return 100 - (100 / (1 + avg_gain / avg_loss))
@@ -0,0 +1,328 @@
+# utils/kline_cache.py
+# ==========================================================
+# Cache en disco (read-through) de klines YA CERRADAS
+# ----------------------------------------------------------
+# - Una vela cerrada no cambia nunca → se guarda una sola vez.
+# - Layout: <root>/<SYMBOL>/<interval>/<block>.npy
+#     block = open_ms // (interval_ms * BLOCK_BARS)
+#   cada bloque es un array estructurado numpy (int64 tiempos,
+#   float64 precios/volúmenes) → binario compacto, sin pickle.
+# - coverage.json: rangos [start_ms, end_ms) ya consultados a Binance
+#   → solo se baja lo que NO está cubierto. Huecos internos del exchange
+#   quedan cubiertos; una cola sin velas (antes del listing, caída,
+#   fetch cortado) NO, y se vuelve a pedir en el próximo read-through.
+# - La vela en curso (y las del último margen de seguridad) nunca se
+#   guardan: se devuelven frescas pero no se cachean.
+# - Escrituras atómicas (tmp único por escritor + rename). Un bloque
+#   ilegible se borra y su span se descuenta de coverage.json → se
+#   vuelve a bajar en vez de romper el fetch (o perderse).
+#
+# Config por env:
+#   KLINE_CACHE            true/false (default true)
+#   KLINE_CACHE_DIR        default ~/.cache/btc_trader/klines
+#   KLINE_CACHE_SAFETY_MS  margen antes de considerar cerrada una vela (default 60000)
+# ==========================================================
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+KLINE_CACHE = os.getenv("KLINE_CACHE", "true").lower() == "true"
+KLINE_CACHE_DIR = os.getenv("KLINE_CACHE_DIR") or os.path.join(
+    os.path.expanduser("~"), ".cache", "btc_trader", "klines"
+)
+KLINE_CACHE_SAFETY_MS = int(os.getenv("KLINE_CACHE_SAFETY_MS", "60000"))
+
+BLOCK_BARS = 1000
+
+INTERVAL_MS: Dict[str, int] = {
+    "1m": 60_000,
+    "5m": 5 * 60_000,
+    "15m": 15 * 60_000,
+    "1h": 60 * 60_000,
+    "4h": 4 * 60 * 60_000,
+    "1d": 24 * 60 * 60_000,
+}
+
+# mismas 11 columnas útiles del kline REST (sin "Ignore")
+KLINE_DTYPE = np.dtype([
+    ("open_ms", "<i8"),
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("volume", "<f8"),
+    ("close_ms", "<i8"),
+    ("quote_volume", "<f8"),
+    ("trades", "<i8"),
+    ("taker_base", "<f8"),
+    ("taker_quote", "<f8"),
+])
+
+Range = Tuple[int, int]
+
+
+# ----------------------------------------------------------
+# Helpers
+# ----------------------------------------------------------
+
+def decode_klines(raw: Sequence[Sequence]) -> np.ndarray:
+    """
+    Klines REST crudas (listas de 12 campos, precios como string) → array
+    estructurado tipado, ordenado por open_ms. Una pasada por columna
+    (np.fromiter), sin DataFrame de objetos intermedio.
+    """
+    n = 0 if raw is None else len(raw)
+    out = np.empty(n, dtype=KLINE_DTYPE)
+    if n == 0:
+        return out
+    cols = list(zip(*raw))
+    for j, name in enumerate(KLINE_DTYPE.names):
+        conv = int if KLINE_DTYPE[name].kind == "i" else float
+        out[name] = np.fromiter(map(conv, cols[j]), dtype=KLINE_DTYPE[name], count=n)
+    if n > 1 and (np.diff(out["open_ms"]) < 0).any():
+        out.sort(order="open_ms", kind="stable")
+    return out
+
+
+def merge_klines(*arrays: np.ndarray) -> np.ndarray:
+    """Une arrays de klines; a igual open_ms gana el ÚLTIMO array. Ordenado."""
+    arrays = [a for a in arrays if a is not None and len(a)]
+    if not arrays:
+        return np.empty(0, dtype=KLINE_DTYPE)
+    allk = np.concatenate(arrays)
+    # último gana: invertir, quedarse con la primera aparición
+    rev = allk[::-1]
+    _, first = np.unique(rev["open_ms"], return_index=True)
+    return rev[first]  # np.unique ya ordena por open_ms
+
+
+def merge_ranges(ranges: List[Range]) -> List[Range]:
+    out: List[List[int]] = []
+    for a, b in sorted(ranges):
+        if b <= a:
+            continue
+        if out and a <= out[-1][1]:
+            out[-1][1] = max(out[-1][1], b)
+        else:
+            out.append([a, b])
+    return [(a, b) for a, b in out]
+
+
+def subtract_ranges(start: int, end: int, covered: List[Range]) -> List[Range]:
+    """[start, end) menos los rangos cubiertos (ya mergeados)."""
+    out, cur = [], start
+    for a, b in covered:
+        if b <= cur:
+            continue
+        if a >= end:
+            break
+        if a > cur:
+            out.append((cur, a))
+        cur = max(cur, b)
+    if cur < end:
+        out.append((cur, end))
+    return out
+
+
+def closed_end_ms(interval_ms: int, now_ms: Optional[int] = None) -> int:
+    """Velas con open < este límite están cerradas (con margen de seguridad)."""
+    now_ms = int(time.time() * 1000) if now_ms is None else int(now_ms)
+    return ((now_ms - KLINE_CACHE_SAFETY_MS) // interval_ms) * interval_ms
+
+
+def _atomic_write(path: Path, write_fn: Callable) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # tmp único: cron y daemon pueden escribir el mismo bloque a la vez
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write_fn(f)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+# ----------------------------------------------------------
+# Cache
+# ----------------------------------------------------------
+
+class KlineCache:
+    def __init__(self, root: str = KLINE_CACHE_DIR, block_bars: int = BLOCK_BARS):
+        self.root = Path(root)
+        self.block_bars = int(block_bars)
+        # reentrante: un bloque ilegible se invalida también desde write()
+        self._lock = threading.RLock()
+
+    # ---------- paths ----------
+    def _dir(self, symbol: str, interval: str) -> Path:
+        return self.root / symbol.upper() / interval
+
+    def _block_span(self, interval: str) -> int:
+        return INTERVAL_MS[interval] * self.block_bars
+
+    # ---------- coverage ----------
+    def covered(self, symbol: str, interval: str) -> List[Range]:
+        p = self._dir(symbol, interval) / "coverage.json"
+        try:
+            with open(p) as f:
+                return merge_ranges([(int(a), int(b)) for a, b in json.load(f)])
+        except FileNotFoundError:
+            return []
+        except Exception as e:
+            print(f"[kline_cache] coverage ilegible ({p}), se ignora: {e}")
+            return []
+
+    def missing(self, symbol: str, interval: str, start_ms: int, end_ms: int) -> List[Range]:
+        return subtract_ranges(int(start_ms), int(end_ms), self.covered(symbol, interval))
+
+    def _save_coverage(self, symbol: str, interval: str, rangos: List[Range]) -> None:
+        data = json.dumps([list(r) for r in merge_ranges(rangos)]).encode()
+        _atomic_write(self._dir(symbol, interval) / "coverage.json", lambda f: f.write(data))
+
+    def _uncover(self, symbol: str, interval: str, start_ms: int, end_ms: int) -> None:
+        """Descuenta [start_ms, end_ms) de coverage.json (se vuelve a bajar)."""
+        with self._lock:
+            rangos = [
+                r for a, b in self.covered(symbol, interval)
+                for r in subtract_ranges(a, b, [(start_ms, end_ms)])
+            ]
+            self._save_coverage(symbol, interval, rangos)
+
+    # ---------- blocks ----------
+    def _read_block(self, symbol: str, interval: str, block: int) -> np.ndarray:
+        path = self._dir(symbol, interval) / f"{block}.npy"
+        try:
+            arr = np.load(path, allow_pickle=False)
+            if arr.dtype != KLINE_DTYPE:
+                raise ValueError(f"dtype inesperado {arr.dtype}")
+            return arr
+        except FileNotFoundError:
+            return np.empty(0, dtype=KLINE_DTYPE)
+        except Exception as e:
+            print(f"[kline_cache] bloque ilegible ({path}), se borra y se vuelve a bajar: {e}")
+            span = self._block_span(interval)
+            with self._lock:
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+                self._uncover(symbol, interval, block * span, (block + 1) * span)
+            return np.empty(0, dtype=KLINE_DTYPE)
+
+    def read(self, symbol: str, interval: str, start_ms: int, end_ms: int) -> np.ndarray:
+        """Velas cacheadas con start_ms <= open < end_ms (ordenadas)."""
+        span = self._block_span(interval)
+        blocks = [
+            self._read_block(symbol, interval, b)
+            for b in range(int(start_ms) // span, (int(end_ms) - 1) // span + 1)
+        ]
+        arr = merge_klines(*blocks)
+        o = arr["open_ms"]
+        return arr[(o >= start_ms) & (o < end_ms)]
+
+    def write(self, symbol: str, interval: str, arr: np.ndarray, covered: Optional[Range] = None) -> None:
+        """Mergea velas cerradas en sus bloques y marca `covered` como consultado."""
+        span = self._block_span(interval)
+        d = self._dir(symbol, interval)
+
+        with self._lock:
+            if arr is not None and len(arr):
+                bid = arr["open_ms"] // span
+                for b in np.unique(bid):
+                    path = d / f"{int(b)}.npy"
+                    merged = merge_klines(self._read_block(symbol, interval, int(b)), arr[bid == b])
+                    _atomic_write(path, lambda f: np.save(f, merged, allow_pickle=False))
+
+            if covered is not None and covered[1] > covered[0]:
+                self._save_coverage(symbol, interval, self.covered(symbol, interval) + [tuple(map(int, covered))])
+
+
+_cache: Optional[KlineCache] = None
+
+
+def get_kline_cache() -> Optional[KlineCache]:
+    """Cache global del proceso (None si KLINE_CACHE=false)."""
+    global _cache
+    if not KLINE_CACHE:
+        return None
+    if _cache is None:
+        _cache = KlineCache(KLINE_CACHE_DIR)
+    return _cache
+
+
+# ----------------------------------------------------------
+# Read-through
+# ----------------------------------------------------------
+
+def read_through(
+    symbol: str,
+    interval: str,
+    start_ms: int,
+    end_ms: int,
+    fetch_fn: Callable[[int, int], Sequence[Sequence]],
+    cache: Optional[KlineCache] = None,
+    now_ms: Optional[int] = None,
+) -> np.ndarray:
+    """
+    Velas con start_ms <= open < end_ms: lo cubierto sale del disco y SOLO
+    los rangos faltantes se piden con fetch_fn(a, b) (klines REST crudas).
+    Las velas cerradas descargadas se guardan; la vela en curso no.
+    Solo se marca como cubierto hasta la última vela recibida: una cola vacía
+    (símbolo aún no listado, caída del exchange, fetch cortado) se vuelve a pedir.
+    """
+    cache = cache if cache is not None else get_kline_cache()
+    iv = INTERVAL_MS[interval]
+    start_ms, end_ms = int(start_ms), int(end_ms)
+
+    if cache is None:
+        arr = decode_klines(fetch_fn(start_ms, end_ms))
+        o = arr["open_ms"]
+        return arr[(o >= start_ms) & (o < end_ms)]
+
+    try:
+        # primero read: un bloque ilegible se descuenta de coverage antes de missing
+        cached = cache.read(symbol, interval, start_ms, end_ms)
+        faltan = cache.missing(symbol, interval, start_ms, end_ms)
+    except Exception as e:
+        print(f"[kline_cache] {symbol} {interval}: cache no disponible ({e}), yendo a red")
+        faltan, cached = [(start_ms, end_ms)], np.empty(0, dtype=KLINE_DTYPE)
+
+    if not faltan:
+        return cached
+
+    limite = closed_end_ms(iv, now_ms)
+    frescos = []
+    for a, b in faltan:
+        arr = decode_klines(fetch_fn(a, b))
+        o = arr["open_ms"]
+        arr = arr[(o >= a) & (o < b)]
+        frescos.append(arr)
+
+        hasta = min(int(arr["open_ms"][-1]) + iv, b, limite) if len(arr) else a
+        try:
+            cache.write(
+                symbol, interval,
+                arr[arr["open_ms"] < limite],
+                covered=(a, hasta),
+            )
+        except Exception as e:
+            print(f"[kline_cache] {symbol} {interval}: no se pudo escribir cache: {e}")
+
+    print(
+        f"[kline_cache] {symbol} {interval}: {len(cached)} velas de cache, "
+        f"{sum(len(f) for f in frescos)} de red ({len(faltan)} rangos)"
+    )
+    return merge_klines(cached, *frescos)
@@ -0,0 +1,193 @@
+# utils/kline_dump_import.py
+# ==========================================================
+# Importador de dumps públicos de Binance (data.binance.vision)
+# ----------------------------------------------------------
+# - Lee ZIP/CSV mensuales o diarios de un directorio LOCAL
+#   (ej. BTCUSDT-5m-2024-01.zip, BTCUSDT-5m-2025-03-07.csv)
+#   → funciona offline, sin gastar request weight.
+# - Descompresión en streaming (zipfile.open) + pd.read_csv por
+#   chunks con dtypes fijos → sin parseo fila a fila.
+# - Timestamps: desde 2025 los dumps spot vienen en MICROsegundos;
+#   se detecta por magnitud y se normaliza a ms.
+# - Destino: el mismo KlineCache que usa binance_fetch, así backtests
+#   y gap repairs leen el histórico sin tocar la red.
+# - Frontera con lo bajado por REST: en solapes gana el dump (se
+#   reportan diferencias) y se listan los rangos que siguen faltando
+#   hasta la última vela cerrada (los completa el read-through).
+# ==========================================================
+
+from __future__ import annotations
+
+import re
+import zipfile
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .kline_cache import (
+    INTERVAL_MS,
+    KLINE_DTYPE,
+    KlineCache,
+    closed_end_ms,
+    get_kline_cache,
+)
+
+CHUNK_ROWS = 200_000
+
+# SYMBOL-INTERVAL-YYYY-MM[-DD].(zip|csv)
+_NAME_RE = re.compile(
+    r"^(?P<symbol>[A-Z0-9]+)-(?P<interval>\d+[smhdwM])-(?P<y>\d{4})-(?P<m>\d{2})(?:-(?P<d>\d{2}))?\.(?:zip|csv)$"
+)
+
+# CSV: mismas 12 columnas del REST; solo se leen las 11 útiles
+_CSV_DTYPES = {j: ("int64" if KLINE_DTYPE[n].kind == "i" else "float64")
+               for j, n in enumerate(KLINE_DTYPE.names)}
+
+
+def parse_dump_name(path) -> Optional[Dict[str, Any]]:
+    """Nombre del dump → {symbol, interval, start_ms, end_ms} (periodo del archivo)."""
+    m = _NAME_RE.match(Path(path).name)
+    if not m:
+        return None
+    y, mo, d = int(m["y"]), int(m["m"]), m["d"]
+    if d is None:
+        start = pd.Timestamp(year=y, month=mo, day=1, tz="UTC")
+        end = start + pd.offsets.MonthBegin(1)
+    else:
+        start = pd.Timestamp(year=y, month=mo, day=int(d), tz="UTC")
+        end = start + pd.Timedelta(days=1)
+    return {
+        "symbol": m["symbol"],
+        "interval": m["interval"],
+        "start_ms": int(start.value // 10**6),
+        "end_ms": int(end.value // 10**6),
+    }
+
+
+def list_dumps(directory, symbols=None, interval: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Dumps del directorio (recursivo), ordenados por símbolo y periodo."""
+    symbols = {s.upper() for s in symbols} if symbols else None
+    out = []
+    for p in Path(directory).rglob("*"):
+        info = parse_dump_name(p) if p.is_file() else None
+        if info is None:
+            continue
+        if symbols and info["symbol"] not in symbols:
+            continue
+        if interval and info["interval"] != interval:
+            continue
+        out.append({**info, "path": p})
+    return sorted(out, key=lambda x: (x["symbol"], x["interval"], x["start_ms"]))
+
+
+def _to_ms(t: np.ndarray) -> np.ndarray:
+    # ms de 2017..2100 < 1e13; µs > 1e15
+    return np.where(t > 10**14, t // 1000, t)
+
+
+def _frame_to_array(df: pd.DataFrame) -> np.ndarray:
+    out = np.empty(len(df), dtype=KLINE_DTYPE)
+    for j, name in enumerate(KLINE_DTYPE.names):
+        out[name] = df[j].to_numpy()
+    out["open_ms"] = _to_ms(out["open_ms"])
+    out["close_ms"] = _to_ms(out["close_ms"])
+    return out
+
+
+def _iter_csv(f, chunksize: int) -> Iterator[np.ndarray]:
+    # algunos dumps traen encabezado (open_time,...), otros no
+    header = None if f.peek(1)[:1].isdigit() else 0
+    reader = pd.read_csv(
+        f,
+        header=header,
+        usecols=range(len(KLINE_DTYPE)),
+        dtype=_CSV_DTYPES if header is None else None,
+        chunksize=chunksize,
+    )
+    for chunk in reader:
+        chunk.columns = range(chunk.shape[1])
+        yield _frame_to_array(chunk.astype(_CSV_DTYPES))
+
+
+def read_dump(path, chunksize: int = CHUNK_ROWS) -> Iterator[np.ndarray]:
+    """Chunks (array estructurado KLINE_DTYPE) de un ZIP o CSV de Binance."""
+    path = Path(path)
+    if path.suffix == ".zip":
+        with zipfile.ZipFile(path) as z:
+            for name in z.namelist():
+                if name.endswith(".csv"):
+                    with z.open(name) as f:
+                        yield from _iter_csv(f, chunksize)
+    else:
+        with open(path, "rb") as f:
+            yield from _iter_csv(f, chunksize)
+
+
+def _diferencias(existente: np.ndarray, nuevo: np.ndarray) -> int:
+    """# velas con el mismo open y OHLCV distinto (REST vs dump)."""
+    if len(existente) == 0:
+        return 0
+    _, i, j = np.intersect1d(existente["open_ms"], nuevo["open_ms"], return_indices=True)
+    if len(i) == 0:
+        return 0
+    a, b = existente[i], nuevo[j]
+    iguales = np.ones(len(i), dtype=bool)
+    for c in ("open", "high", "low", "close", "volume"):
+        iguales &= np.isclose(a[c], b[c], rtol=1e-9, atol=0.0)
+    return int((~iguales).sum())
+
+
+def import_dumps(
+    directory,
+    symbols=None,
+    interval: str = "5m",
+    cache: Optional[KlineCache] = None,
+    chunksize: int = CHUNK_ROWS,
+    now_ms: Optional[int] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Importa los dumps de `directory` al KlineCache.
+    Retorna {symbol: {files, rows, overlap_diffs, first_ms, last_ms, missing}}
+    donde `missing` = rangos [a, b) aún sin cubrir entre el inicio del dump
+    y la última vela cerrada (frontera con REST).
+    """
+    cache = cache if cache is not None else get_kline_cache()
+    if cache is None:
+        raise RuntimeError("KLINE_CACHE deshabilitado: no hay store local donde importar.")
+
+    iv = INTERVAL_MS[interval]
+    limite = closed_end_ms(iv, now_ms)
+    out: Dict[str, Dict[str, Any]] = {}
+
+    for info in list_dumps(directory, symbols, interval):
+        symbol = info["symbol"]
+        rep = out.setdefault(symbol, {
+            "files": 0, "rows": 0, "overlap_diffs": 0,
+            "first_ms": None, "last_ms": None, "missing": [],
+        })
+
+        n = 0
+        for arr in read_dump(info["path"], chunksize):
+            o = arr["open_ms"]
+            arr = np.sort(arr[(o % iv == 0) & (o < limite)], order="open_ms")
+            if len(arr) == 0:
+                continue
+            lo, hi = int(arr["open_ms"][0]), int(arr["open_ms"][-1]) + iv
+            rep["overlap_diffs"] += _diferencias(cache.read(symbol, interval, lo, hi), arr)
+            cache.write(symbol, interval, arr)
+            n += len(arr)
+            rep["first_ms"] = lo if rep["first_ms"] is None else min(rep["first_ms"], lo)
+            rep["last_ms"] = hi - iv if rep["last_ms"] is None else max(rep["last_ms"], hi - iv)
+
+        # el periodo del archivo queda cubierto (huecos del exchange incluidos)
+        cache.write(symbol, interval, None, covered=(info["start_ms"], min(info["end_ms"], limite)))
+        rep["files"] += 1
+        rep["rows"] += n
+        print(f"[kline_dump_import] {info['path'].name}: {n} velas")
+
+    for symbol, rep in out.items():
+        if rep["first_ms"] is not None:
+            rep["missing"] = cache.missing(symbol, interval, rep["first_ms"], limite)
+    return out
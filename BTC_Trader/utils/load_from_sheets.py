@@ -4,19 +4,62 @@ import os
 
 SHEET_ID = os.getenv("GOOGLE_SHEET_ID")
 
-def load_symbol_df(symbol: str):
-    client = get_gsheet_client()
-    sh = client.open_by_key(SHEET_ID)
+# Columnas de las hojas de velas (A:G, las escribe el incremental)
+CANDLE_RANGE = "A1:G"
+
+# Handles cacheados por proceso (evita open_by_key/worksheet → metadata en cada lectura)
+_spreadsheet = None
+_worksheets = {}
+
+def _get_spreadsheet():
+    global _spreadsheet
+    if _spreadsheet is None:
+        _spreadsheet = get_gsheet_client().open_by_key(SHEET_ID)
+    return _spreadsheet
 
-    ws = sh.worksheet(symbol)
+def _get_worksheet(symbol: str):
+    ws = _worksheets.get(symbol)
+    if ws is None:
+        ws = _worksheets[symbol] = _get_spreadsheet().worksheet(symbol)
+    return ws
+
+def load_symbol_df(symbol: str):
+    ws = _get_worksheet(symbol)
 
     data = ws.get_all_records()
 
     if not data:
         raise RuntimeError(f"❌ La hoja {symbol} está vacía en Google Sheets.")
 
-    df = pd.DataFrame(data)
+    return _normalize_candles(pd.DataFrame(data))
+
+def load_symbols_df(symbols, client=None) -> dict:
+    """
+    Varias hojas de velas en UNA sola llamada (values_batch_get).
+    Retorna {symbol: df} con el mismo formato que load_symbol_df.
+    Una hoja vacía queda como DF vacío (no aborta las demás).
+    """
+    symbols = [s.strip().upper() for s in symbols]
+    sh = client.open_by_key(SHEET_ID) if client is not None else _get_spreadsheet()
+
+    resp = sh.values_batch_get(
+        [f"'{s}'!{CANDLE_RANGE}" for s in symbols],
+        params={"valueRenderOption": "UNFORMATTED_VALUE"},
+    )
+
+    out = {}
+    for symbol, vr in zip(symbols, resp.get("valueRanges", [])):
+        values = vr.get("values", [])
+        if len(values) < 2:
+            out[symbol] = pd.DataFrame(columns=values[0] if values else None)
+            continue
+        header, rows = values[0], values[1:]
+        # filas cortas (celdas vacías al final) → rellenar
+        rows = [r + [""] * (len(header) - len(r)) for r in rows]
+        out[symbol] = _normalize_candles(pd.DataFrame(rows, columns=header))
+    return out
 
+def _normalize_candles(df: pd.DataFrame) -> pd.DataFrame:
     # Convertir tiempos
     df["Open time"] = pd.to_datetime(df["Open time"], errors="coerce")
     df["Close time"] = pd.to_datetime(df["Close time"], errors="coerce")
@@ -0,0 +1,382 @@
+# utils/param_sweep.py
+# ==========================================================
+# Sweep paralelo de parámetros Winner/Champion
+# ----------------------------------------------------------
+# - Modos: grid | random | bayes (GP de scikit-learn, opcional)
+# - ProcessPool: el OHLCV crudo vive en shared memory; cada worker
+#   solo recibe la combinación de parámetros (no se picklea la data).
+# - Cada worker tiene un FeatureCache: los bloques que no dependen del
+#   parámetro variado (momentum, energy, structure) no se recalculan.
+# - Resultado: tabla rankeada por objetivo (y CSV opcional).
+# ==========================================================
+
+from __future__ import annotations
+
+import itertools
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .strategy_winner_champion import (
+    P_DEFAULT,
+    CFG_DEFAULT,
+    build_features_winner,
+    buy_signal_champion,
+)
+from .backtest import run_backtest
+from .feature_cache import FeatureCache
+
+
+# Espacio por defecto (listas = grid / choice; tuplas (lo, hi) = rango continuo en random/bayes)
+DEFAULT_GRID: Dict[str, Any] = {
+    "mom_win": [3, 4, 6],
+    "speed_win": [7, 9, 11],
+    "accel_win": [5, 7, 9],
+    "z_win": [20, 30],
+    "zaccel_gate": [3.0, 4.0, 5.0],
+    "ENTRY_ZENERGY_MIN": [1.5, 1.8, 2.1],
+    "ENTRY_K_STRUCT": [0.2, 0.4, 0.6],
+    "ENERGY_ZWIN": [96, 120, 144],
+    "DON_WIN": [48],
+}
+
+# orden de agrupación: combos con el mismo bloque caro quedan juntos (mejor hit de cache)
+_GROUP_ORDER = ["mom_win", "speed_win", "accel_win", "z_win", "ENERGY_ZWIN", "STRUCT_ZWIN", "DON_WIN"]
+
+_OHLCV_COLS = ["Open", "High", "Low", "Close", "Volume"]
+_EXEC_COLS = ["Open", "Close"]
+
+
+# ==========================================================
+# Shared memory (OHLCV crudo)
+# ==========================================================
+
+def _share_frames(df: pd.DataFrame, exec_df: Optional[pd.DataFrame]):
+    """
+    Copia OHLCV (+ Open/Close de ejecución alineados) a un bloque de shared memory.
+    Retorna (shm_values, shm_index, meta) — el caller hace close/unlink.
+    """
+    cols = [df[c].to_numpy(dtype=float) for c in _OHLCV_COLS]
+    if exec_df is not None:
+        ex = exec_df[_EXEC_COLS].reindex(df.index)
+        cols += [ex[c].to_numpy(dtype=float) for c in _EXEC_COLS]
+
+    values = np.vstack(cols)
+    index = df.index.asi8 if isinstance(df.index, pd.DatetimeIndex) else np.arange(len(df), dtype=np.int64)
+
+    shm_v = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+    shm_i = shared_memory.SharedMemory(create=True, size=max(index.nbytes, 1))
+    np.ndarray(values.shape, dtype=np.float64, buffer=shm_v.buf)[:] = values
+    np.ndarray(index.shape, dtype=np.int64, buffer=shm_i.buf)[:] = index
+
+    meta = {
+        "values_name": shm_v.name,
+        "index_name": shm_i.name,
+        "shape": values.shape,
+        "has_exec": exec_df is not None,
+        "tz": str(df.index.tz) if getattr(df.index, "tz", None) is not None else None,
+        "is_datetime": isinstance(df.index, pd.DatetimeIndex),
+    }
+    return shm_v, shm_i, meta
+
+
+def _frames_from_shared(meta: Dict[str, Any]):
+    shm_v = shared_memory.SharedMemory(name=meta["values_name"])
+    shm_i = shared_memory.SharedMemory(name=meta["index_name"])
+    values = np.ndarray(meta["shape"], dtype=np.float64, buffer=shm_v.buf)
+    raw_idx = np.ndarray((meta["shape"][1],), dtype=np.int64, buffer=shm_i.buf)
+
+    if meta["is_datetime"]:
+        index = pd.DatetimeIndex(raw_idx.view("datetime64[ns]"), name="ts")
+        if meta["tz"]:
+            index = index.tz_localize("UTC").tz_convert(meta["tz"])
+    else:
+        index = pd.RangeIndex(len(raw_idx))
+
+    df = pd.DataFrame(dict(zip(_OHLCV_COLS, values[:5])), index=index, copy=False)
+    exec_df = None
+    if meta["has_exec"]:
+        exec_df = pd.DataFrame(dict(zip(_EXEC_COLS, values[5:7])), index=index, copy=False)
+
+    return (shm_v, shm_i), df, exec_df
+
+
+# ==========================================================
+# Worker
+# ==========================================================
+
+_W: Dict[str, Any] = {}
+
+
+def _init_worker(meta: Dict[str, Any], bt_kwargs: Dict[str, Any], cache_mb: float) -> None:
+    handles, df, exec_df = _frames_from_shared(meta)
+    _W["handles"] = handles     # mantener vivos los buffers
+    _W["df"] = df
+    _W["exec_df"] = exec_df
+    _W["bt_kwargs"] = bt_kwargs
+    _W["cache"] = FeatureCache(max_mb=cache_mb)
+
+
+def split_params(combo: Dict[str, Any]):
+    """combo plano → (P, cfg) completos, con defaults de la config activa."""
+    P = dict(P_DEFAULT)
+    cfg = dict(CFG_DEFAULT)
+    for k, v in combo.items():
+        if k in P:
+            P[k] = v
+        elif k in cfg:
+            cfg[k] = v
+        else:
+            raise KeyError(f"Parámetro desconocido en sweep: {k}")
+    return P, cfg
+
+
+def evaluate_params(
+    df: pd.DataFrame,
+    combo: Dict[str, Any],
+    exec_df: Optional[pd.DataFrame] = None,
+    cache=None,
+    **bt_kwargs,
+) -> Dict[str, Any]:
+    """Features + señal + backtest para una combinación. Retorna backtest completo."""
+    P, cfg = split_params(combo)
+
+    d = build_features_winner(
+        df,
+        P=P,
+        ENERGY_ZWIN=cfg["ENERGY_ZWIN"],
+        STRUCT_ZWIN=cfg["STRUCT_ZWIN"],
+        STRUCT_WIN=cfg["STRUCT_WIN"],
+        DON_WIN=cfg["DON_WIN"],
+        cache=cache,
+    )
+    buy_ok = buy_signal_champion(
+        d,
+        P=P,
+        ENTRY_ZENERGY_MIN=cfg["ENTRY_ZENERGY_MIN"],
+        ENTRY_K_STRUCT=cfg["ENTRY_K_STRUCT"],
+        ENTRY_USE_ASYM=cfg["ENTRY_USE_ASYM"],
+        ENTRY_N_DOWN=cfg["ENTRY_N_DOWN"],
+    )
+    return run_backtest(d, buy_ok, exec_df=exec_df, **bt_kwargs)
+
+
+def _worker_eval(combo: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        res = evaluate_params(_W["df"], combo, exec_df=_W["exec_df"], cache=_W["cache"], **_W["bt_kwargs"])
+        return {**combo, **res["stats"], "error": None}
+    except Exception as e:
+        return {**combo, "error": str(e)}
+
+
+# ==========================================================
+# Generadores de combinaciones
+# ==========================================================
+
+def grid_combos(space: Dict[str, Any]) -> List[Dict[str, Any]]:
+    keys = list(space.keys())
+    vals = [v if isinstance(v, list) else list(v) for v in (space[k] for k in keys)]
+    return [dict(zip(keys, c)) for c in itertools.product(*vals)]
+
+
+def _sample_value(spec, rng: random.Random):
+    if isinstance(spec, list):
+        return rng.choice(spec)
+    lo, hi = spec
+    if isinstance(lo, int) and isinstance(hi, int):
+        return rng.randint(lo, hi)
+    return rng.uniform(float(lo), float(hi))
+
+
+def random_combos(space: Dict[str, Any], n_iter: int, seed: int = 42) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    seen = set()
+    out = []
+    # tope de intentos para espacios discretos pequeños
+    for _ in range(n_iter * 20):
+        c = {k: _sample_value(v, rng) for k, v in space.items()}
+        key = tuple(sorted(c.items()))
+        if key in seen:
+            continue
+        seen.add(key)
+        out.append(c)
+        if len(out) >= n_iter:
+            break
+    return out
+
+
+def _group_sort(combos: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def key(c):
+        return tuple(c.get(k, -1) for k in _GROUP_ORDER)
+    return sorted(combos, key=key)
+
+
+def _encode(combos: List[Dict[str, Any]], space: Dict[str, Any]) -> np.ndarray:
+    """Combos → matriz normalizada [0,1] para el GP."""
+    cols = []
+    for k, spec in space.items():
+        if isinstance(spec, list):
+            opts = sorted(set(spec), key=lambda x: (str(type(x)), x))
+            if all(isinstance(o, (int, float)) and not isinstance(o, bool) for o in opts):
+                lo, hi = float(min(opts)), float(max(opts))
+                v = np.array([float(c[k]) for c in combos])
+            else:
+                lo, hi = 0.0, float(max(len(opts) - 1, 1))
+                v = np.array([float(opts.index(c[k])) for c in combos])
+        else:
+            lo, hi = float(spec[0]), float(spec[1])
+            v = np.array([float(c[k]) for c in combos])
+        cols.append((v - lo) / (hi - lo) if hi > lo else np.zeros(len(combos)))
+    return np.column_stack(cols) if cols else np.zeros((len(combos), 0))
+
+
+def _expected_improvement(mu: np.ndarray, sd: np.ndarray, best: float) -> np.ndarray:
+    from scipy.stats import norm
+
+    sd = np.maximum(sd, 1e-12)
+    z = (mu - best) / sd
+    return (mu - best) * norm.cdf(z) + sd * norm.pdf(z)
+
+
+# ==========================================================
+# Runner
+# ==========================================================
+
+def run_sweep(
+    df: pd.DataFrame,
+    space: Optional[Dict[str, Any]] = None,
+    mode: str = "random",
+    n_iter: int = 200,
+    exec_df: Optional[pd.DataFrame] = None,
+    workers: Optional[int] = None,
+    objective: str = "total_return",
+    min_trades: int = 10,
+    out_path: Optional[str] = None,
+    seed: int = 42,
+    cache_mb: float = 1024.0,
+    **bt_kwargs,
+) -> pd.DataFrame:
+    """
+    Evalúa combinaciones de parámetros sobre historial largo.
+
+    df:       OHLCV del trigger indexado por Close time (ver backtest.ohlcv_from_klines).
+    space:    dict parámetro → lista (grid/choice) o (lo, hi) (random/bayes).
+    mode:     "grid" | "random" | "bayes".
+    objective: métrica de backtest_stats a maximizar.
+    min_trades: combos con menos trades quedan al fondo del ranking.
+    cache_mb: tope de memoria del FeatureCache de cada worker.
+    bt_kwargs: se pasan a run_backtest (fee_bps, slippage_bps, fill, ...).
+
+    Retorna tabla rankeada (rank=1 mejor). Si out_path, la escribe en CSV.
+    """
+    space = dict(space or DEFAULT_GRID)
+    workers = int(workers or os.cpu_count() or 1)
+
+    shm_v, shm_i, meta = _share_frames(df, exec_df)
+    rows: List[Dict[str, Any]] = []
+
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(meta, bt_kwargs, cache_mb),
+        ) as pool:
+
+            def _eval_batch(batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+                batch = _group_sort(batch)
+                chunk = max(1, math.ceil(len(batch) / (workers * 4)))
+                return list(pool.map(_worker_eval, batch, chunksize=chunk))
+
+            if mode == "grid":
+                rows = _eval_batch(grid_combos(space))
+
+            elif mode == "random":
+                rows = _eval_batch(random_combos(space, n_iter, seed=seed))
+
+            elif mode == "bayes":
+                rows = _bayes_loop(space, n_iter, workers, objective, min_trades, seed, _eval_batch)
+
+            else:
+                raise ValueError(f"mode inválido: {mode} (grid|random|bayes)")
+    finally:
+        for shm in (shm_v, shm_i):
+            shm.close()
+            shm.unlink()
+
+    table = rank_results(pd.DataFrame(rows), objective=objective, min_trades=min_trades)
+
+    if out_path:
+        table.to_csv(out_path, index=False)
+        print(f"[param_sweep] ✓ {len(table)} combinaciones → {out_path}", flush=True)
+
+    return table
+
+
+def _objective_values(rows: List[Dict[str, Any]], objective: str, min_trades: int) -> np.ndarray:
+    y = np.array([float(r.get(objective, np.nan)) for r in rows])
+    n = np.array([float(r.get("n_trades", 0) or 0) for r in rows])
+    y[~np.isfinite(y) | (n < min_trades)] = np.nan
+    if np.isnan(y).all():
+        return np.zeros(len(y))
+    return np.where(np.isnan(y), np.nanmin(y), y)
+
+
+def _bayes_loop(space, n_iter, workers, objective, min_trades, seed, eval_batch) -> List[Dict[str, Any]]:
+    """
+    Búsqueda bayesiana en batches: GP (Matern) + Expected Improvement sobre
+    un pool de candidatos aleatorios. Si scikit-learn no está, cae a random.
+    """
+    try:
+        from sklearn.gaussian_process import GaussianProcessRegressor
+        from sklearn.gaussian_process.kernels import Matern, WhiteKernel
+    except Exception as e:
+        print(f"[param_sweep] ⚠️ scikit-learn no disponible ({e}) → modo random", flush=True)
+        return eval_batch(random_combos(space, n_iter, seed=seed))
+
+    pool = random_combos(space, max(n_iter * 10, 500), seed=seed)
+    X_pool = _encode(pool, space)
+
+    n_init = min(len(pool), max(workers, 8, n_iter // 5))
+    done_idx = list(range(n_init))
+    rows = eval_batch([pool[i] for i in done_idx])
+
+    # eval_batch reordena; re-alinear filas con el pool por parámetros
+    key_of = lambda c: tuple(sorted((k, c[k]) for k in space))
+    pos = {key_of(c): i for i, c in enumerate(pool)}
+
+    while len(rows) < min(n_iter, len(pool)):
+        evaluated = [pos[key_of(r)] for r in rows]
+        y = _objective_values(rows, objective, min_trades)
+
+        gp = GaussianProcessRegressor(
+            kernel=Matern(nu=2.5) + WhiteKernel(1e-3),
+            normalize_y=True,
+            random_state=seed,
+        )
+        gp.fit(X_pool[evaluated], y)
+
+        remaining = np.setdiff1d(np.arange(len(pool)), evaluated)
+        mu, sd = gp.predict(X_pool[remaining], return_std=True)
+        ei = _expected_improvement(mu, sd, float(np.max(y)))
+
+        k = min(workers, n_iter - len(rows), len(remaining))
+        pick = remaining[np.argsort(-ei)[:k]]
+        rows += eval_batch([pool[i] for i in pick])
+
+    return rows
+
+
+def rank_results(table: pd.DataFrame, objective: str = "total_return", min_trades: int = 10) -> pd.DataFrame:
+    if table.empty or objective not in table.columns:
+        return table
+    t = table.copy()
+    t["eligible"] = (t["n_trades"].fillna(0) >= min_trades) & t["error"].isna()
+    t = t.sort_values(["eligible", objective], ascending=[False, False], na_position="last")
+    t.insert(0, "rank", np.arange(1, len(t) + 1))
+    return t.reset_index(drop=True)
@@ -2,18 +2,22 @@
 from typing import Literal, List, Dict
 import numpy as np
 import pandas as pd
-from .swing_levels import recent_swing
+from .swing_levels import recent_swing, _fractal_mask
+
+def atr_series(df: pd.DataFrame, period: int = 14) -> pd.Series:
+    """ATR (media simple del True Range) para todo el frame, vectorizado."""
+    h = df["High"].to_numpy(dtype=float)
+    l = df["Low"].to_numpy(dtype=float)
+    c = df["Close"].to_numpy(dtype=float)
+    prev_c = np.r_[np.nan, c[:-1]]
+    # max ignorando NaN, igual que concat(...).max(axis=1) (1ra vela: solo High - Low)
+    tr = np.fmax(np.fmax(h - l, np.abs(h - prev_c)), np.abs(l - prev_c))
+    return pd.Series(tr, index=df.index).rolling(period, min_periods=period).mean()
 
 def atr(df: pd.DataFrame, period: int = 14) -> float:
-    h, l, c = df["High"], df["Low"], df["Close"]
-    prev_c = c.shift(1)
-    tr = pd.concat([
-        (h - l),
-        (h - prev_c).abs(),
-        (l - prev_c).abs()
-    ], axis=1).max(axis=1)
-    atr_series = tr.rolling(period, min_periods=period).mean()
-    val = float(atr_series.iloc[-1]) if len(atr_series) and not np.isnan(atr_series.iloc[-1]) else np.nan
+    # solo la cola necesaria para el último valor (period TRs + cierre previo)
+    atr_s = atr_series(df.iloc[-(period + 1):], period)
+    val = float(atr_s.iloc[-1]) if len(atr_s) and not np.isnan(atr_s.iloc[-1]) else np.nan
     return val
 
 def stop_loss_from_swing(
@@ -76,6 +80,88 @@ def build_levels(
         "rr_targets": rr_targets[:]   # alias
     }
 
+def _swing_batch(
+    series: pd.Series, pos: np.ndarray, side: Literal["low","high"],
+    method: Literal["window","fractal"], window: int, left: int, right: int
+) -> np.ndarray:
+    """
+    Swing (como recent_swing sobre df.iloc[:i+1]) para cada posición i en `pos`.
+    Los NaN se descartan igual que en recent_swing (dropna).
+    """
+    vals = series.to_numpy(dtype=float)
+    valid = ~np.isnan(vals)
+    comp = vals[valid]
+    rank = np.cumsum(valid)[pos] - 1          # última vela válida <= i (en la serie comprimida)
+
+    out = np.full(len(pos), np.nan)
+    ok = rank >= 0
+    if not ok.any():
+        return out
+
+    roll = pd.Series(comp).rolling(int(window), min_periods=1)
+    win_vals = (roll.min() if side == "low" else roll.max()).to_numpy()
+    out[ok] = win_vals[rank[ok]]
+
+    if method == "fractal":
+        mask = _fractal_mask(comp, side, left, right)
+        last = np.maximum.accumulate(np.where(mask, np.arange(len(comp)), -1))
+        q = rank - right                       # un fractal necesita `right` velas confirmando
+        has = ok & (q >= 0)
+        has[has] = last[q[has]] >= 0
+        out[has] = comp[last[q[has]]]
+    return out
+
+def build_levels_batch(
+    df: pd.DataFrame,
+    signals,
+    side: Literal["BUY","SELL"] = "BUY",
+    entry=None,
+    rr_targets: List[float] = [1.0, 1.5, 1.75],
+    sl_method: Literal["window","fractal"] = "window",
+    window: int = 5, left: int = 2, right: int = 2, atr_k: float = 0.0,
+    atr_period: int = 14
+) -> pd.DataFrame:
+    """
+    build_levels para todas las señales de un histórico a la vez.
+
+    signals: máscara booleana (len(df)) o posiciones enteras de las velas de señal.
+    entry:   None → Close de la vela de señal; o array/Series alineado a las señales.
+
+    Cada fila equivale a build_levels(df.iloc[:i+1], side, entry_i, ...).
+    Retorna DataFrame indexado por el timestamp de la señal con:
+    pos, entry, sl, atr, risk, tp1..tpN.
+    """
+    sig = np.asarray(signals)
+    pos = np.flatnonzero(sig) if sig.dtype == bool else sig.astype(np.int64)
+
+    if entry is None:
+        entry_px = df["Close"].to_numpy(dtype=float)[pos]
+    else:
+        entry_px = np.asarray(entry, dtype=float)
+        if len(entry_px) == len(df) and len(entry_px) != len(pos):
+            entry_px = entry_px[pos]
+
+    swing_side = "low" if side == "BUY" else "high"
+    base = _swing_batch(df["Low"] if side == "BUY" else df["High"], pos, swing_side, sl_method, window, left, right)
+
+    atr_vals = atr_series(df, atr_period).to_numpy()[pos]
+    sl = base.copy()
+    if atr_k > 0:
+        adj = ~np.isnan(atr_vals)
+        sl[adj] = base[adj] - atr_k * atr_vals[adj] if side == "BUY" else base[adj] + atr_k * atr_vals[adj]
+
+    risk = np.abs(entry_px - sl)
+    bad = (risk == 0) | np.isnan(risk)
+    sign = 1.0 if side == "BUY" else -1.0
+
+    out = pd.DataFrame(
+        {"pos": pos, "entry": entry_px, "sl": sl, "atr": atr_vals, "risk": risk},
+        index=df.index[pos],
+    )
+    for k, r in enumerate(rr_targets, start=1):
+        out[f"tp{k}"] = np.where(bad, np.nan, entry_px + sign * r * risk)
+    return out
+
 def format_signal_msg(
     symbol: str,
     side: Literal["BUY","SELL"],
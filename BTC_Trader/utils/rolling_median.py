@@ -0,0 +1,160 @@
+# utils/rolling_median.py
+# ==========================================================
+# Mediana móvil rápida (speed_smooth / accel_smooth)
+# ----------------------------------------------------------
+# - Batch: red de ordenamiento (compare-swap con np.minimum /
+#   np.maximum sobre columnas desplazadas) por bloques que caben en
+#   cache, para ventanas chicas; mismas reglas que
+#   pandas rolling(win, min_periods).median():
+#     * NaN y ±inf se ignoran dentro de la ventana (pandas convierte
+#       inf → NaN antes de cualquier agregación rolling)
+#     * NaN si la ventana tiene menos de min_periods valores válidos
+# - Incremental: RollingMedian mantiene la ventana ordenada (bisect)
+#   para actualizar vela a vela en vivo.
+# ==========================================================
+
+from __future__ import annotations
+
+import bisect
+import math
+from collections import deque
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+# filas por bloque en el batch (w columnas de CHUNK_ROWS floats quedan en cache)
+CHUNK_ROWS = 1 << 15
+
+# por encima de esta ventana, la versión de pandas (skiplist) es más rápida
+MAX_SORTED_WINDOW = 32
+
+
+def _median_sorted_rows(s: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Mediana por fila de ventanas ya ordenadas (NaN al final) con `counts` válidos."""
+    out = np.full(len(s), np.nan)
+    ok = counts > 0
+    if not ok.any():
+        return out
+    rows = np.flatnonzero(ok)
+    c = counts[ok]
+    lo = s[rows, (c - 1) // 2]
+    hi = s[rows, c // 2]
+    out[ok] = np.where(c % 2 == 1, lo, (lo + hi) / 2)
+    return out
+
+
+def _median_network(p: np.ndarray, window: int, n: int) -> np.ndarray:
+    """
+    Mediana de ventanas completas: p[i : i + window] para i en [0, n).
+    Bubble-network parcial: solo se hacen las pasadas que dejan fijas
+    las posiciones centrales.
+    """
+    cols = [p[j:j + n].copy() for j in range(window)]
+    tmp = np.empty(n)
+    lo_idx, hi_idx = (window - 1) // 2, window // 2
+
+    for i in range(window - 1, max(lo_idx, 1) - 1, -1):
+        for j in range(i):
+            a, b = cols[j], cols[j + 1]
+            np.minimum(a, b, out=tmp)
+            np.maximum(a, b, out=b)
+            cols[j], tmp = tmp, a
+
+    if lo_idx == hi_idx:
+        return cols[lo_idx]
+    return (cols[lo_idx] + cols[hi_idx]) / 2
+
+
+def rolling_median(values, window: int, min_periods: Optional[int] = 1) -> np.ndarray:
+    """
+    Mediana móvil de ventana fija (equivalente a pandas rolling(window, min_periods).median()).
+    """
+    x = np.asarray(values, dtype=float)
+    if np.isinf(x).any():
+        x = np.where(np.isinf(x), np.nan, x)  # igual que pandas
+    window = int(window)
+    min_periods = window if min_periods is None else int(min_periods)
+    n = len(x)
+    if n == 0:
+        return np.empty(0)
+
+    if window > MAX_SORTED_WINDOW:
+        return pd.Series(x).rolling(window, min_periods=min_periods).median().to_numpy()
+
+    # NaN al inicio para que la fila i sea la ventana que termina en i
+    padded = np.concatenate((np.full(window - 1, np.nan), x))
+
+    valid = ~np.isnan(padded)
+    csum = np.concatenate(([0], np.cumsum(valid)))
+    counts = csum[window:] - csum[:-window]
+
+    out = np.empty(n)
+    for a in range(0, n, CHUNK_ROWS):
+        b = min(a + CHUNK_ROWS, n)
+        out[a:b] = _median_network(padded[a:b + window - 1], window, b - a)
+
+    # ventanas con NaN (arranque / huecos): orden completo solo en esas filas
+    parcial = np.flatnonzero(counts < window)
+    if len(parcial):
+        views = sliding_window_view(padded, window)
+        for a in range(0, len(parcial), CHUNK_ROWS):
+            rows = parcial[a:a + CHUNK_ROWS]
+            s = np.sort(views[rows], axis=1)  # NaN quedan al final
+            out[rows] = _median_sorted_rows(s, counts[rows])
+
+    out[counts < max(min_periods, 1)] = np.nan
+    return out
+
+
+def rolling_median_series(s: pd.Series, window: int, min_periods: Optional[int] = 1) -> pd.Series:
+    return pd.Series(rolling_median(s.to_numpy(dtype=float), window, min_periods), index=s.index, name=s.name)
+
+
+class RollingMedian:
+    """
+    Mediana móvil incremental (mismas reglas que rolling_median).
+
+    Uso:
+        rm = RollingMedian(window=9)
+        for x in valores:
+            m = rm.update(x)
+    """
+
+    def __init__(self, window: int, min_periods: Optional[int] = 1):
+        self.window = int(window)
+        self.min_periods = max(self.window if min_periods is None else int(min_periods), 1)
+        self._raw = deque()
+        self._sorted = []
+
+    def update(self, x: float) -> float:
+        x = float(x)
+        if math.isinf(x):
+            x = float("nan")  # igual que pandas
+        if len(self._raw) == self.window:
+            old = self._raw.popleft()
+            if not math.isnan(old):
+                del self._sorted[bisect.bisect_left(self._sorted, old)]
+
+        self._raw.append(x)
+        if not math.isnan(x):
+            bisect.insort(self._sorted, x)
+        return self.value
+
+    @property
+    def value(self) -> float:
+        c = len(self._sorted)
+        if c < self.min_periods:
+            return float("nan")
+        lo = self._sorted[(c - 1) // 2]
+        hi = self._sorted[c // 2]
+        return lo if c % 2 == 1 else (lo + hi) / 2
+
+    @classmethod
+    def from_values(cls, values, window: int, min_periods: Optional[int] = 1) -> "RollingMedian":
+        # warm start: solo hace falta la cola de la ventana
+        rm = cls(window, min_periods)
+        for x in np.asarray(values, dtype=float)[-int(window):]:
+            rm.update(x)
+        return rm
@@ -0,0 +1,210 @@
+# utils/sheets_refresher.py
+# ==========================================================
+# Refresher en background (Sheets → dashboard)
+# ----------------------------------------------------------
+# - Un hilo daemon por proceso (en Streamlit vive en
+#   st.cache_resource y lo comparten todas las sesiones).
+# - Mientras los datos están al día duerme hasta el próximo
+#   cierre 5m (+ gracia); si faltan velas hace polling corto
+#   durante una ventana y luego espaciado (sin martillar Sheets).
+# - status() expone la frescura (última vela, velas atrasadas,
+#   edad de la última carga, último error) para la UI.
+# - Si on_data devuelve {clave: resultado | excepción} (update_many),
+#   las fallas parciales quedan en status() y la carga NO se da por fresca.
+# - El render nunca espera: usa lo mejor disponible.
+# ==========================================================
+
+from __future__ import annotations
+
+import math
+import threading
+from typing import Any, Callable, Dict, Optional
+
+import pandas as pd
+
+CR_TZ = "America/Costa_Rica"
+BAR = pd.Timedelta(minutes=5)
+
+
+def expected_last_close(now: pd.Timestamp) -> pd.Timestamp:
+    """Última vela 5m cerrada esperada: floor_5m(now) - 1ms (misma tz que now)."""
+    return now.floor("5min") - pd.Timedelta(milliseconds=1)
+
+
+def last_close_time(df: pd.DataFrame) -> Optional[pd.Timestamp]:
+    """Último "Close time" de un DF de Sheets (columna o index)."""
+    if df is None or len(df) == 0:
+        return None
+    s = df["Close time"] if "Close time" in df.columns else df.index.to_series()
+    ts = pd.to_datetime(s, errors="coerce").max()
+    return None if pd.isna(ts) else pd.Timestamp(ts)
+
+
+def _fallas(res: Any) -> Dict[str, str]:
+    """Excepciones dentro de un resultado {clave: resultado | excepción}."""
+    if not isinstance(res, dict):
+        return {}
+    return {str(k): f"{type(v).__name__}: {v}" for k, v in res.items() if isinstance(v, BaseException)}
+
+
+class SheetsRefresher:
+    """
+    Carga periódica en un hilo de background.
+
+        ref = SheetsRefresher(load_fn=lambda: load_symbol_df("BTCUSDT"),
+                              on_data=lambda df: store.update(prep(df)))
+        ref.start()
+        ref.status()   # frescura para la UI
+
+    load_fn: trae el DF crudo (I/O). Puede devolver cualquier cosa (ej. {symbol: df})
+             si se pasa ts_fn.
+    on_data: procesa lo cargado (ej. FeatureStore.update); corre en el hilo.
+             Si devuelve {clave: resultado | excepción} (ej. update_many), las
+             excepciones se reportan en status()["failed"] / last_error.
+    ts_fn: última vela cerrada de lo cargado (default: last_close_time).
+    Tiempos naive se interpretan en hora CR (como se guardan en Sheets).
+    """
+
+    def __init__(
+        self,
+        load_fn: Callable[[], Any],
+        on_data: Optional[Callable[[Any], Any]] = None,
+        ts_fn: Callable[[Any], Optional[pd.Timestamp]] = last_close_time,
+        tz: str = CR_TZ,
+        grace_sec: float = 20.0,
+        poll_sec: float = 6.0,
+        fast_poll_window_sec: float = 90.0,
+        slow_poll_sec: float = 30.0,
+    ):
+        self.load_fn = load_fn
+        self.on_data = on_data
+        self.ts_fn = ts_fn
+        self.tz = tz
+        self.grace_sec = float(grace_sec)
+        self.poll_sec = float(poll_sec)
+        self.fast_poll_window_sec = float(fast_poll_window_sec)
+        self.slow_poll_sec = float(slow_poll_sec)
+
+        self._df: Optional[pd.DataFrame] = None
+        self._last_ts: Optional[pd.Timestamp] = None
+        self._loaded_at: Optional[pd.Timestamp] = None
+        self._last_error: Optional[str] = None
+        self._failed: Dict[str, str] = {}
+        self._fail_streak = 0  # cargas seguidas con error (total o parcial)
+        self._loads = 0
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._first = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ---------- tiempo ----------
+    def _now(self) -> pd.Timestamp:
+        return pd.Timestamp.now(tz=self.tz)
+
+    def _localize(self, ts: Optional[pd.Timestamp]) -> Optional[pd.Timestamp]:
+        if ts is None:
+            return None
+        return ts.tz_localize(self.tz) if ts.tzinfo is None else ts.tz_convert(self.tz)
+
+    # ---------- carga ----------
+    def refresh_once(self) -> bool:
+        """Una carga sincrónica. Retorna True si hubo vela nueva."""
+        try:
+            df = self.load_fn()
+            ts = self._localize(self.ts_fn(df))
+            fallas = _fallas(self.on_data(df)) if self.on_data is not None else {}
+        except Exception as e:
+            with self._lock:
+                self._last_error = f"{type(e).__name__}: {e}"
+                self._fail_streak += 1
+            return False
+        finally:
+            self._first.set()
+
+        with self._lock:
+            nueva = ts is not None and (self._last_ts is None or ts > self._last_ts)
+            self._df = df
+            self._last_ts = ts if ts is not None else self._last_ts
+            self._loaded_at = self._now()
+            self._failed = fallas
+            self._last_error = "; ".join(f"{k}: {e}" for k, e in fallas.items()) or None
+            self._fail_streak = self._fail_streak + 1 if fallas else 0
+            self._loads += 1
+        return nueva
+
+    def _next_delay(self) -> float:
+        now = self._now()
+        expected = expected_last_close(now)
+        with self._lock:
+            last_ts = self._last_ts
+            streak = self._fail_streak
+
+        if streak:
+            # la última carga falló (o algún store quedó atrasado): reintentar
+            # sin esperar al próximo cierre, con backoff hasta slow_poll_sec
+            return min(self.poll_sec * 2 ** (streak - 1), max(self.slow_poll_sec, self.poll_sec))
+
+        if last_ts is not None and last_ts >= expected:
+            # al día: dormir hasta el próximo cierre + gracia
+            next_close = expected + BAR
+            return max((next_close - now).total_seconds() + self.grace_sec, self.poll_sec)
+
+        atraso = (now - expected).total_seconds()
+        if atraso <= self.grace_sec + self.fast_poll_window_sec:
+            return self.poll_sec
+        return self.slow_poll_sec
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.refresh_once()
+            self._stop.wait(self._next_delay())
+
+    # ---------- API ----------
+    def start(self) -> "SheetsRefresher":
+        """Arranca el hilo (idempotente)."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="sheets-refresher", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def wait_first(self, timeout: Optional[float] = None) -> bool:
+        """Bloquea hasta la primera carga (solo útil al arrancar el proceso)."""
+        return self._first.wait(timeout)
+
+    def latest(self) -> Optional[pd.DataFrame]:
+        with self._lock:
+            return self._df
+
+    def status(self) -> Dict[str, Any]:
+        now = self._now()
+        expected = expected_last_close(now)
+        with self._lock:
+            last_ts = self._last_ts
+            loaded_at = self._loaded_at
+            out = {
+                "last_ts": last_ts,
+                "expected": expected,
+                "loaded_at": loaded_at,
+                "last_error": self._last_error,
+                "failed": dict(self._failed),
+                "loads": self._loads,
+                "running": self._thread is not None and self._thread.is_alive(),
+            }
+
+        if last_ts is None:
+            out.update(fresh=False, stale_bars=None, age_sec=None)
+            return out
+
+        # un store que falló no está al día aunque la hoja sí lo esté
+        out["fresh"] = last_ts >= expected and not out["failed"]
+        out["stale_bars"] = 0 if out["fresh"] else int(math.ceil((expected - last_ts) / BAR))
+        out["age_sec"] = None if loaded_at is None else (now - loaded_at).total_seconds()
+        return out
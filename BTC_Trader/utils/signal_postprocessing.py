@@ -1,4 +1,5 @@
 # --- utils/signal_postprocessing.py ---
+import numpy as np
 import pandas as pd
 
 def eliminar_señales_consecutivas(df, columna='B-H-S Signal', señal='B'):
@@ -12,17 +13,40 @@ def eliminar_señales_consecutivas(df, columna='B-H-S Signal', señal='B'):
     df.loc[consecutivos, columna] = pd.NA
     return df
 
+def deduplicar_señales(valores, vacio=0, propagar=False):
+    """
+    Primitiva vectorizada de limpieza de señales (shift-compare + ffill).
+
+    - np.ndarray de códigos (int8 -1/0/1): deja el código solo donde cambia
+      respecto a la vela previa (la primera se compara con `vacio`); el resto → `vacio`.
+    - pd.Series (strings/categorical con NaN/None): igual, con NA como vacío
+      (NA seguido de NA cuenta como repetido).
+
+    propagar=True: rellena hacia adelante el último valor no vacío (ffill).
+    """
+    if isinstance(valores, pd.Series):
+        prev = valores.shift(1)
+        repetido = (valores == prev) | (valores.isna() & prev.isna())
+        out = valores.mask(repetido)
+        return out.ffill() if propagar else out
+
+    codes = np.asarray(valores)
+    prev = np.empty_like(codes)
+    prev[:1] = vacio
+    prev[1:] = codes[:-1]
+    out = np.where(codes != prev, codes, vacio).astype(codes.dtype)
+
+    if propagar:
+        idx = np.where(out != vacio, np.arange(len(out)), -1)
+        idx = np.maximum.accumulate(idx) if len(idx) else idx
+        out = np.where(idx >= 0, out[np.maximum(idx, 0)], vacio).astype(codes.dtype)
+    return out
+
 def limpiar_señales_consecutivas(df, columna='Momentum Signal'):
     """
     Elimina señales consecutivas iguales y propaga el último estado válido.
     Crea/actualiza la columna 'Signal Final'.
     """
     df = df.copy()
-    df['Signal Final'] = df[columna]
-
-    for i in range(1, len(df)):
-        if df.at[i, 'Signal Final'] == df.at[i-1, 'Signal Final']:
-            df.at[i, 'Signal Final'] = None
-
-    df['Signal Final'] = df['Signal Final'].ffill()
+    df['Signal Final'] = deduplicar_señales(df[columna], propagar=True)
     return df
@@ -2,7 +2,7 @@
 # ==========================================================
 # Winner/Champion Strategy (BTC trigger) — reusable module
 # ----------------------------------------------------------
-# Copiado/espejo de alert_bot.py para consumir en Streamlit u otros.
+# Fuente única de la estrategia: alert_bot (vía FeatureStore), Streamlit, backtests.
 # NO hace I/O. Solo feature engineering + señales.
 # ==========================================================
 
@@ -12,6 +12,35 @@ from typing import Dict, Any
 import numpy as np
 import pandas as pd
 
+from .feature_cache import data_fingerprint
+from .rolling_median import rolling_median_series
+
+
+# ==========================================================
+# CONFIG ACTIVA (igual que alert_bot / app)
+# ==========================================================
+
+P_DEFAULT: Dict[str, Any] = dict(
+    mom_win=4,
+    speed_win=9,
+    accel_win=7,
+    z_win=20,
+    zspeed_min=0.30,
+    zaccel_min=0.10,
+    zaccel_gate=4.0,
+)
+
+CFG_DEFAULT: Dict[str, Any] = dict(
+    ENERGY_ZWIN=120,
+    STRUCT_ZWIN=120,
+    STRUCT_WIN=48,
+    DON_WIN=48,
+    ENTRY_ZENERGY_MIN=1.8,
+    ENTRY_K_STRUCT=0.4,
+    ENTRY_USE_ASYM=False,
+    ENTRY_N_DOWN=1,
+)
+
 
 def rolling_z(x: pd.Series, win: int) -> pd.Series:
     mu = x.rolling(win, min_periods=win).mean()
@@ -19,89 +48,155 @@ def rolling_z(x: pd.Series, win: int) -> pd.Series:
     return ((x - mu) / sd).fillna(0.0)
 
 
-def build_features_winner(
-    df: pd.DataFrame,
-    P: Dict[str, Any],
-    ENERGY_ZWIN: int = 120,
-    STRUCT_ZWIN: int = 120,
-    STRUCT_WIN: int = 48,
-    DON_WIN: int = 48,
-) -> pd.DataFrame:
-    """
-    Espera df con columnas: Open, High, Low, Close, Volume.
-    Index: datetime (ideal), pero puede ser cualquier index ordenable.
-    Devuelve df con features: zspeed, zaccel, zenergy, struct_score, buy_raw, sell_raw, etc.
-    """
-    d = df.copy()
-    eps = 1e-12
+# ==========================================================
+# Bloques de features
+# ----------------------------------------------------------
+# Cada bloque depende SOLO de sus parámetros (y de bloques previos),
+# para poder reutilizarlos cuando se varían otros parámetros (sweeps).
+# ==========================================================
+
+def _block_momentum(df: pd.DataFrame, mom_win: int, speed_win: int, accel_win: int) -> pd.DataFrame:
+    b = pd.DataFrame(index=df.index)
+
+    b["mom"] = df["Close"].diff()
+    b["mom_smooth"] = b["mom"].rolling(int(mom_win), min_periods=1).mean()
 
-    mom_win = int(P["mom_win"])
-    speed_win = int(P["speed_win"])
-    accel_win = int(P["accel_win"])
-    z_win = int(P["z_win"])
-    zspeed_min = float(P["zspeed_min"])
-    zaccel_min = float(P["zaccel_min"])
+    b["speed"] = b["mom_smooth"].diff()
+    b["speed_smooth"] = rolling_median_series(b["speed"], int(speed_win), min_periods=1)
 
-    d["mom"] = d["Close"].diff()
-    d["mom_smooth"] = d["mom"].rolling(mom_win, min_periods=1).mean()
+    b["accel"] = b["speed_smooth"].diff()
+    b["accel_smooth"] = rolling_median_series(b["accel"], int(accel_win), min_periods=1)
+    return b
 
-    d["speed"] = d["mom_smooth"].diff()
-    d["speed_smooth"] = d["speed"].rolling(speed_win, min_periods=1).median()
 
-    d["accel"] = d["speed_smooth"].diff()
-    d["accel_smooth"] = d["accel"].rolling(accel_win, min_periods=1).median()
+def _block_zscores(mom: pd.DataFrame, z_win: int) -> pd.DataFrame:
+    std_speed = mom["speed_smooth"].rolling(int(z_win)).std().replace(0, np.nan)
+    std_accel = mom["accel_smooth"].rolling(int(z_win)).std().replace(0, np.nan)
 
-    std_speed = d["speed_smooth"].rolling(z_win).std().replace(0, np.nan)
-    std_accel = d["accel_smooth"].rolling(z_win).std().replace(0, np.nan)
+    b = pd.DataFrame(index=mom.index)
+    b["zspeed"] = (mom["speed_smooth"] / std_speed).fillna(0.0)
+    b["zaccel"] = (mom["accel_smooth"] / std_accel).fillna(0.0)
+    return b
 
-    d["zspeed"] = (d["speed_smooth"] / std_speed).fillna(0.0)
-    d["zaccel"] = (d["accel_smooth"] / std_accel).fillna(0.0)
 
-    d["buy_raw"] = (
-        (d["zspeed"].shift(1) < 0) &
-        (d["zspeed"] > zspeed_min) &
-        (d["zaccel"] > zaccel_min)
+def _block_raw_signals(z: pd.DataFrame, zspeed_min: float, zaccel_min: float) -> pd.DataFrame:
+    b = pd.DataFrame(index=z.index)
+
+    b["buy_raw"] = (
+        (z["zspeed"].shift(1) < 0) &
+        (z["zspeed"] > float(zspeed_min)) &
+        (z["zaccel"] > float(zaccel_min))
     ).fillna(False).astype(bool)
 
-    d["sell_raw"] = (
-        (d["zspeed"].shift(1) > 0) &
-        (d["zspeed"] < -zspeed_min) &
-        (d["zaccel"] < -zaccel_min)
+    b["sell_raw"] = (
+        (z["zspeed"].shift(1) > 0) &
+        (z["zspeed"] < -float(zspeed_min)) &
+        (z["zaccel"] < -float(zaccel_min))
     ).fillna(False).astype(bool)
+    return b
+
+
+def _block_energy(mom: pd.DataFrame, ENERGY_ZWIN: int) -> pd.DataFrame:
+    b = pd.DataFrame(index=mom.index)
+    b["energy"] = mom["speed_smooth"] * mom["accel_smooth"]
+    b["zenergy"] = rolling_z(b["energy"], int(ENERGY_ZWIN))
+    b["zenergy_diff"] = b["zenergy"].diff().fillna(0.0)
+    return b
+
 
-    # Energy
-    d["energy"] = d["speed_smooth"] * d["accel_smooth"]
-    d["zenergy"] = rolling_z(d["energy"], int(ENERGY_ZWIN))
-    d["zenergy_diff"] = d["zenergy"].diff().fillna(0.0)
+def _block_structure(df: pd.DataFrame, STRUCT_ZWIN: int, DON_WIN: int) -> pd.DataFrame:
+    eps = 1e-12
+    b = pd.DataFrame(index=df.index)
 
-    # Structure
-    d["range"] = (d["High"] - d["Low"]).clip(lower=0.0)
-    d["body"] = (d["Close"] - d["Open"]).abs()
-    d["upper_wick"] = (d["High"] - d[["Open", "Close"]].max(axis=1)).clip(lower=0.0)
-    d["lower_wick"] = (d[["Open", "Close"]].min(axis=1) - d["Low"]).clip(lower=0.0)
+    b["range"] = (df["High"] - df["Low"]).clip(lower=0.0)
+    b["body"] = (df["Close"] - df["Open"]).abs()
+    b["upper_wick"] = (df["High"] - df[["Open", "Close"]].max(axis=1)).clip(lower=0.0)
+    b["lower_wick"] = (df[["Open", "Close"]].min(axis=1) - df["Low"]).clip(lower=0.0)
 
-    d["body_ratio"] = (d["body"] / (d["range"] + eps)).clip(0, 1)
-    d["wick_ratio"] = ((d["upper_wick"] + d["lower_wick"]) / (d["range"] + eps)).clip(0, 2)
+    b["body_ratio"] = (b["body"] / (b["range"] + eps)).clip(0, 1)
+    b["wick_ratio"] = ((b["upper_wick"] + b["lower_wick"]) / (b["range"] + eps)).clip(0, 2)
 
-    d["range_pct"] = d["range"] / (d["Close"] + eps)
-    d["z_range_pct"] = rolling_z(d["range_pct"], int(STRUCT_ZWIN))
-    d["vol_z"] = rolling_z(d["Volume"].replace(0, np.nan).ffill().fillna(0.0), int(STRUCT_ZWIN))
+    b["range_pct"] = b["range"] / (df["Close"] + eps)
+    b["z_range_pct"] = rolling_z(b["range_pct"], int(STRUCT_ZWIN))
+    b["vol_z"] = rolling_z(df["Volume"].replace(0, np.nan).ffill().fillna(0.0), int(STRUCT_ZWIN))
 
-    don_hi = d["High"].rolling(int(DON_WIN), min_periods=int(DON_WIN)).max()
-    d["breakout_up"] = (d["Close"] > don_hi.shift(1)).fillna(False).astype(bool)
+    don_hi = df["High"].rolling(int(DON_WIN), min_periods=int(DON_WIN)).max()
+    b["breakout_up"] = (df["Close"] > don_hi.shift(1)).fillna(False).astype(bool)
 
     score = (
-        0.35 * d["body_ratio"].fillna(0.0) +
-        0.25 * (1.0 - (d["wick_ratio"].fillna(0.0) / 2.0).clip(0, 1)) +
-        0.20 * (1.0 / (1.0 + np.exp(-d["z_range_pct"].fillna(0.0)))) +
-        0.15 * (1.0 / (1.0 + np.exp(-d["vol_z"].fillna(0.0)))) +
-        0.05 * d["breakout_up"].astype(int)
+        0.35 * b["body_ratio"].fillna(0.0) +
+        0.25 * (1.0 - (b["wick_ratio"].fillna(0.0) / 2.0).clip(0, 1)) +
+        0.20 * (1.0 / (1.0 + np.exp(-b["z_range_pct"].fillna(0.0)))) +
+        0.15 * (1.0 / (1.0 + np.exp(-b["vol_z"].fillna(0.0)))) +
+        0.05 * b["breakout_up"].astype(int)
     )
-    d["struct_score"] = score.clip(0.0, 1.0)
+    b["struct_score"] = score.clip(0.0, 1.0)
+    return b
 
-    d["atr_pct"] = d["range_pct"].rolling(int(STRUCT_WIN), min_periods=1).mean().fillna(0.0)
 
-    return d
+def _block_atr(struct: pd.DataFrame, STRUCT_WIN: int) -> pd.DataFrame:
+    b = pd.DataFrame(index=struct.index)
+    b["atr_pct"] = struct["range_pct"].rolling(int(STRUCT_WIN), min_periods=1).mean().fillna(0.0)
+    return b
+
+
+def _cached_block(cache, key: tuple, fn, *args) -> pd.DataFrame:
+    """
+    cache: cualquier mapping con get/__setitem__ (dict, FeatureCache) o None.
+    """
+    if cache is None:
+        return fn(*args)
+    hit = cache.get(key)
+    if hit is not None:
+        return hit
+    out = fn(*args)
+    cache[key] = out
+    return out
+
+
+def build_features_winner(
+    df: pd.DataFrame,
+    P: Dict[str, Any],
+    ENERGY_ZWIN: int = 120,
+    STRUCT_ZWIN: int = 120,
+    STRUCT_WIN: int = 48,
+    DON_WIN: int = 48,
+    cache=None,
+) -> pd.DataFrame:
+    """
+    Espera df con columnas: Open, High, Low, Close, Volume.
+    Index: datetime (ideal), pero puede ser cualquier index ordenable.
+    Devuelve df con features: zspeed, zaccel, zenergy, struct_score, buy_raw, sell_raw, etc.
+
+    cache: mapping opcional (ej. FeatureCache) para memoizar bloques. La key de
+    cada bloque incluye la huella de SUS columnas de entrada + SOLO sus parámetros.
+    """
+    if cache is not None:
+        fp_close = data_fingerprint(df, ["Close"])
+        fp_ohlcv = data_fingerprint(df, ["Open", "High", "Low", "Close", "Volume"])
+    else:
+        fp_close = fp_ohlcv = None
+
+    mom_key = (int(P["mom_win"]), int(P["speed_win"]), int(P["accel_win"]))
+    z_key = mom_key + (int(P["z_win"]),)
+
+    mom = _cached_block(cache, ("momentum", fp_close) + mom_key, _block_momentum, df, *mom_key)
+    z = _cached_block(cache, ("zscores", fp_close) + z_key, _block_zscores, mom, int(P["z_win"]))
+    raw = _block_raw_signals(z, float(P["zspeed_min"]), float(P["zaccel_min"]))
+    energy = _cached_block(
+        cache, ("energy", fp_close) + mom_key + (int(ENERGY_ZWIN),),
+        _block_energy, mom, int(ENERGY_ZWIN),
+    )
+    struct = _cached_block(
+        cache, ("structure", fp_ohlcv, int(STRUCT_ZWIN), int(DON_WIN)),
+        _block_structure, df, int(STRUCT_ZWIN), int(DON_WIN),
+    )
+    atr_b = _block_atr(struct, int(STRUCT_WIN))
+
+    blocks = [mom, z, raw, energy, struct, atr_b]
+    # como el assign original: una columna de feature ya presente en df se reemplaza
+    base = df.drop(columns=[c for blk in blocks for c in blk.columns], errors="ignore")
+    return pd.concat([base] + blocks, axis=1)
 
 
 def struct_modulated_threshold(d: pd.DataFrame, base_thr: float, k: float) -> pd.Series:
@@ -132,6 +227,38 @@ def buy_signal_champion(
     return buy_ok.fillna(False)
 
 
+def sellraw_position(buy_ok, sell_raw, initial: bool = False) -> np.ndarray:
+    """
+    Estado de posición (True = dentro) de la state machine sellraw, vectorizado.
+
+    Misma regla que el loop clásico:
+      - flat + buy_ok      -> entra
+      - en posición + sell -> sale
+    Una vela con buy_ok y sell_raw a la vez invierte el estado (toggle),
+    por eso se cuentan los toggles desde el último evento "puro".
+    initial: estado antes de la primera vela (para continuar un tramo previo).
+    """
+    b = np.asarray(buy_ok, dtype=bool)
+    s = np.asarray(sell_raw, dtype=bool)
+    n = len(b)
+
+    # eventos puros: 1 = set, 0 = reset, -1 = sin evento
+    ev = np.full(n, -1, dtype=np.int8)
+    ev[b & ~s] = 1
+    ev[s & ~b] = 0
+
+    last = np.maximum.accumulate(np.where(ev >= 0, np.arange(n), -1))
+    has_last = last >= 0
+    last_c = np.maximum(last, 0)
+
+    base = np.where(has_last, ev[last_c], int(bool(initial))).astype(np.int64)
+
+    toggles = np.cumsum(b & s)
+    flips = toggles - np.where(has_last, toggles[last_c], 0)
+
+    return (base ^ (flips & 1)).astype(bool)
+
+
 def simulate_sellraw_only(d: pd.DataFrame, buy_ok: pd.Series) -> pd.DataFrame:
     """
     Genera columnas BUY/SELL (bool) con state machine:
@@ -139,22 +266,10 @@ def simulate_sellraw_only(d: pd.DataFrame, buy_ok: pd.Series) -> pd.DataFrame:
       - sale con sell_raw
     """
     out = d.copy()
-    n = len(out)
-    BUY = np.zeros(n, dtype=bool)
-    SELL = np.zeros(n, dtype=bool)
-
-    in_pos = False
-    for i in range(n):
-        b = bool(buy_ok.iloc[i])
-        s = bool(out["sell_raw"].iloc[i])
-
-        if (not in_pos) and b:
-            BUY[i] = True
-            in_pos = True
-        elif in_pos and s:
-            SELL[i] = True
-            in_pos = False
-
-    out["BUY"] = BUY
-    out["SELL"] = SELL
+
+    in_pos = sellraw_position(buy_ok.fillna(False), out["sell_raw"].fillna(False))
+    prev = np.concatenate(([False], in_pos[:-1]))
+
+    out["BUY"] = in_pos & ~prev
+    out["SELL"] = ~in_pos & prev
     return out
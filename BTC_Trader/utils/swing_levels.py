@@ -1,6 +1,8 @@
 # utils/swing_levels.py
-from typing import Literal, Tuple
+from typing import Literal, Optional, Tuple
+import numpy as np
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
 
 def swing_low_window(lows: pd.Series, window: int = 5) -> Tuple[float, int]:
     """
@@ -21,22 +23,57 @@ def swing_high_window(highs: pd.Series, window: int = 5) -> Tuple[float, int]:
     pos = int(highs.index.get_loc(idx))
     return float(highs.loc[idx]), pos
 
+def _fractal_mask(vals: np.ndarray, side: Literal["low","high"], left: int, right: int) -> np.ndarray:
+    """Máscara booleana (len(vals)) de centros que son min/max de su ventana left+1+right."""
+    n = len(vals)
+    mask = np.zeros(n, dtype=bool)
+    width = left + right + 1
+    if n < width:
+        return mask
+    win = sliding_window_view(vals, width)
+    center = vals[left:n - right]
+    ref = win.min(axis=1) if side == "low" else win.max(axis=1)
+    mask[left:n - right] = center == ref
+    return mask
+
 def fractal_points(series: pd.Series, side: Literal["low","high"] = "low", left: int = 2, right: int = 2) -> pd.Index:
     """
     Marca fractales: centro es mínimo/máximo respecto a left/right velas.
     Devuelve un Index con los timestamps que son fractales.
     """
     s = series.dropna()
-    vals = s.values
-    idxs = []
-    for i in range(left, len(vals) - right):
-        window = vals[i-left:i+right+1]
-        center = vals[i]
-        if side == "low" and center == window.min():
-            idxs.append(s.index[i])
-        if side == "high" and center == window.max():
-            idxs.append(s.index[i])
-    return pd.Index(idxs)
+    mask = _fractal_mask(s.to_numpy(), side, left, right)
+    idxs = s.index[mask]
+    return idxs if len(idxs) else pd.Index([])
+
+def _tail_valid(series: pd.Series, k: int) -> pd.Series:
+    """Últimos k valores no-NaN sin recorrer toda la serie (cola que crece x2)."""
+    size = max(int(k), 1)
+    while True:
+        tail = series.iloc[-size:].dropna()
+        if len(tail) >= k or size >= len(series):
+            return tail.iloc[-k:] if k > 0 else tail.iloc[:0]
+        size *= 2
+
+def last_fractal(series: pd.Series, side: Literal["low","high"] = "low", left: int = 2, right: int = 2) -> Optional[Tuple[float, object]]:
+    """
+    Último fractal (valor, timestamp) o None. Recorre hacia atrás desde el final
+    y corta en el primero que encuentra: O(ventana) en el caso normal.
+    Mismo resultado que fractal_points(...)[-1].
+    """
+    width = left + right + 1
+    size = 4 * width
+    while True:
+        s = _tail_valid(series, size)
+        vals = s.to_numpy()
+        for i in range(len(vals) - right - 1, left - 1, -1):
+            w = vals[i - left:i + right + 1]
+            if vals[i] == (w.min() if side == "low" else w.max()):
+                return float(vals[i]), s.index[i]
+        if len(s) < size:
+            # ya se revisó toda la serie
+            return None
+        size *= 4
 
 def recent_swing(
     highs: pd.Series, lows: pd.Series,
@@ -48,18 +85,18 @@ def recent_swing(
     - method="window": usa el min/max de las últimas `window` velas.
     - method="fractal": usa el último fractal válido (fallback a window si no hay).
     """
+    series = lows if side == "low" else highs
+
     if method == "window":
-        if side == "low":
-            v, _ = swing_low_window(lows, window=window)
-            return v
-        else:
-            v, _ = swing_high_window(highs, window=window)
-            return v
+        # mismo valor que swing_low_window / swing_high_window, solo mirando la cola
+        tail = _tail_valid(series, window)
+        if len(tail) == 0:
+            raise ValueError(f"Serie de {'lows' if side == 'low' else 'highs'} vacía.")
+        return float(tail.min() if side == "low" else tail.max())
 
     # fractal
-    idxs = fractal_points(lows if side == "low" else highs, side=side, left=left, right=right)
-    if len(idxs) == 0:
+    last = last_fractal(series, side=side, left=left, right=right)
+    if last is None:
         # fallback
         return recent_swing(highs, lows, side, method="window", window=window)
-    last_idx = idxs[-1]
-    return float((lows if side == "low" else highs).loc[last_idx])
+    return last[0]
@@ -6,6 +6,8 @@
 # - Enrutar señales BUY/SELL hacia Spot o Margin según USE_MARGIN
 # - En modo estricto, bloquear símbolos fuera de ALLOWED_SYMBOLS
 # - NO inicializa Binance aquí (sin pings, sin requests)
+# - Import liviano: los executors se importan al primer uso y solo
+#   el que corresponde (SPOT no carga margin; DRY_RUN no carga ninguno)
 #
 # Entradas:
 #   route_signal({
@@ -40,23 +42,36 @@ STRICT_TRADE_SYMBOL    = os.getenv("STRICT_TRADE_SYMBOL", "true").lower() == "tr
 STRICT_ALLOWED_SYMBOLS = os.getenv("STRICT_ALLOWED_SYMBOLS", "false").lower() == "true"
 STRICT_MODE = STRICT_TRADE_SYMBOL or STRICT_ALLOWED_SYMBOLS
 
-print("==================================================", flush=True)
-print(f"🔧 [Router] USE_MARGIN={USE_MARGIN} | DRY_RUN={DRY_RUN}", flush=True)
-print(f"🎯 [Router] TRADE_SYMBOL={TRADE_SYMBOL}", flush=True)
-print(
-    f"🔒 [Router] ALLOWED_SYMBOLS={sorted(ALLOWED_SYMBOLS)} | STRICT_MODE={STRICT_MODE} "
-    f"(STRICT_TRADE_SYMBOL={STRICT_TRADE_SYMBOL}, STRICT_ALLOWED_SYMBOLS={STRICT_ALLOWED_SYMBOLS})",
-    flush=True
-)
-print("==================================================", flush=True)
+_banner_done = False
+
+def _print_banner_once() -> None:
+    """Banner de config al primer route_signal (no al importar)."""
+    global _banner_done
+    if _banner_done:
+        return
+    _banner_done = True
+    print("==================================================", flush=True)
+    print(f"🔧 [Router] USE_MARGIN={USE_MARGIN} | DRY_RUN={DRY_RUN}", flush=True)
+    print(f"🎯 [Router] TRADE_SYMBOL={TRADE_SYMBOL}", flush=True)
+    print(
+        f"🔒 [Router] ALLOWED_SYMBOLS={sorted(ALLOWED_SYMBOLS)} | STRICT_MODE={STRICT_MODE} "
+        f"(STRICT_TRADE_SYMBOL={STRICT_TRADE_SYMBOL}, STRICT_ALLOWED_SYMBOLS={STRICT_ALLOWED_SYMBOLS})",
+        flush=True
+    )
+    print("==================================================", flush=True)
 
 # =============================================================
-# 2) IMPORT EXECUTORS (sin side-effects)
+# 2) EXECUTORS (import diferido, sin side-effects)
 #    IMPORTANTE: Estos módulos NO deben hacer Binance calls al import.
 # =============================================================
 
-from utils.trade_executor_v2 import handle_spot_signal
-from utils.trade_executor_margin import handle_margin_signal
+def _spot_handler():
+    from utils.trade_executor_v2 import handle_spot_signal
+    return handle_spot_signal
+
+def _margin_handler():
+    from utils.trade_executor_margin import handle_margin_signal
+    return handle_margin_signal
 
 # =============================================================
 # 3) HELPERS
@@ -87,6 +102,8 @@ def route_signal(signal: Dict[str, Any]) -> Dict[str, Any]:
         "context": {... opcional ...}
       }
     """
+    _print_banner_once()
+
     # ---------------------------
     # A) DRY_RUN global
     # ---------------------------
@@ -121,7 +138,7 @@ def route_signal(signal: Dict[str, Any]) -> Dict[str, Any]:
     # ---------------------------
     if USE_MARGIN:
         print(f"🟣 [Router] MARGIN → {side} {symbol}", flush=True)
-        return handle_margin_signal(symbol=symbol, side=side, context=context)
+        return _margin_handler()(symbol=symbol, side=side, context=context)
 
     print(f"🟢 [Router] SPOT → {side} {symbol}", flush=True)
-    return handle_spot_signal(symbol=symbol, side=side, context=context)
+    return _spot_handler()(symbol=symbol, side=side, context=context)
@@ -0,0 +1,239 @@
+# utils/walk_forward.py
+# ==========================================================
+# Walk-forward Winner/Champion (ventanas train/test rodantes)
+# ----------------------------------------------------------
+# - Las features son causales (ventanas finitas), así que cada
+#   combinación de parámetros se corre UNA vez sobre todo el histórico
+#   y cada fold solo re-filtra sus trades por ventana: nada se
+#   reconstruye al deslizar la ventana (re-fit incremental).
+# - Las corridas por combinación van en paralelo (ProcessPool +
+#   shared memory de param_sweep); la selección por fold es vectorizada.
+# - Métricas por fold = definiciones de calcular_estadisticas_long_only.
+# ==========================================================
+
+from __future__ import annotations
+
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from . import param_sweep
+from .evaluation import estadisticas_desde_pares
+
+BARS_PER_DAY_5M = 288
+
+# claves de _window_metrics (objetivos válidos para elegir en train)
+WINDOW_METRICS = ("hit_rate", "n_trades", "ganancia_media", "perdida_media", "profit_factor", "total_return")
+
+
+def make_folds(
+    n: int,
+    train_bars: int,
+    test_bars: int,
+    step_bars: Optional[int] = None,
+    warmup_bars: int = 0,
+    anchored: bool = False,
+) -> List[Dict[str, int]]:
+    """
+    Folds por posición: [train_start, train_end) → [test_start, test_end).
+    anchored=True: el train siempre arranca en warmup_bars (ventana expansiva).
+    """
+    step = int(step_bars or test_bars)
+    folds = []
+    start = int(warmup_bars)
+    k = 0
+    while start + train_bars + test_bars <= n:
+        folds.append({
+            "fold": k,
+            "train_start": int(warmup_bars) if anchored else start,
+            "train_end": start + train_bars,
+            "test_start": start + train_bars,
+            "test_end": start + train_bars + test_bars,
+        })
+        start += step
+        k += 1
+    return folds
+
+
+def _worker_trades(combo: Dict[str, Any]) -> Dict[str, Any]:
+    W = param_sweep._W
+    try:
+        res = param_sweep.evaluate_params(W["df"], combo, exec_df=W["exec_df"], cache=W["cache"], **W["bt_kwargs"])
+        tr = res["trades"]
+        idx = W["df"].index
+        return {
+            "combo": combo,
+            "entry_pos": idx.get_indexer(tr["entry_fill_ts"]).astype(np.int64),
+            "exit_pos": idx.get_indexer(tr["exit_fill_ts"]).astype(np.int64),
+            "ret": tr["ret"].to_numpy(dtype=float),
+            "error": None,
+        }
+    except Exception as e:
+        vacio = np.array([], dtype=np.int64)
+        return {"combo": combo, "entry_pos": vacio, "exit_pos": vacio, "ret": np.array([]), "error": str(e)}
+
+
+def _window_returns(run: Dict[str, Any], start: int, end: int) -> np.ndarray:
+    """
+    Retornos de los trades COMPLETOS dentro de [start, end): entran en o después
+    de start y salen antes de end. Un trade que entra al final del train y sale
+    en el test no cuenta en ninguno de los dos (evita leakage del test al train).
+    Los trades son secuenciales (long-only) → entry_pos y exit_pos están ordenados.
+    """
+    a = int(np.searchsorted(run["entry_pos"], start, side="left"))
+    b = int(np.searchsorted(run["exit_pos"], end, side="left"))
+    return run["ret"][a:max(a, b)]
+
+
+def _window_metrics(ret: np.ndarray) -> Dict[str, float]:
+    hit_rate, n, gan_media, perd_media, pf = estadisticas_desde_pares(ret)
+    return {
+        "hit_rate": float(hit_rate),
+        "n_trades": int(n),
+        "ganancia_media": float(gan_media),
+        "perdida_media": float(perd_media),
+        "profit_factor": float(pf),
+        "total_return": float(np.prod(1.0 + ret) - 1.0) if len(ret) else 0.0,
+    }
+
+
+def run_walk_forward(
+    df: pd.DataFrame,
+    space: Optional[Dict[str, Any]] = None,
+    mode: str = "grid",
+    n_iter: int = 200,
+    exec_df: Optional[pd.DataFrame] = None,
+    train_days: float = 30,
+    test_days: float = 7,
+    step_days: Optional[float] = None,
+    warmup_bars: int = 300,
+    anchored: bool = False,
+    workers: Optional[int] = None,
+    objective: str = "total_return",
+    min_trades: int = 5,
+    out_path: Optional[str] = None,
+    seed: int = 42,
+    cache_mb: float = 1024.0,
+    **bt_kwargs,
+) -> Dict[str, Any]:
+    """
+    Walk-forward sobre histórico 5m.
+
+    Por fold: elige la combinación con mejor `objective` en train (con al menos
+    `min_trades`) y reporta su desempeño out-of-sample en test.
+    objective: cualquiera de WINDOW_METRICS (hit_rate | n_trades | ganancia_media |
+    perdida_media | profit_factor | total_return).
+    Un trade cuenta en una ventana solo si entra Y sale dentro de ella.
+    Con step_days < test_days los tests se solapan: el summary agregado usa cada
+    tramo una sola vez (gana el fold más nuevo); las filas por fold no se recortan.
+
+    Retorna {"folds": DataFrame por fold, "summary": dict OOS agregado}.
+    """
+    if objective not in WINDOW_METRICS:
+        raise ValueError(f"objective inválido para walk-forward: {objective} ({' | '.join(WINDOW_METRICS)})")
+
+    space = dict(space or param_sweep.DEFAULT_GRID)
+    workers = int(workers or os.cpu_count() or 1)
+
+    if mode == "grid":
+        combos = param_sweep.grid_combos(space)
+    elif mode == "random":
+        combos = param_sweep.random_combos(space, n_iter, seed=seed)
+    else:
+        raise ValueError(f"mode inválido para walk-forward: {mode} (grid|random)")
+    combos = param_sweep._group_sort(combos)
+
+    folds = make_folds(
+        len(df),
+        train_bars=int(train_days * BARS_PER_DAY_5M),
+        test_bars=int(test_days * BARS_PER_DAY_5M),
+        step_bars=int(step_days * BARS_PER_DAY_5M) if step_days else None,
+        warmup_bars=warmup_bars,
+        anchored=anchored,
+    )
+    if not folds:
+        raise ValueError("Histórico insuficiente para al menos un fold train+test.")
+
+    # 1) una corrida full-history por combinación (paralelo)
+    shm_v, shm_i, meta = param_sweep._share_frames(df, exec_df)
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=param_sweep._init_worker,
+            initargs=(meta, bt_kwargs, cache_mb),
+        ) as pool:
+            chunk = max(1, math.ceil(len(combos) / (workers * 4)))
+            runs = list(pool.map(_worker_trades, combos, chunksize=chunk))
+    finally:
+        for shm in (shm_v, shm_i):
+            shm.close()
+            shm.unlink()
+
+    runs = [r for r in runs if r["error"] is None]
+    if not runs:
+        raise RuntimeError("Todas las combinaciones fallaron en walk-forward.")
+
+    # 2) por fold: re-fit en train (slices por searchsorted) y evaluación OOS
+    idx = df.index
+    rows = []
+    elegidos = []  # (fold, run) con selección, en orden
+
+    for f in folds:
+        best = None
+        best_score = -np.inf
+
+        for r in runs:
+            tr_ret = _window_returns(r, f["train_start"], f["train_end"])
+            if len(tr_ret) < min_trades:
+                continue
+            score = _window_metrics(tr_ret)[objective]
+            if np.isfinite(score) and score > best_score:
+                best_score = score
+                best = r
+
+        row = {
+            "fold": f["fold"],
+            "train_start": idx[f["train_start"]],
+            "train_end": idx[f["train_end"] - 1],
+            "test_start": idx[f["test_start"]],
+            "test_end": idx[f["test_end"] - 1],
+        }
+
+        if best is None:
+            row.update({"selected": False, f"train_{objective}": np.nan})
+            rows.append(row)
+            continue
+
+        te_ret = _window_returns(best, f["test_start"], f["test_end"])
+        elegidos.append((f, best))
+
+        row.update({"selected": True, f"train_{objective}": best_score})
+        row.update(best["combo"])
+        row.update({f"oos_{k}": v for k, v in _window_metrics(te_ret).items()})
+        rows.append(row)
+
+    table = pd.DataFrame(rows)
+
+    # OOS agregado sin contar dos veces un tramo (tests solapados si step < test):
+    # cada fold llega hasta el test_start del siguiente fold seleccionado
+    oos_rets, corte = [], None
+    for f, best in reversed(elegidos):
+        fin = f["test_end"] if corte is None else min(f["test_end"], corte)
+        oos_rets.append(_window_returns(best, f["test_start"], fin))
+        corte = f["test_start"]
+    all_oos = np.concatenate(oos_rets[::-1]) if oos_rets else np.array([])
+    summary = {f"oos_{k}": v for k, v in _window_metrics(all_oos).items()}
+    summary["folds"] = len(folds)
+    summary["folds_selected"] = int(table["selected"].sum())
+    if "oos_total_return" in table.columns:
+        summary["folds_profitable"] = int((table["oos_total_return"] > 0).sum())
+
+    if out_path:
+        table.to_csv(out_path, index=False)
+        print(f"[walk_forward] ✓ {len(table)} folds → {out_path}", flush=True)
+
+    return {"folds": table, "summary": summary}